@@ -0,0 +1,184 @@
+"""
+Hodograph solution of the quadratic-drag trajectory.
+
+For a = -g·ẑ - k·|v|·v the horizontal velocity u is a closed-form function
+of the slope p = tan(φ) of the trajectory (the classical first integral
+of the ballistic problem):
+
+    1/u² = 1/u0² + (k/g)·(F(p0) - F(p)),   F(p) = p·sqrt(1 + p²) + asinh(p)
+
+and x, z, t follow as integrals over p of smooth functions:
+
+    x = ∫ u² dp / g,   z = ∫ u² p dp / g,   t = ∫ u dp / g   (from p to p0).
+
+With k = 0 this is exactly the vacuum solution of balisticLogic, so the
+drag enters as a correction of u(p) rather than a time integration. The
+integrals are taken with 16-point Gauss-Legendre quadrature; the difference
+to the 8-point rule is the error estimate, which test/analyticValidation.py
+checks against the Dormand-Prince reference.
+"""
+import math
+
+import numpy as np
+
+G = 9.81
+MIL = 2 * math.pi / 6400
+# Closer to vertical the horizontal velocity vanishes and u(p) is not usable
+MAX_ANGLE = 89.0
+IMPACT_ITERATIONS = 30
+ELEVATION_ITERATIONS = 20
+
+_NODES = [tuple(zip(*(values.tolist() for values in np.polynomial.legendre.leggauss(n)))) for n in (8, 16)]
+_COARSE, _FINE = _NODES
+
+
+def _f(p):
+    return p * math.sqrt(1.0 + p * p) + math.asinh(p)
+
+
+def _quadrature(c, k, p0, p1, nodes):
+    """(x, z, t) gained while the slope falls from p0 to p1; c = 1/u0² + k/g·F(p0)"""
+    half = 0.5 * (p0 - p1)
+    mid = 0.5 * (p0 + p1)
+    x = z = t = 0.0
+    for node, weight in nodes:
+        p = mid + half * node
+        u2 = 1.0 / (c - k / G * _f(p))
+        x += weight * u2
+        z += weight * u2 * p
+        t += weight * math.sqrt(u2)
+    scale = half / G
+    return x * scale, z * scale, t * scale
+
+
+def _launch(v0, angle, k):
+    """(p0, c) of a launch at angle degrees: c = 1/u0² + k/g·F(p0)"""
+    angle_rad = math.radians(angle)
+    u0 = v0 * math.cos(angle_rad)
+    p0 = math.tan(angle_rad)
+    return p0, 1.0 / (u0 * u0) + k / G * _f(p0)
+
+
+def impact(v0, angle, k, height_diff, nodes=_FINE, slope=None):
+    """
+    Impact on the descending branch at height_diff.
+
+    Returns (range, flight_time, impact_slope) or None if the shell never
+    gets there. The impact slope p is found by Newton iterations on z(p),
+    dz/dp = -u²·p/g, starting from slope if given.
+    """
+    if not 0.0 < angle < MAX_ANGLE or v0 <= 0.0:
+        return None
+    p0, c = _launch(v0, angle, k)
+
+    if _quadrature(c, k, p0, 0.0, nodes)[1] < height_diff:
+        return None
+
+    p = slope
+    if p is None or p >= 0.0:
+        # Vacuum impact slope; drag makes the descent steeper
+        angle_rad = math.radians(angle)
+        w = v0 * math.sin(angle_rad)
+        p = -1.2 * math.sqrt(max(w * w - 2.0 * G * height_diff, 0.0)) / (v0 * math.cos(angle_rad)) - 0.01
+    for _ in range(IMPACT_ITERATIONS):
+        x, z, t = _quadrature(c, k, p0, p, nodes)
+        u2 = 1.0 / (c - k / G * _f(p))
+        step = (z - height_diff) / (-u2 * p / G)
+        p_next = p - step
+        if p_next >= 0.0:
+            p_next = 0.5 * p
+        if abs(p_next - p) < 1e-12 * (1.0 + abs(p)):
+            x, _, t = _quadrature(c, k, p0, p_next, nodes)
+            return x, t, p_next
+        p = p_next
+    return None
+
+
+def impact_error(v0, angle, k, height_diff):
+    """Range error estimate (m) of impact(): difference of the 16- and 8-point rules"""
+    fine = impact(v0, angle, k, height_diff, _FINE)
+    coarse = impact(v0, angle, k, height_diff, _COARSE)
+    if fine is None or coarse is None:
+        return math.inf
+    return abs(fine[0] - coarse[0])
+
+
+def _vacuum_angle(v0, distance, height_diff, high_arc):
+    """Vacuum elevation in degrees through the target, or None"""
+    a = G * distance * distance / (2.0 * v0 * v0)
+    discriminant = distance * distance - 4.0 * a * (a + height_diff)
+    if discriminant < 0.0:
+        return None
+    root = math.sqrt(discriminant)
+    tan_theta = (distance + root) / (2.0 * a) if high_arc else (distance - root) / (2.0 * a)
+    return math.degrees(math.atan(tan_theta))
+
+
+def find_elevation(v0, k, distance, height_diff, high_arc=False):
+    """
+    Elevation in degrees that lands the shell on the target.
+
+    Newton iterations on the range from the vacuum angle; if the start is on
+    the wrong side of the maximum-range angle it is moved by 1° steps.
+    Returns (angle, error_mil) - error_mil is the estimated elevation error -
+    or (None, None) when there is no solution on the requested arc.
+    """
+    if distance <= 0.0 or v0 <= 0.0:
+        return None, None
+    vacuum = _vacuum_angle(v0, distance, height_diff, high_arc)
+    angle = vacuum if vacuum is not None else 45.0
+
+    step = math.degrees(MIL)
+    impact_slope = None
+    for _ in range(ELEVATION_ITERATIONS):
+        hit = impact(v0, angle, k, height_diff, slope=impact_slope)
+        if hit is None:
+            return None, None
+        impact_slope = hit[2]
+        shifted = impact(v0, angle + step, k, height_diff, slope=impact_slope)
+        if shifted is None:
+            return None, None
+        slope = shifted[0] - hit[0]  # m per mil
+        # The low arc gains range with elevation, the high arc loses it
+        if slope == 0.0 or (slope < 0.0) != high_arc:
+            angle += 1.0 if high_arc else -1.0
+            continue
+        delta = (distance - hit[0]) / slope * step
+        angle += delta
+        if abs(delta) < 1e-8:
+            miss = abs(distance - hit[0]) + impact_error(v0, angle, k, height_diff)
+            return angle, miss / abs(slope)
+    return None, None
+
+
+def solve(v0, k, distance, height_diff, high_arc=False, tol=0.05):
+    """
+    Firing solution from the hodograph model if its error estimate is within tol (mil).
+
+    v0, k - already corrected for temperature and air density.
+    Returns a dict: elevation (mil), flight_time (s), range_per_mil (m per
+    +1 mil), apex_height (m), impact_angle (degrees), impact_velocity (m/s)
+    and error (estimated elevation error, mil); None means the caller has
+    to integrate.
+    """
+    angle, error = find_elevation(v0, k, distance, height_diff, high_arc)
+    if angle is None or error > tol:
+        return None
+    hit = impact(v0, angle, k, height_diff)
+    shifted = impact(v0, angle + math.degrees(MIL), k, height_diff)
+    if hit is None or shifted is None:
+        return None
+
+    # The apex is where the slope reaches 0; at impact u² follows from the slope
+    p0, c = _launch(v0, angle, k)
+    p = hit[2]
+    u2 = 1.0 / (c - k / G * _f(p))
+    return {
+        "elevation": angle * (6400 / 360),
+        "flight_time": hit[1],
+        "range_per_mil": shifted[0] - hit[0],
+        "apex_height": _quadrature(c, k, p0, 0.0, _FINE)[1],
+        "impact_angle": math.degrees(math.atan(-p)),
+        "impact_velocity": math.sqrt(u2 * (1.0 + p * p)),
+        "error": error,
+    }
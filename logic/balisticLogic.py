@@ -1,6 +1,16 @@
 import math
 
-def calculate_elevation_with_height(R, v, h_s, h_t, g=9.79):
+import numpy as np
+
+# Status codes of the *_batch functions
+STATUS_OK = 0
+STATUS_OUT_OF_RANGE = 1
+STATUS_ERROR = 2
+
+# Free fall acceleration of the vacuum model (default g of the functions below)
+VACUUM_G = 9.79
+
+def calculate_elevation_with_height(R, v, h_s, h_t, g=9.79, rounded=True):
     max_R = v ** 2 / g
     if R > max_R:
         return "Дальність неможлива"
@@ -13,15 +23,16 @@ def calculate_elevation_with_height(R, v, h_s, h_t, g=9.79):
 
     theta_new_rad = theta_rad + theta_correction_rad
     theta_mil = theta_new_rad * (6400 / (2 * math.pi))
-    return round(theta_mil)
+    return round(theta_mil) if rounded else theta_mil
 
-def calculate_high_elevation(R, v, h_s, h_t, g=9.79):
+def calculate_high_elevation(R, v, h_s, h_t, g=9.79, rounded=True):
     '''
     R - Horizontal distance to the target (m)
     v - Initial velocity of the projectile (m/s)
     h_s - Height of the shooter (m)
     h_t - Target height (m)
     g - Free fall acceleration (m/s²)
+    rounded - round to a whole mil (False: exact angle in mil)
     '''
     delta_h = h_t - h_s
 
@@ -45,7 +56,7 @@ def calculate_high_elevation(R, v, h_s, h_t, g=9.79):
     theta_high = max(theta1, theta2)
     theta_mil = theta_high * (6400 / (2 * math.pi))
 
-    return round(theta_mil)
+    return round(theta_mil) if rounded else theta_mil
 
 def mil_to_rad(mils):
     return mils * (2 * math.pi / 6400)
@@ -63,7 +74,7 @@ def calculate_range(v, theta_rad, h_s=0, h_t=0, g=9.79):
         vy = v * math.sin(theta_rad)
         delta_h = h_t - h_s
 
-        discriminant = vy ** 2 + 2 * g * delta_h
+        discriminant = vy ** 2 - 2 * g * delta_h
         if discriminant < 0:
             return None
 
@@ -96,16 +107,96 @@ def calculate_flight_time(v, theta_rad, h_s=0, h_t=0, g=9.79):
     vy = v * math.sin(theta_rad)
     delta_h = h_t - h_s
 
-    discriminant = 2 * vy + 2 * g * delta_h
+    discriminant = vy ** 2 - 2 * g * delta_h
     if discriminant < 0:
         return "Цель недостижима (по высоте)"
 
     t = (vy + math.sqrt(discriminant)) / g
     return t
 
-print(calculate_elevation_with_height(1900, 167.7, 0, 0))
-print(calculate_high_elevation(4000, 226.6, 0, 100))
-theta_mil = 240
-v = 200
-print(f"Δдальность на 1 mil при {theta_mil} mil:", range_difference_for_1mil(v, theta_mil, 0, 0))
-print (f"Время полета :" , calculate_flight_time(v, theta_mil, 0, 0))
\ No newline at end of file
+def _broadcast(*values):
+    return np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in values))
+
+
+def calculate_elevation_with_height_batch(R, v, h_s, h_t, g=9.79):
+    """
+    calculate_elevation_with_height over arrays; arguments broadcast together.
+    Returns (elevation in mil, NaN where not solved; status codes).
+    """
+    R, v, h_s, h_t = _broadcast(R, v, h_s, h_t)
+    status = np.where((R > 0) & (v > 0), STATUS_OK, STATUS_ERROR).astype(np.int8)
+    with np.errstate(all='ignore'):
+        status[(status == STATUS_OK) & (R > v ** 2 / g)] = STATUS_OUT_OF_RANGE
+        theta_rad = np.arcsin(R * g / v ** 2) / 2 + np.arctan((h_t - h_s) / R)
+    elevation = np.where(status == STATUS_OK, np.rint(theta_rad * (6400 / (2 * np.pi))), np.nan)
+    return elevation, status
+
+
+def calculate_high_elevation_batch(R, v, h_s, h_t, g=9.79):
+    """
+    calculate_high_elevation over arrays; arguments broadcast together.
+    Returns (elevation in mil, NaN where not solved; status codes).
+    """
+    R, v, h_s, h_t = _broadcast(R, v, h_s, h_t)
+    status = np.where((R > 0) & (v > 0), STATUS_OK, STATUS_ERROR).astype(np.int8)
+    with np.errstate(all='ignore'):
+        A = (g * R ** 2) / (2 * v ** 2)
+        C = A + (h_t - h_s)
+        discriminant = R ** 2 - 4 * A * C
+        status[(status == STATUS_OK) & (discriminant < 0)] = STATUS_OUT_OF_RANGE
+        # Larger root of A·T² - R·T + C = 0, T = tan(theta)
+        theta_high = np.arctan((R + np.sqrt(discriminant)) / (2 * A))
+    elevation = np.where(status == STATUS_OK, np.rint(theta_high * (6400 / (2 * np.pi))), np.nan)
+    return elevation, status
+
+
+def calculate_range_batch(v, theta_rad, h_s=0, h_t=0, g=9.79):
+    """
+    calculate_range over arrays; arguments broadcast together.
+    Returns (range in m, NaN where the target height is never reached; status codes).
+    """
+    v, theta_rad, h_s, h_t = _broadcast(v, theta_rad, h_s, h_t)
+    status = np.where(v > 0, STATUS_OK, STATUS_ERROR).astype(np.int8)
+    delta_h = h_t - h_s
+    vx = v * np.cos(theta_rad)
+    vy = v * np.sin(theta_rad)
+    with np.errstate(all='ignore'):
+        discriminant = vy ** 2 - 2 * g * delta_h
+        status[(status == STATUS_OK) & (discriminant < 0)] = STATUS_OUT_OF_RANGE
+        R = np.where(delta_h == 0, v ** 2 * np.sin(2 * theta_rad) / g, vx * (vy + np.sqrt(discriminant)) / g)
+    return np.where(status == STATUS_OK, R, np.nan), status
+
+
+def range_difference_for_1mil_batch(v, theta_mil, h_s=0, h_t=0, g=9.79):
+    """
+    range_difference_for_1mil over arrays.
+    Returns (range change per +1 mil in m, NaN where unavailable; status codes).
+    """
+    theta_mil = np.asarray(theta_mil, dtype=np.float64)
+    r1, status1 = calculate_range_batch(v, mil_to_rad(theta_mil), h_s, h_t, g)
+    r2, status2 = calculate_range_batch(v, mil_to_rad(theta_mil + 1), h_s, h_t, g)
+    return r2 - r1, np.maximum(status1, status2)
+
+
+def calculate_flight_time_batch(v, theta_rad, h_s=0, h_t=0, g=9.79):
+    """
+    calculate_flight_time over arrays; arguments broadcast together.
+    Returns (flight time in s, NaN where the target height is never reached; status codes).
+    """
+    v, theta_rad, h_s, h_t = _broadcast(v, theta_rad, h_s, h_t)
+    status = np.where(v > 0, STATUS_OK, STATUS_ERROR).astype(np.int8)
+    vy = v * np.sin(theta_rad)
+    with np.errstate(all='ignore'):
+        discriminant = vy ** 2 - 2 * g * (h_t - h_s)
+        status[(status == STATUS_OK) & (discriminant < 0)] = STATUS_OUT_OF_RANGE
+        t = (vy + np.sqrt(discriminant)) / g
+    return np.where(status == STATUS_OK, t, np.nan), status
+
+
+if __name__ == "__main__":
+    print(calculate_elevation_with_height(1900, 167.7, 0, 0))
+    print(calculate_high_elevation(4000, 226.6, 0, 100))
+    theta_mil = 240
+    v = 200
+    print(f"Δдальность на 1 mil при {theta_mil} mil:", range_difference_for_1mil(v, theta_mil, 0, 0))
+    print (f"Время полета :" , calculate_flight_time(v, theta_mil, 0, 0))
@@ -1,32 +1,73 @@
+import math
 import numpy as np
-import numba as nb
-import matplotlib.pyplot as plt
-import time
+
+from logic import metrics
+from logic.analyticDrag import find_elevation as analytic_elevation, solve as analytic_solve
+
 
 g = 9.81
 k_base = 6e-05
 rho_standard = 1.225
 
+BACKENDS = ("serial", "parallel")
+# Способ поиска углов: "serial" - метод Брента, "parallel" - k-секция на всех ядрах
+_backend = "serial"
+
 def degrees_to_mil(degrees):
     return degrees * (6400 / 360)
 
-def measure_execution_time(func):
-    def wrapper(*args, **kwargs):
-        start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        exec_time = time.perf_counter() - start_time
-        if func.__name__ != 'simulate_trajectory_numba':
-            print(f"⏱️ Время выполнения {func.__name__}: {exec_time:.4f} секунд")
-        return result
-    return wrapper
-
 
 def mil_to_degrees(mils):
     return mils * (360 / 6400)
 
 
-@measure_execution_time
-def range_difference_for_1mil_airfriction(v0, angle_mil, temperature=15, pressure=1013, k_base=6e-05, height_diff=0):
+def set_backend(name):
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown solver backend: {name}")
+    _backend = name
+
+
+def get_backend():
+    return _backend
+
+
+def set_num_threads(count):
+    """Число потоков для параллельного решателя (не больше числа ядер Numba)"""
+    try:
+        import numba
+    except ImportError:
+        return
+    numba.set_num_threads(max(1, min(int(count), numba.config.NUMBA_NUM_THREADS)))
+
+
+def get_num_threads():
+    try:
+        import numba
+    except ImportError:
+        return 1
+    return numba.get_num_threads()
+
+
+def air_corrected(v0, temperature, pressure, k_base):
+    """
+    Поправка начальной скорости и коэффициента сопротивления на метео
+
+    Возвращает (v0_corrected, k)
+    """
+    pressure_pa = pressure * 100
+    temperature_k = temperature + 273.15
+    R = 287.05
+    rho_calculated = pressure_pa / (R * temperature_k)
+    rho_ratio = rho_calculated / rho_standard
+    k = k_base * rho_ratio
+    v0_corrected = v0 * math.sqrt(temperature_k / 288.15)
+    return v0_corrected, k
+
+
+@metrics.timed("drag.range_per_mil")
+def range_difference_for_1mil_airfriction(v0, angle_mil, temperature=15, pressure=1013, k_base=6e-05, height_diff=0,
+                                          method="euler"):
     """
     Вычисляет разницу в дальности при изменении угла на 1 mil с учетом сопротивления воздуха
 
@@ -37,26 +78,25 @@ def range_difference_for_1mil_airfriction(v0, angle_mil, temperature=15, pressur
     pressure (float): атмосферное давление (гПа)
     k_base (float): базовый коэффициент сопротивления воздуха
     height_diff (float): разница высот между стрелком и целью (м)
+    method (str): интегратор, "euler" или "dopri"
 
     Возвращает:
     float: разница в дальности при изменении угла на 1 mil (м)
     """
-    # Корректировка на основе атмосферных условий (как в ваших существующих функциях)
-    pressure_pa = pressure * 100
-    temperature_k = temperature + 273.15
-    R = 287.05
-    rho_calculated = pressure_pa / (R * temperature_k)
-    rho_ratio = rho_calculated / rho_standard
-    k = k_base * rho_ratio
-    v0_corrected = v0 * np.sqrt(temperature_k / 288.15)
+    if method == "euler":
+        # Одна интеграция с чувствительностями вместо двух выстрелов
+        table = correction_table(v0, angle_mil, temperature, pressure, k_base, height_diff)
+        return table["range_per_mil"] if table is not None else "Недоступно"
+
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
 
     # Конвертируем милы в градусы
     angle_deg = mil_to_degrees(angle_mil)
     angle_plus_1mil_deg = mil_to_degrees(angle_mil + 1)
 
     # Находим дальность для обоих углов, используя вашу существующую функцию симуляции
-    range1 = find_max_range(v0_corrected, angle_deg, k, height_diff)
-    range2 = find_max_range(v0_corrected, angle_plus_1mil_deg, k, height_diff)
+    range1 = find_max_range(v0_corrected, angle_deg, k, height_diff, method=method)
+    range2 = find_max_range(v0_corrected, angle_plus_1mil_deg, k, height_diff, method=method)
 
     if range1 is None or range2 is None:
         return "Недоступно"
@@ -64,71 +104,428 @@ def range_difference_for_1mil_airfriction(v0, angle_mil, temperature=15, pressur
     return range2 - range1
 
 
-def find_max_range(v0, angle, k, height_diff, dt=0.01):
+def impact_sensitivities(v0, angle, k, height_diff, dt=0.01):
+    """
+    Точка падения схемы Эйлера и ее производные за одну интеграцию.
+
+    Возвращает словарь: range, flight_time, apex_height, impact_angle
+    (градусы), impact_velocity и производные range_per_mil, range_per_v0,
+    range_per_k, range_per_height и такие же time_per_* (по углу - на 1 mil),
+    или None, если высота цели не достигнута.
+    """
+    from logic.dragKernels import sensitivities_numba
+
+    out = np.empty(13)
+    if not sensitivities_numba(v0, angle, k, height_diff, dt, out):
+        return None
+    out = out.tolist()
+    rad_per_mil = math.radians(mil_to_degrees(1.0))
+    return {
+        "range": out[0],
+        "flight_time": out[1],
+        "range_per_mil": out[2] * rad_per_mil,
+        "range_per_v0": out[3],
+        "range_per_k": out[4],
+        "range_per_height": out[5],
+        "time_per_mil": out[6] * rad_per_mil,
+        "time_per_v0": out[7],
+        "time_per_k": out[8],
+        "time_per_height": out[9],
+        "apex_height": out[10],
+        "impact_angle": out[11],
+        "impact_velocity": out[12],
+    }
+
+
+def correction_table(v0, angle_mil, temperature, pressure, k_base, height_diff=0, dt=0.01):
+    """
+    Решение и таблица поправок по метео из одной интеграции.
+
+    Производные impact_sensitivities по v0_corrected и k пересчитываются
+    через air_corrected в производные по исходным v0 (м/с), температуре (°C)
+    и давлению (гПа); производные по высоте цели (м) - без изменений.
+    Возвращает словарь range, flight_time, range_per_mil, range_per_v0,
+    range_per_temperature, range_per_pressure, range_per_height и такие же
+    time_per_* или None, если высота цели не достигнута.
+    """
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+    point = impact_sensitivities(v0_corrected, mil_to_degrees(angle_mil), k, height_diff, dt)
+    if point is None:
+        return None
+
+    temperature_k = temperature + 273.15
+    # v0_corrected ~ sqrt(T), k ~ P / T
+    dv0_dv0 = v0_corrected / v0 if v0 else math.sqrt(temperature_k / 288.15)
+    dv0_dt = v0_corrected / (2 * temperature_k)
+    dk_dt = -k / temperature_k
+    dk_dp = k / pressure
+
+    table = {"range": point["range"], "flight_time": point["flight_time"]}
+    for name in ("range", "time"):
+        per_v0, per_k = point[f"{name}_per_v0"], point[f"{name}_per_k"]
+        table[f"{name}_per_mil"] = point[f"{name}_per_mil"]
+        table[f"{name}_per_v0"] = per_v0 * dv0_dv0
+        table[f"{name}_per_temperature"] = per_v0 * dv0_dt + per_k * dk_dt
+        table[f"{name}_per_pressure"] = per_k * dk_dp
+        table[f"{name}_per_height"] = point[f"{name}_per_height"]
+
+    return table
+
+
+def find_max_range(v0, angle, k, height_diff, dt=0.01, method="euler"):
     """
     Вспомогательная функция для определения максимальной дальности полета
     с заданными параметрами
     """
-    angle_rad = np.radians(angle)
-    vx, vz = v0 * np.cos(angle_rad), v0 * np.sin(angle_rad)
-    x, z = 0.0, 0.0
+    return impact_point(v0, angle, k, height_diff, dt, method)[0]
 
-    while z >= min(0, height_diff):
-        v = np.sqrt(vx ** 2 + vz ** 2)
-        dvx_dt = -k * vx * v
-        dvz_dt = -g - k * vz * v
-        vx += dvx_dt * dt
-        vz += dvz_dt * dt
-        x += vx * dt
-        z += vz * dt
 
-        # Если достигли высоты цели при нисходящей траектории
-        if z <= height_diff and vz < 0:
-            # Линейная интерполяция для точного определения дальности
-            if z != height_diff:
-                prev_z = z - vz * dt
-                prev_x = x - vx * dt
-                if prev_z != z:  # Избегаем деления на ноль
-                    fraction = (height_diff - z) / (prev_z - z)
-                    x = x + fraction * (prev_x - x)
-            return x
-
-    # Если траектория не пересекает высоту цели
-    return None
-
-@nb.njit(fastmath=True)
-def simulate_trajectory_numba(v0, angle, k, target_distance, target_height, dt=0.01):
-    angle = np.radians(angle)
-    vx, vz = v0 * np.cos(angle), v0 * np.sin(angle)
-    x, z = 0.0, 0.0
-    trajectory = np.zeros((10000, 2))
-    idx = 0
+METHODS = ("euler", "dopri")
 
-    while x <= target_distance and z >= min(0, target_height):
-        v = np.sqrt(vx ** 2 + vz ** 2)
+
+def impact_point(v0, angle, k, height_diff, dt=0.01, method="euler"):
+    """
+    Дальность и время полета до высоты цели на нисходящей ветви.
+
+    method="euler" - явный Эйлер с шагом dt, method="dopri" - адаптивный
+    Дорманд-Принс 5(4), dt при этом не используется.
+    Возвращает (x, t) или (None, None), если траектория не пересекает высоту цели.
+    """
+    if method == "dopri":
+        x, t, _ = integrate_dopri(v0, angle, k, height_diff)
+        return x, t
+    if method != "euler":
+        raise ValueError(f"Unknown integration method: {method}")
+
+    from logic.dragKernels import impact_numba
+
+    x, t, _, _, hit = impact_numba(v0, angle, k, height_diff, dt)
+    if not hit:
+        # Если траектория не пересекает высоту цели
+        return None, None
+    return x, t
+
+
+def integrate_dopri(v0, angle, k, height_diff, rtol=1e-8, atol=1e-6, max_step=2.0, max_time=300.0):
+    """
+    Адаптивный Дорманд-Принс 5(4) с поиском момента падения
+    (скомпилированное ядро logic.dragKernels.dopri_numba).
+
+    Шаг подбирается по оценке локальной ошибки. Когда снаряд на нисходящей
+    ветви пересекает высоту цели, момент пересечения уточняется на
+    эрмитовом плотном выводе шага (метод Ньютона с защитой бисекцией).
+
+    Возвращает (x, t, steps); x и t - None, если высота цели не достигнута.
+    """
+    from logic.dragKernels import dopri_numba
+
+    x, t, steps, hit = dopri_numba(v0, angle, k, height_diff, rtol, atol, max_step, max_time)
+    if not hit:
+        return None, None, steps
+    return x, t, steps
+
+
+def simulate_batch(v0, angle, k, height_diff, dt=0.01, max_time=300.0):
+    """
+    Пакетный аналог impact_point: N выстрелов интегрируются одновременно.
+
+    v0, angle (градусы), k, height_diff - скаляры или массивы, приводятся
+    к общей форме по правилам NumPy. Все выстрелы делают шаг Эйлера разом;
+    выстрел выбывает, когда пересек высоту цели на нисходящей ветви
+    или опустился ниже min(0, height_diff).
+
+    Возвращает (ranges, times, hit) формы входов; где высота цели не
+    достигнута - NaN и hit=False.
+    """
+    v0, angle, k, height_diff = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (v0, angle, k, height_diff)))
+    shape = v0.shape
+    ranges = np.full(v0.size, np.nan)
+    times = np.full(v0.size, np.nan)
+
+    # Состояние хранится только для летящих снарядов
+    index = np.arange(v0.size)
+    angle_rad = np.radians(angle.ravel())
+    vx = v0.ravel() * np.cos(angle_rad)
+    vz = v0.ravel() * np.sin(angle_rad)
+    k = k.ravel().copy()
+    height = height_diff.ravel().copy()
+    z_min = np.minimum(0.0, height)
+    x = np.zeros(v0.size)
+    z = np.zeros(v0.size)
+
+    t = 0.0
+    while index.size and t < max_time:
+        prev_z = z
+        v = np.sqrt(vx * vx + vz * vz)
         dvx_dt = -k * vx * v
         dvz_dt = -g - k * vz * v
         vx += dvx_dt * dt
         vz += dvz_dt * dt
         x += vx * dt
-        z += vz * dt
+        z = z + vz * dt
+        t += dt
 
-        trajectory[idx] = [x, z]
-        idx += 1
+        hit = (z <= height) & (height < prev_z) & (vz < 0)
+        fell = z < z_min
+        done = hit | fell
+        if not done.any():
+            continue
+
+        if hit.any():
+            # Та же линейная интерполяция, что и в impact_point
+            fraction = (height[hit] - z[hit]) / (-vz[hit] * dt)
+            ranges[index[hit]] = x[hit] - fraction * vx[hit] * dt
+            times[index[hit]] = t - fraction * dt
+
+        keep = ~done
+        index, vx, vz, x, z = index[keep], vx[keep], vz[keep], x[keep], z[keep]
+        k, height, z_min = k[keep], height[keep], z_min[keep]
+
+    hit = ~np.isnan(ranges)
+    return ranges.reshape(shape), times.reshape(shape), hit.reshape(shape)
+
+
+# Углы грубого просмотра при поиске угла максимальной дальности (градусы)
+MAX_RANGE_SCAN = (0.0, 10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0, 80.0, 85.0, 89.0)
+_GOLDEN = (math.sqrt(5) - 1) / 2
 
-        if abs(x - target_distance) < 10.0 and abs(z - target_height) < 10.0:
-            return trajectory[:idx], True
 
-    return trajectory[:idx], False
+def find_max_range_angle(v0, k, height_diff, tol=1e-3, method="euler", dt=0.01):
+    """
+    Угол (градусы) максимальной дальности до высоты height_diff и сама дальность.
+
+    Грубый просмотр MAX_RANGE_SCAN, затем золотое сечение вокруг лучшего узла.
+    Возвращает (None, None), если снаряд не поднимается до высоты цели.
+    """
+    def range_at(angle):
+        r = find_max_range(v0, angle, k, height_diff, dt, method)
+        return r if r is not None else 0.0
+
+    ranges = [range_at(a) for a in MAX_RANGE_SCAN]
+    best = max(range(len(ranges)), key=ranges.__getitem__)
+    if ranges[best] <= 0.0:
+        return None, None
+
+    a = MAX_RANGE_SCAN[max(best - 1, 0)]
+    b = MAX_RANGE_SCAN[min(best + 1, len(MAX_RANGE_SCAN) - 1)]
+    c = b - _GOLDEN * (b - a)
+    d = a + _GOLDEN * (b - a)
+    fc, fd = range_at(c), range_at(d)
+    while b - a > tol:
+        # Оба узла не долетают до высоты цели - они ниже угла, при котором
+        # вершина касается цели, и максимум выше них
+        if fc >= fd and fc > 0.0:
+            b, d, fd = d, c, fc
+            c = b - _GOLDEN * (b - a)
+            fc = range_at(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + _GOLDEN * (b - a)
+            fd = range_at(d)
+
+    if fc >= fd:
+        return c, fc
+    return d, fd
+
+
+def _solve_root(v0, k, distance, height_diff, a, b, xtol, method="euler", dt=0.01):
+    """Угол на отрезке [a, b], при котором дальность равна distance (метод Брента)."""
+    def miss(angle):
+        r = find_max_range(v0, angle, k, height_diff, dt, method)
+        return (r if r is not None else 0.0) - distance
+
+    fa, fb = miss(a), miss(b)
+    if fa == 0.0:
+        return a
+    if fb == 0.0:
+        return b
+    if fa * fb > 0:
+        return None
+
+    from scipy.optimize import brentq
+    angle = brentq(miss, a, b, xtol=xtol)
+
+    # При цели выше орудия дальность рвется на угле, где вершина траектории
+    # только касается высоты цели: корень там фиктивный
+    if abs(miss(angle)) > 1.0:
+        return None
+    return angle
+
+
+# Начальная сетка и число точек на раунд k-секции в параллельном решателе
+PARALLEL_SCAN_POINTS = 32
+PARALLEL_MIN_POINTS = 8
+
+
+def _find_elevations_parallel(v0, k, distance, height_diff, low, high, xtol, dt=0.01):
+    """
+    Параллельный аналог поиска корней: все дальности считаются пакетами
+    через ranges_parallel. Сетка по углам сужается вокруг максимума, пока
+    хоть один узел не долетит до цели, затем оба корня уточняются
+    одновременно k-секцией: каждый раунд делит отрезки на points+1 частей.
+    """
+    from logic.dragKernels import ranges_parallel
+
+    points = max(PARALLEL_MIN_POINTS, get_num_threads())
+    angles = np.linspace(0.0, 90.0, PARALLEL_SCAN_POINTS + 1)
+    ranges = ranges_parallel(v0, k, height_diff, angles, dt)
+
+    # Максимум не найден на сетке - приближаем сетку к лучшему узлу
+    while ranges.max() < distance:
+        best = int(np.argmax(ranges))
+        if ranges[best] <= 0.0 or angles[-1] - angles[0] < xtol:
+            return None, None
+        a = angles[max(best - 1, 0)]
+        b = angles[min(best + 1, len(angles) - 1)]
+        angles = np.linspace(a, b, points + 2)
+        ranges = ranges_parallel(v0, k, height_diff, angles, dt)
+
+    reached = np.nonzero(ranges >= distance)[0]
+    first, last = reached[0], reached[-1]
+
+    # Отрезки [a, b]: на нижнем корне дальность растет, на верхнем - падает
+    brackets = []
+    if low:
+        brackets.append(["low", angles[first - 1], angles[first]] if first > 0 else None)
+    if high:
+        brackets.append(["high", angles[last], angles[last + 1]] if last < len(angles) - 1 else None)
+    brackets = [b for b in brackets if b is not None]
+
+    while any(b[2] - b[1] > xtol for b in brackets):
+        grid = np.concatenate([np.linspace(b[1], b[2], points + 2)[1:-1] for b in brackets])
+        misses = ranges_parallel(v0, k, height_diff, grid, dt) - distance
+        for n, bracket in enumerate(brackets):
+            inner = np.linspace(bracket[1], bracket[2], points + 2)
+            miss = misses[n * points:(n + 1) * points]
+            # Первый узел по другую сторону корня
+            crossed = miss >= 0 if bracket[0] == "low" else miss < 0
+            i = int(np.argmax(crossed)) if crossed.any() else points
+            bracket[1], bracket[2] = inner[i], inner[i + 1]
+
+    result = {"low": None, "high": None}
+    for name, a, b in brackets:
+        angle = 0.5 * (a + b)
+        r = find_max_range(v0, angle, k, height_diff, dt)
+        # Как и в _solve_root: корень на разрыве дальности фиктивный
+        if r is not None and abs(r - distance) <= 1.0:
+            result[name] = float(angle)
+    return result["low"], result["high"]
+
+
+def find_elevations(v0, distance, height_diff, temperature, pressure, k_base, low=True, high=True, xtol=1e-5,
+                    method="euler", analytic_tol=None, dt=0.01):
+    """
+    Углы настильной и навесной траекторий (градусы) за один вызов.
+
+    Сначала находится угол максимальной дальности, затем каждый корень
+    уточняется отдельно методом Брента по дальности падения.
+    xtol - точность угла в градусах (1e-5° ≈ 0.0002 mil).
+    method - интегратор: "euler" или "dopri" (адаптивный Дорманд-Принс).
+    dt - шаг схемы Эйлера, с.
+    При backend "parallel" (set_backend) схема Эйлера считается на всех ядрах.
+    analytic_tol - допуск в mil для аналитического приближения (logic.analyticDrag):
+    ветка, у которой оценка ошибки в допуске, не интегрируется.
+    Возвращает (low_angle, high_angle); недостижимая ветка - None.
+    """
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+
+    analytic = {}
+    if analytic_tol is not None:
+        for high_arc, wanted in ((False, low), (True, high)):
+            if wanted:
+                angle, error = analytic_elevation(v0_corrected, k, distance, height_diff, high_arc)
+                if angle is not None and error <= analytic_tol:
+                    analytic[high_arc] = angle
+        low = low and False not in analytic
+        high = high and True not in analytic
+        if not low and not high:
+            return analytic.get(False), analytic.get(True)
+
+    if _backend == "parallel" and method == "euler":
+        low_angle, high_angle = _find_elevations_parallel(v0_corrected, k, distance, height_diff, low, high, xtol,
+                                                          dt)
+    else:
+        max_angle, max_range = find_max_range_angle(v0_corrected, k, height_diff, method=method, dt=dt)
+        if max_angle is None or max_range < distance:
+            low_angle = high_angle = None
+        else:
+            low_angle = _solve_root(v0_corrected, k, distance, height_diff, 0.0, max_angle, xtol,
+                                    method, dt) if low else None
+            high_angle = _solve_root(v0_corrected, k, distance, height_diff, max_angle, 90.0, xtol,
+                                     method, dt) if high else None
+    return analytic.get(False, low_angle), analytic.get(True, high_angle)
+
+
+@metrics.timed("drag.solve_shot")
+def solve_shot(v0, distance, height_diff, temperature, pressure, k_base, high_arc=False, xtol=1e-5,
+               method="euler", analytic_tol=None, dt=0.01):
+    """
+    Полное решение по одной цели: угол и данные итоговой траектории.
+
+    Угол ищется find_elevations, затем найденная траектория интегрируется
+    один раз вместе с чувствительностями (impact_sensitivities).
+    analytic_tol - как в find_elevations: если оценка ошибки
+    logic.analyticDrag в допуске, решение берется из него без интегрирования.
+    dt - шаг схемы Эйлера, с.
+    Возвращает словарь elevation (mil), flight_time (с), range_per_mil
+    (м на +1 mil), apex_height (м), impact_angle (градусы), impact_velocity
+    (м/с) или None, если цель недостижима. Для method="dopri" ΔR на 1 mil -
+    разность двух выстрелов, данные вершины и падения - None.
+    """
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+    if analytic_tol is not None:
+        solution = analytic_solve(v0_corrected, k, distance, height_diff, high_arc, analytic_tol)
+        if solution is not None:
+            del solution["error"]
+            return solution
+
+    low_angle, high_angle = find_elevations(v0, distance, height_diff, temperature, pressure, k_base,
+                                            low=not high_arc, high=high_arc, xtol=xtol, method=method, dt=dt)
+    angle = high_angle if high_arc else low_angle
+    if angle is None:
+        return None
+
+    elevation = degrees_to_mil(angle)
+    if method != "euler":
+        range_0, flight_time = impact_point(v0_corrected, angle, k, height_diff, method=method)
+        range_1, _ = impact_point(v0_corrected, mil_to_degrees(elevation + 1), k, height_diff, method=method)
+        return {
+            "elevation": elevation,
+            "flight_time": flight_time,
+            "range_per_mil": range_1 - range_0 if range_0 is not None and range_1 is not None else None,
+            "apex_height": None,
+            "impact_angle": None,
+            "impact_velocity": None,
+        }
+
+    point = impact_sensitivities(v0_corrected, angle, k, height_diff, dt)
+    if point is None:
+        return None
+    return {
+        "elevation": elevation,
+        "flight_time": point["flight_time"],
+        "range_per_mil": point["range_per_mil"],
+        "apex_height": point["apex_height"],
+        "impact_angle": point["impact_angle"],
+        "impact_velocity": point["impact_velocity"],
+    }
+
+
+def simulate_trajectory_numba(v0, angle, k, target_distance, target_height, dt=0.01):
+    """Точки траектории из скомпилированного ядра, без ограничения на число шагов"""
+    from logic.dragKernels import trajectory_points
+
+    return trajectory_points(v0, angle, k, target_distance, target_height, dt)
 
 def simulate_trajectory(v0, angle, k, target_distance, target_height, dt=0.01):
-    angle = np.radians(angle)
-    vx, vz = v0 * np.cos(angle), v0 * np.sin(angle)
-    x, z = 0, 0
+    angle = math.radians(angle)
+    vx, vz = v0 * math.cos(angle), v0 * math.sin(angle)
+    x, z = 0.0, 0.0
     trajectory = []
 
     while x <= target_distance and z >= min(0, target_height):
-        v = np.sqrt(vx ** 2 + vz ** 2)
+        v = math.sqrt(vx * vx + vz * vz)
         dvx_dt = -k * vx * v
         dvz_dt = -g - k * vz * v
         vx += dvx_dt * dt
@@ -142,59 +539,37 @@ def simulate_trajectory(v0, angle, k, target_distance, target_height, dt=0.01):
 
     return np.array(trajectory), False
 
-@measure_execution_time
-def find_optimal_angle(v0, distance, height_diff, temperature, pressure, k_base, plot=False):
-    pressure_pa = pressure * 100
-    temperature_k = temperature + 273.15
-    R = 287.05
-    rho_calculated = pressure_pa / (R * temperature_k)
-    rho_ratio = rho_calculated / rho_standard
-    k = k_base * rho_ratio
-    v0_corrected = v0 * np.sqrt((temperature + 273.15) / 288.15)
-
-    optimal_angle = None
-    for angle in np.arange(0, 90, 0.1):
-        trajectory, hit = simulate_trajectory(v0_corrected, angle, k, distance, height_diff)
-        if hit:
-            optimal_angle = angle
-            if plot:
-                plt.figure(figsize=(10, 5))
-                plt.plot(trajectory[:, 0], trajectory[:, 1], label=f"Angle: {angle:.2f}°")
-                plt.scatter(distance, height_diff, color='red', label='Target')
-                plt.xlabel("Distance (m)")
-                plt.ylabel("Height (m)")
-                plt.title("The trajectory of the shell")
-                plt.legend()
-                plt.grid()
-                plt.savefig("trajectory_plot.png")
-                plt.close()
-            break
+@metrics.timed("drag.low_angle")
+def find_optimal_angle(v0, distance, height_diff, temperature, pressure, k_base, plot=False, method="euler"):
+    optimal_angle, _ = find_elevations(v0, distance, height_diff, temperature, pressure, k_base, high=False,
+                                       method=method)
 
-    return optimal_angle
-
-@measure_execution_time
-def find_high_trajectory(v0, distance, height_diff, temperature, pressure, k_base, plot=False):
-    pressure_pa = pressure * 100
-    temperature_k = temperature + 273.15
-    R = 287.05
-    rho_calculated = pressure_pa / (R * temperature_k)
-    rho_ratio = rho_calculated / rho_standard
-    k = k_base * rho_ratio
-    v0_corrected = v0 * np.sqrt(temperature_k / 288.15)
+    if plot and optimal_angle is not None:
+        v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+        trajectory, _ = simulate_trajectory(v0_corrected, optimal_angle, k, distance, height_diff)
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(10, 5))
+        plt.plot(trajectory[:, 0], trajectory[:, 1], label=f"Angle: {optimal_angle:.2f}°")
+        plt.scatter(distance, height_diff, color='red', label='Target')
+        plt.xlabel("Distance (m)")
+        plt.ylabel("Height (m)")
+        plt.title("The trajectory of the shell")
+        plt.legend()
+        plt.grid()
+        plt.savefig("trajectory_plot.png")
+        plt.close()
 
-    best_angle = None
-    min_deviation = float('inf')
+    return optimal_angle
 
-    for angle in np.arange(45, 89, 0.1):
-        trajectory, hit = simulate_trajectory_numba(v0_corrected, angle, k, distance, height_diff)
-        if hit:
-            deviation = abs(trajectory[-1, 0] - distance) + abs(trajectory[-1, 1] - height_diff)
-            if deviation < min_deviation:
-                min_deviation = deviation
-                best_angle = angle
+@metrics.timed("drag.high_angle")
+def find_high_trajectory(v0, distance, height_diff, temperature, pressure, k_base, plot=False, method="euler"):
+    _, best_angle = find_elevations(v0, distance, height_diff, temperature, pressure, k_base, low=False,
+                                    method=method)
 
     if plot and best_angle is not None:
+        v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
         trajectory, _ = simulate_trajectory_numba(v0_corrected, best_angle, k, distance, height_diff)
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(10, 5))
         plt.plot(trajectory[:, 0], trajectory[:, 1], label=f"Высокая траектория: {best_angle:.2f}°")
         plt.scatter(distance, height_diff, color='red', label='Цель')
@@ -207,33 +582,7 @@ def find_high_trajectory(v0, distance, height_diff, temperature, pressure, k_bas
 
     return best_angle
 
-@measure_execution_time
-def calculate_flight_time(v0, angle_deg, k, height_diff, dt=0.01):
-    angle_rad = np.radians(angle_deg)
-    vx = v0 * np.cos(angle_rad)
-    vz = v0 * np.sin(angle_rad)
-    x, z = 0.0, 0.0
-    t = 0.0
-
-    while z >= min(0, height_diff):
-        v = np.sqrt(vx ** 2 + vz ** 2)
-        dvx_dt = -k * vx * v
-        dvz_dt = -g - k * vz * v
-        vx += dvx_dt * dt
-        vz += dvz_dt * dt
-        x += vx * dt
-        z += vz * dt
-        t += dt
-
-        if z <= height_diff and vz < 0:
-            if z != height_diff:
-                prev_z = z - vz * dt
-                prev_t = t - dt
-                if prev_z != z:
-                    fraction = (height_diff - z) / (prev_z - z)
-                    t = t + fraction * (-dt)
-            return t
-
+@metrics.timed("drag.flight_time")
+def calculate_flight_time(v0, angle_deg, k, height_diff, dt=0.01, method="euler"):
+    _, t = impact_point(v0, angle_deg, k, height_diff, dt, method)
     return t
-
-
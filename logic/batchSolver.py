@@ -0,0 +1,276 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from logic.distanceLogic import calculate_distance_batch, calculate_azimuth_batch
+from logic.balisticLogic import calculate_elevation_with_height_batch, calculate_high_elevation_batch, \
+    calculate_flight_time_batch, range_difference_for_1mil_batch, mil_to_rad, STATUS_OK, STATUS_OUT_OF_RANGE, \
+    STATUS_ERROR
+from logic import rangeEnvelope, solutionCache
+from logic.balisticLogicAirFriction import air_corrected, g, solve_shot
+
+# solve_batch(executor="auto") uses processes from this many targets; below it the
+# start-up of worker processes (imports, loading the kernel cache) costs more than it saves
+PROCESS_MIN_TARGETS = 64
+
+# select_charge keeps its worker processes for the session: starting them
+# (imports, loading the kernel cache) costs more than one selection
+_charge_pool = None
+_charge_pool_lock = threading.Lock()
+
+# Ranking criteria of select_charge: label and the value to minimise; a missing value ranks last
+CRITERIA = {
+    "flight_time": ("Shortest flight time", lambda solution: solution["flight_time"]),
+    "impact_angle": ("Steepest descent", lambda solution: -solution["impact_angle"]),
+    "range_per_mil": ("Lowest Δrange per mil", lambda solution: abs(solution["range_per_mil"])),
+}
+
+
+def _solve_chunk(chunk, v0, k_base, temperature, pressure, high_arc):
+    """Solves a list of (index, distance, height_diff); runs inside a pool worker"""
+    results = []
+    for index, distance, height_diff in chunk:
+        try:
+            solution = solve_shot(v0, distance, height_diff, temperature, pressure, k_base, high_arc)
+            if solution is None:
+                results.append((index, STATUS_OUT_OF_RANGE, np.nan, np.nan, np.nan))
+                continue
+            results.append((index, STATUS_OK, solution["elevation"], solution["flight_time"],
+                            solution["range_per_mil"]))
+        except Exception as e:
+            print(f"Error solving target {index}: {e}")
+            results.append((index, STATUS_ERROR, np.nan, np.nan, np.nan))
+    return results
+
+
+def solve_batch(gun, targets, system, shell, charge, meteo, high_arc=False, executor="auto", workers=None):
+    """
+    Drag-model fire mission for many targets from one gun.
+
+    gun - (x, y, h); targets - sequence or (N, 3) array of (x, y, h);
+    system, shell - entries from config.json; charge - charge name;
+    meteo - {"temperature": °C, "pressure": hPa}.
+    executor - "process", "thread" or "auto" (processes from PROCESS_MIN_TARGETS
+    targets on). The drag kernels release the GIL, but the golden-section and
+    Brent searches around them run in Python, so threads barely scale past
+    one core; they only avoid the start-up cost of processes on small batches.
+
+    Returns a dict of arrays in input order: distance (m), azimuth (mil),
+    elevation (mil), flight_time (s), range_per_mil (m) and status
+    (STATUS_OK, STATUS_OUT_OF_RANGE or STATUS_ERROR).
+    """
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1, 3)
+    gun_x, gun_y, gun_h = (float(c) for c in gun)
+    count = len(targets)
+
+    distance = calculate_distance_batch(gun_x, gun_y, targets[:, 0], targets[:, 1])
+    azimuth, position_status = calculate_azimuth_batch(gun_x, gun_y, targets[:, 0], targets[:, 1])
+    height_diff = targets[:, 2] - gun_h
+
+    result = {
+        "distance": distance,
+        "azimuth": azimuth,
+        "elevation": np.full(count, np.nan),
+        "flight_time": np.full(count, np.nan),
+        "range_per_mil": np.full(count, np.nan),
+        "status": np.full(count, STATUS_ERROR, dtype=np.int8),
+    }
+    if count == 0:
+        return result
+
+    v0 = shell["charges"][charge]
+    k_base = abs(system.get("k_base", 1.0))
+    temperature = meteo.get("temperature", 15.0)
+    pressure = meteo.get("pressure", 1013.25)
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, count // (workers * 4))
+    # Targets with a non-finite coordinate stay STATUS_ERROR
+    jobs = [(i, float(distance[i]), float(height_diff[i])) for i in range(count)
+            if position_status[i] == STATUS_OK and np.isfinite(height_diff[i])]
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+    if executor == "auto":
+        executor = "process" if count >= PROCESS_MIN_TARGETS and workers > 1 else "thread"
+    if executor == "process":
+        pool_class = ProcessPoolExecutor
+    elif executor == "thread":
+        pool_class = ThreadPoolExecutor
+    else:
+        raise ValueError(f"Unknown executor: {executor}")
+
+    with pool_class(max_workers=workers) as pool:
+        futures = [pool.submit(_solve_chunk, chunk, v0, k_base, temperature, pressure, high_arc)
+                   for chunk in chunks]
+        for future in futures:
+            for index, status, elevation, flight_time, range_per_mil in future.result():
+                result["status"][index] = status
+                result["elevation"][index] = elevation
+                result["flight_time"][index] = flight_time
+                result["range_per_mil"][index] = range_per_mil
+
+    return result
+
+
+def solve_batch_vacuum(gun, targets, v0, high_arc=False):
+    """
+    Vacuum-model fire mission, vectorized over all targets.
+
+    gun - (x, y, h); targets - sequence or (N, 3) array of (x, y, h); v0 - m/s.
+    Returns the same dict of arrays as solve_batch.
+    """
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1, 3)
+    gun_x, gun_y, gun_h = (float(c) for c in gun)
+    x, y, h = targets[:, 0], targets[:, 1], targets[:, 2]
+
+    distance = calculate_distance_batch(gun_x, gun_y, x, y)
+    azimuth, position_status = calculate_azimuth_batch(gun_x, gun_y, x, y)
+    if high_arc:
+        elevation, status = calculate_high_elevation_batch(distance, v0, gun_h, h)
+    else:
+        elevation, status = calculate_elevation_with_height_batch(distance, v0, gun_h, h)
+    flight_time, time_status = calculate_flight_time_batch(v0, mil_to_rad(elevation), gun_h, h)
+    range_per_mil, _ = range_difference_for_1mil_batch(v0, elevation, gun_h, h)
+
+    # The approximate low-arc elevation may not reach a target above the gun
+    status = np.where(status == STATUS_OK, time_status, status)
+    status = np.where((position_status == STATUS_OK) & np.isfinite(h), status, STATUS_ERROR).astype(np.int8)
+    return {
+        "distance": distance,
+        "azimuth": azimuth,
+        "elevation": np.where(status == STATUS_OK, elevation, np.nan),
+        "flight_time": np.where(status == STATUS_OK, flight_time, np.nan),
+        "range_per_mil": np.where(status == STATUS_OK, range_per_mil, np.nan),
+        "status": status,
+    }
+
+
+def vacuum_reach(v0, height_diff):
+    """
+    Longest vacuum range (m) to a target height_diff above the gun, 0 if the height is never reached.
+    Drag only shortens the flight, so no drag-model charge reaches further. height_diff may be an array.
+    """
+    clearance = v0 * v0 - 2 * g * np.asarray(height_diff, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        reach = np.where(clearance > 0, v0 * np.sqrt(np.maximum(clearance, 0.0)) / g, 0.0)
+    return float(reach) if reach.ndim == 0 else reach
+
+
+def _rank_key(criterion):
+    value = CRITERIA[criterion][1]
+
+    def key(candidate):
+        try:
+            result = value(candidate)
+        except TypeError:
+            return math.inf
+        return math.inf if result is None or math.isnan(result) else result
+    return key
+
+
+def _solve_candidate(job, distance, height_diff, temperature, pressure, k_base, label, analytic_tol):
+    """One (charge, arc) pair of select_charge through logic.solutionCache; runs inside a pool worker"""
+    charge_name, v0, high_arc = job
+    if solutionCache.analytic_tolerance() != analytic_tol:
+        solutionCache.set_analytic_tolerance(analytic_tol)
+    return solutionCache.solve(v0, distance, height_diff, temperature, pressure, k_base, high_arc,
+                               label=label + (charge_name,))
+
+
+def _charge_executor(workers):
+    """The shared select_charge process pool, started on first use"""
+    global _charge_pool
+    with _charge_pool_lock:
+        if _charge_pool is None:
+            # spawn, not fork: the UI process runs Qt and Numba threads
+            _charge_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _charge_pool
+
+
+def _reset_charge_executor():
+    global _charge_pool
+    with _charge_pool_lock:
+        if _charge_pool is not None:
+            _charge_pool.shutdown(wait=False, cancel_futures=True)
+        _charge_pool = None
+
+
+def select_charge(system, shell, distance, height_diff, meteo, criterion="flight_time", air_friction=True,
+                  arcs=(False, True), workers=None):
+    """
+    Solves every charge of shell on each arc concurrently and ranks the solutions.
+
+    Charges that cannot reach the target are pruned before any integration:
+    beyond the vacuum reach of the meteo-corrected muzzle velocity, or
+    outside a range envelope (logic.rangeEnvelope) already on disk.
+    The remaining (charge, arc) pairs are solved through logic.solutionCache
+    in a process pool kept for the session (the analytic solver and the
+    searches around the drag kernels hold the GIL, so threads would not
+    run them in parallel). The workers write the shared solution store,
+    so a later Calculate is a cache hit. With one worker or one pair, or
+    if the pool breaks, the pairs are solved in this process.
+
+    Solutions outside the system's elevation limits are dropped.
+
+    Returns (ranked, pruned): ranked - best first, dicts with charge,
+    v0, high_arc and the solve_shot fields; pruned - charge names.
+    """
+    temperature = meteo.get("temperature", 15.0)
+    pressure = meteo.get("pressure", 1013.25)
+    k_base = abs(system.get("k_base", 1.0))
+    charges = shell.get("charges", {})
+    low, high = rangeEnvelope.elevation_limits(system)
+
+    if not air_friction:
+        ranked = []
+        for charge_name, v0 in charges.items():
+            for high_arc in arcs:
+                result = solve_batch_vacuum((0.0, 0.0, 0.0), [(distance, 0.0, height_diff)], v0, high_arc)
+                if result["status"][0] != STATUS_OK or not low <= result["elevation"][0] <= high:
+                    continue
+                elevation_rad = mil_to_rad(result["elevation"][0])
+                vz = math.sqrt(max((v0 * math.sin(elevation_rad)) ** 2 - 2 * g * height_diff, 0.0))
+                ranked.append({
+                    "charge": charge_name, "v0": v0, "high_arc": high_arc,
+                    "elevation": float(result["elevation"][0]),
+                    "flight_time": float(result["flight_time"][0]),
+                    "range_per_mil": float(result["range_per_mil"][0]),
+                    "impact_angle": math.degrees(math.atan2(vz, v0 * math.cos(elevation_rad))),
+                })
+        return sorted(ranked, key=_rank_key(criterion)), []
+
+    jobs = []
+    pruned = []
+    for charge_name, v0 in charges.items():
+        v0_corrected, _ = air_corrected(v0, temperature, pressure, k_base)
+        envelope = rangeEnvelope.get_envelope(system, shell, charge_name)
+        if (distance > vacuum_reach(v0_corrected, height_diff) or envelope is not None and
+                rangeEnvelope.check(envelope, v0, distance, height_diff, temperature, pressure, k_base) is False):
+            pruned.append(charge_name)
+            continue
+        jobs.extend((charge_name, v0, high_arc) for high_arc in arcs)
+
+    label = (system["name"], shell["name"])
+    args = (distance, height_diff, temperature, pressure, k_base, label, solutionCache.analytic_tolerance())
+    workers = workers or os.cpu_count() or 1
+    solutions = None
+    if workers > 1 and len(jobs) > 1:
+        try:
+            pool = _charge_executor(workers)
+            solutions = list(pool.map(_solve_candidate, jobs, *([arg] * len(jobs) for arg in args)))
+        except (BrokenProcessPool, OSError) as e:
+            print(f"Error solving charges in worker processes: {e}")
+            _reset_charge_executor()
+    if solutions is None:
+        solutions = [_solve_candidate(job, *args) for job in jobs]
+
+    ranked = []
+    for (charge_name, v0, high_arc), solution in zip(jobs, solutions):
+        if solution is not None and low <= solution["elevation"] <= high:
+            ranked.append({"charge": charge_name, "v0": v0, "high_arc": high_arc, **solution})
+    return sorted(ranked, key=_rank_key(criterion)), pruned
@@ -0,0 +1,305 @@
+"""
+Coverage map: for every cell of a heightmap grid, whether a gun position
+can engage it, with which charge and at what elevation.
+
+With drag, a fan of elevations ANGLE_STEP_MIL apart within the elevation
+limits is integrated once per charge (fan_ranges), recording where each
+trajectory comes down through every height level HEIGHT_STEP apart. Each
+arc is monotone in the range, so the elevation of a cell is read off the
+fans of the two surrounding levels by interpolation - NumPy over a whole
+tile. Only cells near the gun that the low arc of just one of the two
+levels reaches (short of the apex or the lowest elevation) are solved one
+by one; near a charge's maximum range such cells are left to the next
+charge. Without drag the closed-form vacuum solutions are used directly. The map is for planning; Calculate still
+solves the selected target exactly.
+
+Charges are chosen as a gunner would: the first charge in config order
+that reaches the cell on the low arc, otherwise the first on the high arc.
+
+CoverageJob computes the grid tile by tile, nearest tiles first, in a
+background thread; the map polls take_tiles() and draws them as they come.
+"""
+import math
+import threading
+
+import numpy as np
+
+from logic import metrics
+from logic.balisticLogic import calculate_elevation_with_height_batch, calculate_high_elevation_batch
+from logic.balisticLogicAirFriction import air_corrected, degrees_to_mil, g, mil_to_degrees, solve_shot
+from logic.batchSolver import vacuum_reach
+from logic.rangeEnvelope import elevation_limits
+
+# Elevation step of the fans, mil, and height step of their levels, m
+ANGLE_STEP_MIL = 2.0
+HEIGHT_STEP = 10.0
+# Tile edge, grid cells
+TILE_SIZE = 128
+# Charge index of a cell no charge reaches
+UNREACHABLE = -1
+
+
+def fan_ranges(v0, k, angles, heights, dt=0.01, max_time=300.0):
+    """
+    Ranges of a fan of elevations (degrees) at several target heights at once.
+
+    Returns (ranges, apexes): ranges - array (heights x angles), NaN where
+    the height is never reached; apexes - (x, z) of every trajectory's top.
+
+    The same Euler scheme, crossing rule and interpolation as simulate_batch,
+    but one trajectory per angle serves every height. heights must be
+    ascending, evenly spaced and further apart than a shell falls in one step.
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    step = heights[1] - heights[0] if len(heights) > 1 else 1.0
+    ranges = np.full((len(heights), len(angles)), np.nan)
+
+    index = np.arange(len(angles))
+    angle_rad = np.radians(angles)
+    vx = v0 * np.cos(angle_rad)
+    vz = v0 * np.sin(angle_rad)
+    x = np.zeros(len(angles))
+    z = np.zeros(len(angles))
+    z_min = min(0.0, heights[0])
+    apexes = np.zeros((len(angles), 2))
+
+    t = 0.0
+    while index.size and t < max_time:
+        prev_z = z
+        rising = vz > 0
+        v = np.sqrt(vx * vx + vz * vz)
+        dvx_dt = -k * vx * v
+        dvz_dt = -g - k * vz * v
+        vx += dvx_dt * dt
+        vz += dvz_dt * dt
+        x += vx * dt
+        z = z + vz * dt
+        t += dt
+
+        top = rising & (vz <= 0)
+        if top.any():
+            apexes[index[top], 0] = x[top]
+            apexes[index[top], 1] = z[top]
+
+        # Highest level in [z, prev_z): the only one this step can cross
+        level = np.ceil((prev_z - heights[0]) / step).astype(np.int64) - 1
+        height = heights[0] + level * step
+        hit = (z <= height) & (height < prev_z) & (vz < 0) & (level >= 0) & (level < len(heights))
+        if hit.any():
+            fraction = (height[hit] - z[hit]) / (-vz[hit] * dt)
+            ranges[level[hit], index[hit]] = x[hit] - fraction * vx[hit] * dt
+
+        keep = z >= z_min
+        if not keep.all():
+            index, vx, vz, x, z = index[keep], vx[keep], vz[keep], x[keep], z[keep]
+    return ranges, apexes
+
+
+def _arc_fans(ranges, angles, apexes, height):
+    """
+    Splits the ranges of an elevation fan at its maximum into the low and
+    high arc: two (ranges, angles) pairs with the ranges increasing, None
+    for an arc with less than two elevations.
+
+    Near the elevation whose apex just touches height the range climbs
+    steeply, so the low arc starts with that touch point, interpolated
+    between the apexes of the fan elevations around it.
+    """
+    hit = ~np.isnan(ranges)
+    if not hit.any():
+        return None, None
+    best = int(np.nanargmax(ranges))
+    index = np.arange(len(ranges))
+    arcs = []
+    for arc in (hit & (index <= best), hit & (index >= best)):
+        arc_ranges, arc_angles = ranges[arc], angles[arc]
+        if arc_angles[-1] > angles[best]:
+            arc_ranges, arc_angles = arc_ranges[::-1], arc_angles[::-1]
+        else:
+            first = int(np.argmax(arc))
+            (below_x, below_z), (above_x, above_z) = apexes[first - 1:first + 1] if first else ((0.0, 0.0),) * 2
+            if first and below_z < height <= above_z:
+                share = (height - below_z) / (above_z - below_z)
+                arc_ranges = np.concatenate(([below_x + share * (above_x - below_x)], arc_ranges))
+                arc_angles = np.concatenate(([angles[first - 1] + share * (angles[first] - angles[first - 1])],
+                                             arc_angles))
+        # Integration noise must not break the monotonicity np.interp relies on
+        arcs.append((np.maximum.accumulate(arc_ranges), arc_angles) if len(arc_ranges) > 1 else None)
+    return tuple(arcs)
+
+
+class CoverageJob:
+    """
+    Coverage of a heightmap from one gun position, computed in a background thread.
+
+    grid - (xs, ys, heights) as returned by heightsLogic.get_grid; gun - (x, y, h).
+    The result arrays have the grid's shape: charge (index into charge_names,
+    UNREACHABLE where no charge reaches), elevation (mil, NaN there) and high_arc.
+    """
+
+    def __init__(self, grid, gun, system, shell, meteo, air_friction=True, tile_size=TILE_SIZE):
+        self.xs, self.ys, self.heights = grid
+        self.gun = gun
+        self.air_friction = air_friction
+        self.charge_names = list(shell.get("charges", {}))
+        self.limits = elevation_limits(system)
+
+        self.temperature = meteo.get("temperature", 15.0)
+        self.pressure = meteo.get("pressure", 1013.25)
+        self.k_base = abs(system.get("k_base", 1.0))
+        self.muzzle_velocities = list(shell.get("charges", {}).values())
+        self.charges = []
+        for v0 in self.muzzle_velocities:
+            self.charges.append(air_corrected(v0, self.temperature, self.pressure, self.k_base) if air_friction
+                                else (v0, 0.0))
+        low, high = (mil_to_degrees(limit) for limit in self.limits)
+        self.angles = np.arange(low, high + 1e-9, mil_to_degrees(ANGLE_STEP_MIL))
+        # Levels spanning every height difference on the grid; per charge, (low arc, high arc) fans by level
+        with np.errstate(invalid='ignore'):
+            height_span = np.nanmin(self.heights) - gun[2], np.nanmax(self.heights) - gun[2]
+        self.first_level = int(np.floor(height_span[0] / HEIGHT_STEP)) if not np.isnan(height_span[0]) else 0
+        self.level_count = (int(np.floor(height_span[1] / HEIGHT_STEP)) + 2 - self.first_level
+                            if not np.isnan(height_span[1]) else 0)
+        self._fans = {}
+
+        shape = self.heights.shape
+        self.charge = np.full(shape, UNREACHABLE, dtype=np.int8)
+        self.elevation = np.full(shape, np.nan, dtype=np.float32)
+        self.high_arc = np.zeros(shape, dtype=bool)
+
+        self.tiles = self._tile_order(tile_size)
+        self.finished = 0
+        self._ready = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def _tile_order(self, tile_size):
+        """(rows, cols) slices of every tile, nearest to the gun first"""
+        tiles = []
+        for row in range(0, len(self.ys), tile_size):
+            for col in range(0, len(self.xs), tile_size):
+                tiles.append((slice(row, min(row + tile_size, len(self.ys))),
+                              slice(col, min(col + tile_size, len(self.xs)))))
+
+        def distance(tile):
+            rows, cols = tile
+            x = min(max(self.gun[0], self.xs[cols.start]), self.xs[cols.stop - 1])
+            y = min(max(self.gun[1], self.ys[rows.start]), self.ys[rows.stop - 1])
+            return math.hypot(x - self.gun[0], y - self.gun[1])
+        return sorted(tiles, key=distance)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="coverage-map", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def done(self):
+        return self.finished == len(self.tiles) or self._cancelled.is_set()
+
+    def take_tiles(self):
+        """(rows, cols) slices of the tiles finished since the last call"""
+        with self._lock:
+            tiles, self._ready = self._ready, []
+        return tiles
+
+    def lookup(self, x, y):
+        """(charge name, high_arc, elevation in mil) of the cell nearest to (x, y); None if unreachable or not yet computed"""
+        col = int(np.abs(self.xs - x).argmin())
+        row = int(np.abs(self.ys - y).argmin())
+        charge = self.charge[row, col]
+        if charge == UNREACHABLE:
+            return None
+        return self.charge_names[charge], bool(self.high_arc[row, col]), float(self.elevation[row, col])
+
+    def _run(self):
+        for tile in self.tiles:
+            if self._cancelled.is_set():
+                return
+            try:
+                with metrics.span("coverage.tile"):
+                    self._compute(*tile)
+            except Exception as e:
+                print(f"Error computing coverage tile: {e}")
+            with self._lock:
+                self._ready.append(tile)
+                self.finished += 1
+
+    def _compute(self, rows, cols):
+        x, y = np.meshgrid(self.xs[cols], self.ys[rows])
+        distance = np.hypot(x - self.gun[0], y - self.gun[1])
+        height_diff = self.heights[rows, cols].astype(np.float64) - self.gun[2]
+
+        charge = np.full(distance.shape, UNREACHABLE, dtype=np.int8)
+        elevation = np.full(distance.shape, np.nan, dtype=np.float32)
+        high_arc = np.zeros(distance.shape, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            known = ~np.isnan(height_diff) & (distance > 0)
+        for arc in (False, True):
+            for index, (v0, k) in enumerate(self.charges):
+                # Beyond the vacuum reach drag cannot help
+                todo = known & (charge == UNREACHABLE) & (distance <= vacuum_reach(v0, height_diff))
+                if not todo.any():
+                    continue
+                solved = self._elevations(index, distance[todo], height_diff[todo], arc)
+                hit = ~np.isnan(solved)
+                cells = tuple(axis[hit] for axis in np.nonzero(todo))
+                charge[cells] = index
+                elevation[cells] = solved[hit]
+                high_arc[cells] = arc
+
+        self.charge[rows, cols] = charge
+        self.elevation[rows, cols] = elevation
+        self.high_arc[rows, cols] = high_arc
+
+    def _elevations(self, index, distance, height_diff, high_arc):
+        """Elevations in mil of one charge and arc, NaN where out of reach or outside the limits"""
+        v0, k = self.charges[index]
+        if not self.air_friction:
+            solve = calculate_high_elevation_batch if high_arc else calculate_elevation_with_height_batch
+            elevation, _ = solve(distance, v0, 0.0, height_diff)
+            low, high = self.limits
+            with np.errstate(invalid='ignore'):
+                return np.where((elevation >= low) & (elevation <= high), elevation, np.nan)
+
+        if index not in self._fans:
+            heights = (self.first_level + np.arange(self.level_count)) * HEIGHT_STEP
+            with metrics.span("coverage.fan"):
+                ranges, apexes = fan_ranges(v0, k, self.angles, heights)
+            self._fans[index] = [_arc_fans(level_ranges, self.angles, apexes, height)
+                                 for level_ranges, height in zip(ranges, heights)]
+
+        elevation = np.full(distance.shape, np.nan)
+        level = np.floor(height_diff / HEIGHT_STEP).astype(np.int64)
+        weight = height_diff / HEIGHT_STEP - level
+        exact = []
+        for lower in np.unique(level):
+            cells = np.flatnonzero(level == lower)
+            below, above = (self._fans[index][lower + offset - self.first_level][high_arc] for offset in (0, 1))
+            below_elevation = _interpolate(below, distance[cells])
+            above_elevation = _interpolate(above, distance[cells])
+            elevation[cells] = below_elevation + weight[cells] * (above_elevation - below_elevation)
+            # Between the shortest low-arc ranges of the two levels only one fan covers the cell
+            if not high_arc and below is not None and above is not None:
+                starts = sorted((below[0][0], above[0][0]))
+                exact.extend(cells[(distance[cells] >= starts[0]) & (distance[cells] < starts[1])])
+
+        low, high = self.limits
+        for cell in exact:
+            solution = solve_shot(self.muzzle_velocities[index], distance[cell], height_diff[cell], self.temperature,
+                                  self.pressure, self.k_base, False)
+            if solution is not None and low <= solution["elevation"] <= high:
+                elevation[cell] = solution["elevation"]
+        return elevation
+
+
+def _interpolate(fan, distance):
+    """Elevations in mil at the distances by an arc fan; NaN outside it"""
+    if fan is None:
+        return np.full(distance.shape, np.nan)
+    ranges, angles = fan
+    return degrees_to_mil(np.interp(distance, ranges, angles, left=np.nan, right=np.nan))
@@ -1,5 +1,9 @@
 import math
 
+import numpy as np
+
+from logic.balisticLogic import STATUS_OK, STATUS_ERROR
+
 def calculate_distance(x1, y1, x2, y2):
     distance = math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
     return distance
@@ -17,14 +21,39 @@ def calculate_mils(distance, mils=1):
     arc_length = distance * mils * radians_per_mil
     return arc_length
 
-# Example of use:
-x1, y1 = 5000, 8000
-x2, y2 = 1700, 3000
+def calculate_distance_batch(x1, y1, x2, y2):
+    """calculate_distance over arrays of positions; arguments broadcast together"""
+    return np.hypot(np.asarray(x2, dtype=np.float64) - x1, np.asarray(y2, dtype=np.float64) - y1)
+
+
+def calculate_azimuth_batch(x1, y1, x2, y2):
+    """
+    calculate_azimuth over arrays of positions; arguments broadcast together.
+    Returns (azimuth in whole thousandths, NaN where a coordinate is not finite; status codes).
+    """
+    delta_x = np.asarray(x2, dtype=np.float64) - x1
+    delta_y = np.asarray(y2, dtype=np.float64) - y1
+    delta_x, delta_y = np.broadcast_arrays(delta_x, delta_y)
+    status = np.where(np.isfinite(delta_x) & np.isfinite(delta_y), STATUS_OK, STATUS_ERROR).astype(np.int8)
+    azimuth = (np.degrees(np.arctan2(delta_y, delta_x)) + 360) % 360
+    azimuth = np.where(status == STATUS_OK, np.floor(azimuth * (6400 / 360)), np.nan)
+    return azimuth, status
+
+
+def calculate_mils_batch(distance, mils=1):
+    """calculate_mils over arrays"""
+    return np.asarray(distance, dtype=np.float64) * mils * (2 * np.pi / 6400)
+
+
+if __name__ == "__main__":
+    # Example of use:
+    x1, y1 = 5000, 8000
+    x2, y2 = 1700, 3000
 
-distance = calculate_distance(x1, y1, x2, y2)
-azimuth_in_thousandths = calculate_azimuth(x1, y1, x2, y2)
-deviation_per_mil = calculate_mils(distance)
+    distance = calculate_distance(x1, y1, x2, y2)
+    azimuth_in_thousandths = calculate_azimuth(x1, y1, x2, y2)
+    deviation_per_mil = calculate_mils(distance)
 
-print("Distance:", distance)
-print("Azimuth in thousandths:", azimuth_in_thousandths)
-print("Deviation per 1 mil:", round(deviation_per_mil, 2), "м")
+    print("Distance:", distance)
+    print("Azimuth in thousandths:", azimuth_in_thousandths)
+    print("Deviation per 1 mil:", round(deviation_per_mil, 2), "м")
@@ -0,0 +1,455 @@
+"""
+Скомпилированные ядра модели с сопротивлением воздуха.
+
+Ядра объявлены с явными сигнатурами и компилируются при импорте модуля,
+с кэшем на диске (cache=True). Поэтому модуль импортируется лениво,
+а при запуске приложения - в фоне через logic.kernelWarmup.
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# В собранном exe рядом с исходниками писать нельзя: кэш Numba кладем возле exe
+if getattr(sys, 'frozen', False):
+    os.environ.setdefault("NUMBA_CACHE_DIR", os.path.join(os.path.dirname(sys.executable), "numba_cache"))
+
+try:
+    from numba import njit, prange, config as numba_config
+    NUMBA_AVAILABLE = True
+
+    # Пул потоков TBB, запущенный не из главного потока (фоновый прогрев),
+    # вешает интерпретатор при выходе: TBB - только в крайнем случае
+    numba_config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    # Numba не установлена: ядра работают как обычный Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+G = 9.81
+
+# Время загрузки/компиляции каждого ядра при импорте, с
+COMPILE_TIMES = {}
+
+
+def _kernel(signature, **options):
+    """njit с явной сигнатурой и дисковым кэшем; замеряет время компиляции"""
+    def decorator(func):
+        start = time.perf_counter()
+        kernel = njit(signature, cache=True, **options)(func)
+        COMPILE_TIMES[func.__name__] = time.perf_counter() - start
+        return kernel
+    return decorator
+
+
+@_kernel("(float64, float64, float64, float64, float64)", fastmath=True, nogil=True)
+def impact_numba(v0, angle, k, height_diff, dt):
+    """
+    Только данные падения, без записи траектории.
+
+    Та же схема Эйлера и интерполяция, что и в impact_point.
+    Возвращает (range, flight_time, impact_angle, impact_velocity, hit);
+    угол падения в градусах к горизонту, при hit=False остальное - NaN.
+    """
+    angle_rad = math.radians(angle)
+    vx = v0 * math.cos(angle_rad)
+    vz = v0 * math.sin(angle_rad)
+    x = 0.0
+    z = 0.0
+    t = 0.0
+    z_min = min(0.0, height_diff)
+
+    while z >= z_min:
+        prev_vx = vx
+        prev_vz = vz
+        prev_z = z
+        v = math.sqrt(vx * vx + vz * vz)
+        dvx_dt = -k * vx * v
+        dvz_dt = -G - k * vz * v
+        vx += dvx_dt * dt
+        vz += dvz_dt * dt
+        x += vx * dt
+        z += vz * dt
+        t += dt
+
+        # Только пересечение сверху: вершина ниже цели - промах, как в integrate_dopri
+        if z <= height_diff < prev_z and vz < 0:
+            fraction = (height_diff - z) / (-vz * dt)
+            x -= fraction * vx * dt
+            t -= fraction * dt
+            vx_hit = vx + fraction * (prev_vx - vx)
+            vz_hit = vz + fraction * (prev_vz - vz)
+            impact_angle = math.degrees(math.atan2(-vz_hit, vx_hit))
+            return x, t, impact_angle, math.sqrt(vx_hit * vx_hit + vz_hit * vz_hit), True
+
+    return np.nan, np.nan, np.nan, np.nan, False
+
+
+@_kernel("(float64, float64, float64)", nogil=True)
+def drag_acceleration(k, vx, vz):
+    """Ускорение (ax, az) в модели с сопротивлением воздуха"""
+    v = math.sqrt(vx * vx + vz * vz)
+    return -k * vx * v, -G - k * vz * v
+
+
+@_kernel("(float64, float64, float64, float64, float64, float64)", nogil=True)
+def hermite(y0, dy0, y1, dy1, h, s):
+    """Кубический эрмитов сплайн на шаге h в доле шага s (плотный вывод)"""
+    s2 = s * s
+    s3 = s2 * s
+    return ((2 * s3 - 3 * s2 + 1) * y0 + (s3 - 2 * s2 + s) * h * dy0
+            + (-2 * s3 + 3 * s2) * y1 + (s3 - s2) * h * dy1)
+
+
+@_kernel("(float64, float64, float64, float64, float64, float64)", nogil=True)
+def hermite_slope(y0, dy0, y1, dy1, h, s):
+    """Производная эрмитова сплайна по доле шага s"""
+    s2 = s * s
+    return ((6 * s2 - 6 * s) * y0 + (3 * s2 - 4 * s + 1) * h * dy0
+            + (-6 * s2 + 6 * s) * y1 + (3 * s2 - 2 * s) * h * dy1)
+
+
+@_kernel("(float64, float64, float64, float64, float64, float64, float64, float64, float64, float64, float64)",
+         nogil=True)
+def dopri_error(old, new, h, d1, d3, d4, d5, d6, d7, rtol, atol):
+    """Оценка локальной ошибки одной компоненты (разность с решением 4-го порядка), в долях допуска"""
+    e = h * (71 / 57600 * d1 - 71 / 16695 * d3 + 71 / 1920 * d4 - 17253 / 339200 * d5
+             + 22 / 525 * d6 - 1 / 40 * d7)
+    return abs(e) / (atol + rtol * max(abs(old), abs(new)))
+
+
+@_kernel("(float64, float64, float64, float64, float64, float64, float64, float64)", nogil=True)
+def dopri_numba(v0, angle, k, height_diff, rtol, atol, max_step, max_time):
+    """
+    Адаптивный Дорманд-Принс 5(4) с поиском момента падения.
+
+    Шаг подбирается по оценке локальной ошибки. Когда снаряд на нисходящей
+    ветви пересекает высоту цели, момент пересечения уточняется на
+    эрмитовом плотном выводе шага (метод Ньютона с защитой бисекцией).
+    Без fastmath: допуски до 1e-12 требуют строгой арифметики.
+
+    Возвращает (x, t, steps, hit); при hit=False x и t - NaN.
+    """
+    angle_rad = math.radians(angle)
+    x = 0.0
+    z = 0.0
+    vx = v0 * math.cos(angle_rad)
+    vz = v0 * math.sin(angle_rad)
+    z_min = min(0.0, height_diff)
+    t = 0.0
+    h = min(max_step, 0.05 * v0 / G) if v0 > 0 else max_step
+    steps = 0
+    ax1, az1 = drag_acceleration(k, vx, vz)
+
+    # Ускорение зависит только от скорости, поэтому стадии считаются для
+    # скорости, а производные координат - это скорости на стадиях
+    while t < max_time:
+        vx2 = vx + h * (ax1 / 5)
+        vz2 = vz + h * (az1 / 5)
+        ax2, az2 = drag_acceleration(k, vx2, vz2)
+        vx3 = vx + h * (3 / 40 * ax1 + 9 / 40 * ax2)
+        vz3 = vz + h * (3 / 40 * az1 + 9 / 40 * az2)
+        ax3, az3 = drag_acceleration(k, vx3, vz3)
+        vx4 = vx + h * (44 / 45 * ax1 - 56 / 15 * ax2 + 32 / 9 * ax3)
+        vz4 = vz + h * (44 / 45 * az1 - 56 / 15 * az2 + 32 / 9 * az3)
+        ax4, az4 = drag_acceleration(k, vx4, vz4)
+        vx5 = vx + h * (19372 / 6561 * ax1 - 25360 / 2187 * ax2 + 64448 / 6561 * ax3 - 212 / 729 * ax4)
+        vz5 = vz + h * (19372 / 6561 * az1 - 25360 / 2187 * az2 + 64448 / 6561 * az3 - 212 / 729 * az4)
+        ax5, az5 = drag_acceleration(k, vx5, vz5)
+        vx6 = vx + h * (9017 / 3168 * ax1 - 355 / 33 * ax2 + 46732 / 5247 * ax3 + 49 / 176 * ax4
+                        - 5103 / 18656 * ax5)
+        vz6 = vz + h * (9017 / 3168 * az1 - 355 / 33 * az2 + 46732 / 5247 * az3 + 49 / 176 * az4
+                        - 5103 / 18656 * az5)
+        ax6, az6 = drag_acceleration(k, vx6, vz6)
+
+        # Решение 5-го порядка
+        new_vx = vx + h * (35 / 384 * ax1 + 500 / 1113 * ax3 + 125 / 192 * ax4 - 2187 / 6784 * ax5 + 11 / 84 * ax6)
+        new_vz = vz + h * (35 / 384 * az1 + 500 / 1113 * az3 + 125 / 192 * az4 - 2187 / 6784 * az5 + 11 / 84 * az6)
+        new_x = x + h * (35 / 384 * vx + 500 / 1113 * vx3 + 125 / 192 * vx4 - 2187 / 6784 * vx5 + 11 / 84 * vx6)
+        new_z = z + h * (35 / 384 * vz + 500 / 1113 * vz3 + 125 / 192 * vz4 - 2187 / 6784 * vz5 + 11 / 84 * vz6)
+        ax7, az7 = drag_acceleration(k, new_vx, new_vz)
+
+        error = max(dopri_error(x, new_x, h, vx, vx3, vx4, vx5, vx6, new_vx, rtol, atol),
+                    dopri_error(z, new_z, h, vz, vz3, vz4, vz5, vz6, new_vz, rtol, atol),
+                    dopri_error(vx, new_vx, h, ax1, ax3, ax4, ax5, ax6, ax7, rtol, atol),
+                    dopri_error(vz, new_vz, h, az1, az3, az4, az5, az6, az7, rtol, atol))
+
+        if error > 1.0:
+            h *= max(0.2, 0.9 * error ** -0.2)
+            continue
+
+        steps += 1
+        if z > height_diff >= new_z and new_vz < 0:
+            # Пересечение высоты цели внутри шага: ищем долю шага s
+            lo = 0.0
+            hi = 1.0
+            s = (z - height_diff) / (z - new_z)
+            for _ in range(50):
+                miss = hermite(z, vz, new_z, new_vz, h, s) - height_diff
+                if miss > 0:
+                    lo = s
+                else:
+                    hi = s
+                slope = hermite_slope(z, vz, new_z, new_vz, h, s)
+                s_next = s - miss / slope if slope != 0 else 0.5 * (lo + hi)
+                if not lo < s_next < hi:
+                    s_next = 0.5 * (lo + hi)
+                if abs(s_next - s) < 1e-12:
+                    s = s_next
+                    break
+                s = s_next
+            return hermite(x, vx, new_x, new_vx, h, s), t + s * h, steps, True
+
+        x = new_x
+        z = new_z
+        vx = new_vx
+        vz = new_vz
+        ax1 = ax7
+        az1 = az7
+        t += h
+        if z < z_min:
+            return np.nan, np.nan, steps, False
+
+        h = min(max_step, h * (min(5.0, 0.9 * error ** -0.2) if error > 0 else 5.0))
+
+    return np.nan, np.nan, steps, False
+
+
+@_kernel("(float64, float64, float64, float64, float64, float64[:])", fastmath=True, nogil=True)
+def sensitivities_numba(v0, angle, k, height_diff, dt, out):
+    """
+    impact_numba вместе с прямыми чувствительностями.
+
+    Вместе с состоянием (x, z, vx, vz) шагом той же схемы Эйлера переносятся
+    его производные по углу (рад), v0 и k, поэтому производные точны для
+    дискретного решения. На высоте цели они поправлены на сдвиг момента
+    падения: dR = dx - vx/vz·dz, dT = -dz/vz.
+    В out (длина 13) пишется range, flight_time, dR/dθ, dR/dv0, dR/dk, dR/dh,
+    dT/dθ, dT/dv0, dT/dk, dT/dh (h - высота цели), высота вершины, угол
+    (градусы) и скорость падения. Возвращает hit; при hit=False out - NaN.
+    """
+    angle_rad = math.radians(angle)
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+    vx = v0 * cos_a
+    vz = v0 * sin_a
+    x = 0.0
+    z = 0.0
+    t = 0.0
+    apex = 0.0
+    z_min = min(0.0, height_diff)
+
+    # Производные (x, z, vx, vz) по параметрам: 0 - угол, 1 - v0, 2 - k
+    dx = np.zeros(3)
+    dz = np.zeros(3)
+    dvx = np.array([-v0 * sin_a, cos_a, 0.0])
+    dvz = np.array([v0 * cos_a, sin_a, 0.0])
+
+    while z >= z_min:
+        prev_vx = vx
+        prev_vz = vz
+        prev_z = z
+        v = math.sqrt(vx * vx + vz * vz)
+        for p in range(3):
+            dv = (vx * dvx[p] + vz * dvz[p]) / v
+            dk = 1.0 if p == 2 else 0.0
+            dvx[p] -= (dk * vx * v + k * (dvx[p] * v + vx * dv)) * dt
+            dvz[p] -= (dk * vz * v + k * (dvz[p] * v + vz * dv)) * dt
+            dx[p] += dvx[p] * dt
+            dz[p] += dvz[p] * dt
+        vx -= k * vx * v * dt
+        vz -= (G + k * vz * v) * dt
+        x += vx * dt
+        z += vz * dt
+        t += dt
+        apex = max(apex, z)
+
+        if z <= height_diff < prev_z and vz < 0:
+            # Та же интерполяция, что в impact_numba: x + (h - z)·vx/vz, t + (h - z)/vz
+            gap = height_diff - z
+            out[0] = x + gap * vx / vz
+            out[1] = t + gap / vz
+            for p in range(3):
+                out[2 + p] = dx[p] - dz[p] * vx / vz + gap * (dvx[p] * vz - vx * dvz[p]) / (vz * vz)
+                out[6 + p] = -dz[p] / vz - gap * dvz[p] / (vz * vz)
+            out[5] = vx / vz
+            out[9] = 1.0 / vz
+            fraction = gap / (-vz * dt)
+            vx_hit = vx + fraction * (prev_vx - vx)
+            vz_hit = vz + fraction * (prev_vz - vz)
+            out[10] = apex
+            out[11] = math.degrees(math.atan2(-vz_hit, vx_hit))
+            out[12] = math.sqrt(vx_hit * vx_hit + vz_hit * vz_hit)
+            return True
+
+    out[:] = np.nan
+    return False
+
+
+@_kernel("(float64, float64, float64, float64[:], float64)", fastmath=True, parallel=True)
+def ranges_parallel(v0, k, height_diff, angles, dt):
+    """Дальности падения для массива углов на всех ядрах; промах - 0"""
+    ranges = np.empty(angles.shape[0])
+    for i in prange(angles.shape[0]):
+        x, _, _, _, hit = impact_numba(v0, angles[i], k, height_diff, dt)
+        ranges[i] = x if hit else 0.0
+    return ranges
+
+
+@_kernel("(float64, float64, float64, float64, float64, float64[:, :], float64)", fastmath=True, nogil=True)
+def trajectory_into(v0, angle, k, target_distance, target_height, out, dt):
+    """
+    Траектория в буфер вызывающего out (N x 2).
+
+    Условия остановки как в simulate_trajectory: цель в квадрате 10 м,
+    пролет дистанции цели или падение ниже min(0, target_height).
+    Возвращает (count, hit, complete); complete=False - буфер закончился.
+    """
+    angle_rad = math.radians(angle)
+    vx = v0 * math.cos(angle_rad)
+    vz = v0 * math.sin(angle_rad)
+    x = 0.0
+    z = 0.0
+    idx = 0
+    capacity = out.shape[0]
+
+    while x <= target_distance and z >= min(0.0, target_height):
+        if idx >= capacity:
+            return idx, False, False
+        v = math.sqrt(vx * vx + vz * vz)
+        dvx_dt = -k * vx * v
+        dvz_dt = -G - k * vz * v
+        vx += dvx_dt * dt
+        vz += dvz_dt * dt
+        x += vx * dt
+        z += vz * dt
+
+        out[idx, 0] = x
+        out[idx, 1] = z
+        idx += 1
+
+        if abs(x - target_distance) < 10.0 and abs(z - target_height) < 10.0:
+            return idx, True, True
+
+    return idx, False, True
+
+
+@_kernel("(float32[:, :], float64[:], float64, float64)", nogil=True)
+def terrain_height(heights, grid, x, y):
+    """
+    Высота рельефа в точке (x, y) билинейно по сетке heights[строка, столбец];
+    grid - (x0, y0, шаг по x, шаг по y). Вне сетки - NaN.
+    """
+    col = (x - grid[0]) / grid[2]
+    row = (y - grid[1]) / grid[3]
+    if col < 0.0 or row < 0.0 or col > heights.shape[1] - 1 or row > heights.shape[0] - 1:
+        return np.nan
+    i = min(int(row), heights.shape[0] - 2)
+    j = min(int(col), heights.shape[1] - 2)
+    fr = row - i
+    fc = col - j
+    return ((1.0 - fr) * ((1.0 - fc) * heights[i, j] + fc * heights[i, j + 1])
+            + fr * ((1.0 - fc) * heights[i + 1, j] + fc * heights[i + 1, j + 1]))
+
+
+# Без fastmath: точки без данных рельефа (NaN) должны честно пропускаться
+@_kernel("(float64, float64, float64, float64, float64, float64[:], float32[:, :], float64[:], float64, float64, "
+         "float64, float64)", nogil=True)
+def clearance_numba(v0, angle, k, distance, height_diff, line, heights, grid, skip, landing, gravity, dt):
+    """
+    Запас высоты траектории над рельефом вдоль линии орудие-цель.
+
+    line - (x, y, h орудия, cos, sin направления на цель); heights, grid -
+    как в terrain_height. Та же схема Эйлера, что и в impact_numba, с
+    ускорением свободного падения gravity того решателя, чей угол
+    проверяется; рельеф берется на каждом шаге, кроме первых и последних
+    skip метров. Касание рельефа не дальше landing метров до цели - это
+    падение снаряда у цели, а не препятствие: на нем проверка заканчивается.
+    Возвращает (min_clearance, min_at, obstruction_at, obstruction_height):
+    наименьший запас (м, inf - рельефа под траекторией нет) и дальность,
+    где он достигнут; дальность первой точки ниже рельефа и высота рельефа
+    там, NaN - препятствий нет.
+    """
+    angle_rad = math.radians(angle)
+    vx = v0 * math.cos(angle_rad)
+    vz = v0 * math.sin(angle_rad)
+    x = 0.0
+    z = 0.0
+    z_min = min(0.0, height_diff)
+    min_clearance = np.inf
+    min_at = np.nan
+    obstruction_at = np.nan
+    obstruction_height = np.nan
+
+    while z >= z_min and x < distance - skip:
+        v = math.sqrt(vx * vx + vz * vz)
+        dvx_dt = -k * vx * v
+        dvz_dt = -gravity - k * vz * v
+        vx += dvx_dt * dt
+        vz += dvz_dt * dt
+        x += vx * dt
+        z += vz * dt
+        if x <= skip:
+            continue
+
+        ground = terrain_height(heights, grid, line[0] + line[3] * x, line[1] + line[4] * x)
+        if math.isnan(ground):
+            continue
+        clearance = line[2] + z - ground
+        if clearance < 0.0 and x >= distance - landing:
+            break
+        if clearance < min_clearance:
+            min_clearance = clearance
+            min_at = x
+        if clearance < 0.0 and math.isnan(obstruction_at):
+            obstruction_at = x
+            obstruction_height = ground
+
+    return min_clearance, min_at, obstruction_at, obstruction_height
+
+
+def trajectory_points(v0, angle, k, target_distance, target_height, dt=0.01, out=None):
+    """
+    Точки траектории для графиков и проверок.
+
+    Если out не передан, буфер выделяется один раз по длительности полета
+    из impact_numba и при нехватке удваивается.
+    Возвращает (trajectory, hit); trajectory - срез буфера.
+    """
+    if out is None:
+        _, flight_time, _, _, landed = impact_numba(v0, angle, k, min(0.0, target_height), dt)
+        capacity = int(flight_time / dt) + 2 if landed else 10000
+        out = np.empty((capacity, 2))
+
+    while True:
+        count, hit, complete = trajectory_into(v0, angle, k, target_distance, target_height, out, dt)
+        if complete:
+            return out[:count], hit
+        out = np.empty((out.shape[0] * 2, 2))
+
+
+def kernel_report():
+    """
+    Откуда взялось каждое ядро: "cache" - загружено из дискового кэша,
+    "compiled" - скомпилировано заново, "python" - Numba не установлена.
+    Возвращает список (имя, источник, секунды).
+    """
+    report = []
+    for kernel in (impact_numba, drag_acceleration, hermite, hermite_slope, dopri_error, dopri_numba,
+                   sensitivities_numba, ranges_parallel, trajectory_into, terrain_height, clearance_numba):
+        name = kernel.__name__
+        if not NUMBA_AVAILABLE:
+            source = "python"
+        elif sum(kernel.stats.cache_hits.values()) > 0:
+            source = "cache"
+        else:
+            source = "compiled"
+        report.append((name, source, COMPILE_TIMES.get(name, 0.0)))
+    return report
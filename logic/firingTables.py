@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from logic.balisticLogicAirFriction import air_corrected, simulate_batch, find_max_range_angle, degrees_to_mil, \
+    mil_to_degrees, impact_point
+
+# Bump when the table layout or the integrator changes: old files are ignored
+TABLE_VERSION = 3
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'tables')
+
+ELEVATION_STEP = 10  # mil
+HEIGHT_LEVELS = np.arange(-300.0, 301.0, 50.0)  # m
+# Near the max-range angle dθ/dR blows up, interpolation there is left to the integrator
+MAX_RANGE_MARGIN = 30  # mil
+# Default miss tolerance of solve(), mil: the 10 mil and 50 m grid is off by up to a few mil near max range
+VERIFY_TOL = 0.1
+
+# Loaded tables by key
+_tables = {}
+_building = set()
+_lock = threading.Lock()
+
+
+def table_key(system, shell, charge_name, temperature, pressure):
+    entry = {
+        "version": TABLE_VERSION,
+        "system": system["name"],
+        "k_base": abs(system.get("k_base", 1.0)),
+        "shell": shell["name"],
+        "charge": charge_name,
+        "v0": shell["charges"][charge_name],
+        "temperature": round(float(temperature), 1),
+        "pressure": round(float(pressure), 1),
+    }
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def table_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.npz")
+
+
+def build_table(system, shell, charge_name, temperature, pressure):
+    """
+    Integrates the drag model over an elevation grid for every height level.
+
+    Returns a dict of arrays: elevations (mil), heights (m),
+    ranges and times (levels x elevations, NaN where the level is unreachable)
+    and max_elevation (mil) - the low/high arc boundary for each level.
+    """
+    v0 = shell["charges"][charge_name]
+    k_base = abs(system.get("k_base", 1.0))
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+
+    elevations = np.arange(0.0, 1600.0, ELEVATION_STEP)
+    max_elevation = np.full(len(HEIGHT_LEVELS), np.nan)
+    for i, height in enumerate(HEIGHT_LEVELS):
+        max_angle, _ = find_max_range_angle(v0_corrected, k, height)
+        if max_angle is not None:
+            max_elevation[i] = degrees_to_mil(max_angle)
+
+    # All levels and elevations in one batch
+    ranges, times, _ = simulate_batch(v0_corrected, mil_to_degrees(elevations)[np.newaxis, :], k,
+                                      HEIGHT_LEVELS[:, np.newaxis])
+    ranges[np.isnan(max_elevation)] = np.nan
+    times[np.isnan(max_elevation)] = np.nan
+
+    return {
+        "version": np.array(TABLE_VERSION),
+        "elevations": elevations,
+        "heights": HEIGHT_LEVELS.copy(),
+        "ranges": ranges,
+        "times": times,
+        "max_elevation": max_elevation,
+    }
+
+
+def save_table(key, table):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = table_path(key) + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **table)
+    os.replace(tmp_path, table_path(key))
+
+
+def load_table(key):
+    path = table_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != TABLE_VERSION:
+                return None
+            return {name: data[name] for name in data.files}
+    except Exception as e:
+        print(f"Error loading firing table {path}: {e}")
+        return None
+
+
+def get_table(system, shell, charge_name, temperature, pressure, build=False):
+    """Table from memory or disk; builds and saves it if build is True."""
+    key = table_key(system, shell, charge_name, temperature, pressure)
+    if key in _tables:
+        return _tables[key]
+
+    table = load_table(key)
+    if table is None and build:
+        table = build_table(system, shell, charge_name, temperature, pressure)
+        save_table(key, table)
+    if table is not None:
+        table["branches"] = _make_branches(table)
+        _tables[key] = table
+    return table
+
+
+def build_table_async(system, shell, charge_name, temperature, pressure):
+    """Builds a missing table in a background thread, once per key."""
+    key = table_key(system, shell, charge_name, temperature, pressure)
+    with _lock:
+        if key in _tables or key in _building:
+            return
+        _building.add(key)
+
+    def worker():
+        try:
+            get_table(system, shell, charge_name, temperature, pressure, build=True)
+        except Exception as e:
+            print(f"Error building firing table: {e}")
+        finally:
+            with _lock:
+                _building.discard(key)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+def build_all_tables(config, temperature, pressure):
+    """Builds every system/shell/charge table in config.json for the given meteo."""
+    for system in config.get("artillerySystems", []):
+        for shell in system.get("compatibleShells", []):
+            for charge_name in shell.get("charges", {}):
+                get_table(system, shell, charge_name, temperature, pressure, build=True)
+
+
+def _make_branches(table):
+    """
+    Monotonic interpolators range -> elevation and range -> time,
+    per height level and arc.
+    """
+    from scipy.interpolate import PchipInterpolator
+
+    elevations = table["elevations"]
+    branches = []
+    for i in range(len(table["heights"])):
+        level = {}
+        max_elevation = table["max_elevation"][i]
+        for high_arc in (False, True):
+            level[high_arc] = None
+            if np.isnan(max_elevation):
+                continue
+            if high_arc:
+                mask = elevations > max_elevation + MAX_RANGE_MARGIN
+            else:
+                mask = elevations < max_elevation - MAX_RANGE_MARGIN
+            mask &= ~np.isnan(table["ranges"][i])
+
+            ranges = table["ranges"][i][mask]
+            if len(ranges) < 2:
+                continue
+            order = np.argsort(ranges)
+            ranges = ranges[order]
+            if np.any(np.diff(ranges) <= 0):
+                continue
+            elevation_fn = PchipInterpolator(ranges, elevations[mask][order], extrapolate=False)
+            level[high_arc] = (
+                elevation_fn,
+                elevation_fn.derivative(),
+                PchipInterpolator(ranges, table["times"][i][mask][order], extrapolate=False),
+            )
+        branches.append(level)
+    return branches
+
+
+def _level_solution(table, level, distance, high_arc):
+    branch = table["branches"][level][high_arc]
+    if branch is None:
+        return None
+    elevation_fn, slope_fn, time_fn = branch
+    elevation = float(elevation_fn(distance))
+    if np.isnan(elevation):
+        return None
+    # dθ/dR of the same interpolator gives ΔR per 1 mil
+    return elevation, float(time_fn(distance)), float(slope_fn(distance))
+
+
+def lookup(table, distance, height_diff, high_arc=False):
+    """
+    Firing solution from the table, or None outside the table.
+
+    Returns a dict: elevation (mil), flight_time (s), range_per_mil (m per
+    +1 mil, negative on the high arc) and height_correction (mil per 100 m of target height).
+    """
+    heights = table["heights"]
+    if not heights[0] <= height_diff <= heights[-1]:
+        return None
+
+    upper = int(np.searchsorted(heights, height_diff))
+    upper = min(max(upper, 1), len(heights) - 1)
+    lower = upper - 1
+
+    low_solution = _level_solution(table, lower, distance, high_arc)
+    high_solution = _level_solution(table, upper, distance, high_arc)
+    if low_solution is None or high_solution is None:
+        return None
+
+    step = heights[upper] - heights[lower]
+    weight = float((height_diff - heights[lower]) / step)
+    elevation, flight_time, slope = (a + weight * (b - a) for a, b in zip(low_solution, high_solution))
+
+    return {
+        "elevation": elevation,
+        "flight_time": flight_time,
+        "range_per_mil": 1.0 / slope if slope != 0 else None,
+        "height_correction": float((high_solution[0] - low_solution[0]) * 100.0 / step),
+    }
+
+
+def solve(table, v0, distance, height_diff, temperature, pressure, k_base, high_arc=False, verify_tol=VERIFY_TOL):
+    """
+    Table solution for the raw meteo the table was built for, or None.
+
+    verify_tol - if given (mil), one forward shot at the interpolated
+    elevation must land within verify_tol worth of range of the target,
+    otherwise None so that the caller falls through to the solver.
+    Returns the lookup dict.
+    """
+    solution = lookup(table, distance, height_diff, high_arc)
+    if solution is None or verify_tol is None:
+        return solution
+
+    if not solution["range_per_mil"]:
+        return None
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+    landed, _ = impact_point(v0_corrected, mil_to_degrees(solution["elevation"]), k, height_diff)
+    if landed is None or abs(landed - distance) > verify_tol * abs(solution["range_per_mil"]):
+        return None
+    return solution
+
+
+def table_rows(table, high_arc=False, range_step=100, height_diff=0.0):
+    """ACE-style rows: range, elevation, flight time, ΔR per mil, elevation change per 100 m."""
+    rows = []
+    max_range = np.nanmax(table["ranges"]) if np.any(~np.isnan(table["ranges"])) else 0
+    for distance in np.arange(range_step, max_range, range_step):
+        solution = lookup(table, distance, height_diff, high_arc)
+        if solution is not None:
+            rows.append(dict(solution, range=float(distance)))
+    return rows
+
+
+if __name__ == "__main__":
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+    with open(config_path, 'r') as file:
+        config = json.load(file)
+    build_all_tables(config, config.get("temperature", 15.0), config.get("pressure", 1013.25))
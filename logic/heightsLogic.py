@@ -1,19 +1,64 @@
+import hashlib
 import math
-from scipy.spatial import cKDTree
+import os
+import struct
+import warnings
+
+import numpy as np
+
+from logic import metrics
 
 #Global variables for caching
 _tree = None
 _coords = None
 _heights = None
 _loaded_file = None
+_grid = None
+_grid_file = None
+
+# get_grid refuses exports with fewer points than this share of their bounding grid
+GRID_MIN_FILL = 0.5
+
+# Binary grids converted from the text exports: HEADER, then float32 heights[row, col] in C order.
+# A grid is reused while the size and mtime of its text file are unchanged
+GRID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'heights')
+GRID_MAGIC = b"HGRID\0\0\0"
+GRID_VERSION = 1
+# magic, version, rows, cols, x0, y0, x step, y step, source mtime (ns), source size
+HEADER = struct.Struct("<8sIII4dqq")
+HEADER_SIZE = 128
 
 
 def read_data(file_path):
-    global _tree, _coords, _heights, _loaded_file
+    if _loaded_file == file_path and (_grid is not None or _tree is not None):
+        return
+
+    with metrics.span("heights.load"):
+        _load(file_path)
+
 
-    if _tree is not None and _loaded_file == file_path:
+def _load(file_path):
+    global _tree, _coords, _heights, _loaded_file, _grid, _grid_file
+
+    grid = load_grid(file_path)
+    if grid is not None:
+        _grid, _grid_file = grid, file_path
+        _tree = _coords = _heights = None
+        _loaded_file = file_path
         return
 
+    coords, heights = _parse_lines(file_path)
+    if coords:
+        from scipy.spatial import cKDTree
+        _tree = cKDTree(coords)
+        _coords = coords
+        _heights = heights
+        _grid = _grid_file = None
+        _loaded_file = file_path
+
+
+def _parse_lines(file_path):
+    """Points of the export line by line, skipping lines that are not three numbers"""
     coords = []
     heights = []
 
@@ -30,16 +75,150 @@ def read_data(file_path):
                 heights.append(h)
             except ValueError:
                 continue
+    return coords, heights
 
-    if coords:
-        _tree = cKDTree(coords)
-        _coords = coords
-        _heights = heights
-        _loaded_file = file_path
+
+def _parse_points(file_path):
+    """(N x 3) array of x, y, h; parsed in C when every line is three numbers, else line by line"""
+    with open(file_path, 'rb') as f:
+        text = f.read()
+    lines = text.count(b'\n') + (not text.endswith(b'\n'))
+    try:
+        with warnings.catch_warnings():
+            # Depending on the NumPy version, anything that is not a number stops fromstring
+            # with a warning or an error
+            warnings.simplefilter("ignore", DeprecationWarning)
+            values = np.fromstring(text, sep=' ')
+    except ValueError:
+        values = None
+    if values is not None and values.size == 3 * lines:
+        return values.reshape(-1, 3)
+
+    coords, heights = _parse_lines(file_path)
+    if not coords:
+        return np.empty((0, 3))
+    return np.column_stack((np.asarray(coords), heights))
+
+
+def grid_path(file_path):
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(GRID_DIR, f"{name}-{key}.hgrid")
+
+
+def convert(file_path, path=None):
+    """
+    Converts a text export into a binary grid file (path, by default grid_path).
+    Returns the path, or None if the export is empty or not an evenly spaced grid.
+    """
+    with metrics.span("heights.convert"):
+        points = _parse_points(file_path)
+        if not len(points):
+            return None
+        xs, cols = np.unique(points[:, 0], return_inverse=True)
+        ys, rows = np.unique(points[:, 1], return_inverse=True)
+        if len(xs) < 2 or len(ys) < 2 or len(points) < GRID_MIN_FILL * len(xs) * len(ys):
+            return None
+        step_x = (xs[-1] - xs[0]) / (len(xs) - 1)
+        step_y = (ys[-1] - ys[0]) / (len(ys) - 1)
+        if not (np.allclose(np.diff(xs), step_x) and np.allclose(np.diff(ys), step_y)):
+            return None
+
+        heights = np.full((len(ys), len(xs)), np.nan, dtype=np.float32)
+        heights[rows, cols] = points[:, 2]
+
+        stat = os.stat(file_path)
+        header = HEADER.pack(GRID_MAGIC, GRID_VERSION, len(ys), len(xs), xs[0], ys[0], step_x, step_y,
+                             stat.st_mtime_ns, stat.st_size)
+        path = path or grid_path(file_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(heights.tobytes())
+        os.replace(tmp_path, path)
+    return path
+
+
+def open_grid(path, source=None):
+    """
+    Memory-mapped (xs, ys, heights) of a binary grid file; None if it is
+    missing, of another version or older than the source text file.
+    The heights are copy-on-write: writes stay in memory.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    magic, version, rows, cols, x0, y0, step_x, step_y, mtime_ns, size = HEADER.unpack(header)
+    if magic != GRID_MAGIC or version != GRID_VERSION:
+        return None
+    if source is not None:
+        stat = os.stat(source)
+        if stat.st_mtime_ns != mtime_ns or stat.st_size != size:
+            return None
+
+    heights = np.memmap(path, dtype=np.float32, mode='c', offset=HEADER_SIZE, shape=(rows, cols))
+    return x0 + step_x * np.arange(cols), y0 + step_y * np.arange(rows), heights
+
+
+def load_grid(file_path):
+    """Grid of a text export through its binary file, converted on first use or when the text changed"""
+    path = grid_path(file_path)
+    grid = open_grid(path, file_path)
+    if grid is None and convert(file_path, path) is not None:
+        grid = open_grid(path, file_path)
+    return grid
+
+
+def get_grid(file_path):
+    """
+    The export as a regular grid: (xs, ys, heights), heights[row, col] at
+    (xs[col], ys[row]), float32, NaN where the export has no point.
+    None if the file has no points.
+    """
+    read_data(file_path)
+    if _loaded_file != file_path:
+        return None
+    if _grid is None:
+        raise ValueError("Height data is not a regular grid")
+    return _grid
+
+
+def _nearest_grid_height(x, y):
+    xs, ys, heights = _grid
+    col = int(np.clip(np.rint((x - xs[0]) / (xs[1] - xs[0])), 0, len(xs) - 1))
+    row = int(np.clip(np.rint((y - ys[0]) / (ys[1] - ys[0])), 0, len(ys) - 1))
+    height = heights[row, col]
+    if not np.isnan(height):
+        return float(height)
+
+    # A hole in the export: widen the window until it holds a point, then once more
+    # so that the nearest point by distance is inside it
+    radius = 1
+    while radius < max(heights.shape):
+        window = heights[max(row - radius, 0):row + radius + 1, max(col - radius, 0):col + radius + 1]
+        if not np.isnan(window).all():
+            break
+        radius *= 2
+    radius = int(math.ceil(radius * math.sqrt(2)))
+    rows = slice(max(row - radius, 0), row + radius + 1)
+    cols = slice(max(col - radius, 0), col + radius + 1)
+    window = heights[rows, cols]
+    if np.isnan(window).all():
+        return None
+    distance = np.hypot(*np.meshgrid(xs[cols] - x, ys[rows] - y))
+    distance[np.isnan(window)] = np.inf
+    return float(window.flat[distance.argmin()])
 
 
 def find_nearest_point(x, y):
     global _tree, _heights
+    if _grid is not None:
+        return _nearest_grid_height(x, y)
     if not _tree:
         return None
     distance, index = _tree.query((x, y))
@@ -47,6 +226,15 @@ def find_nearest_point(x, y):
 
 
 def get_height_for_coordinates(x, y, file_path):
-    read_data(file_path)
-    height = find_nearest_point(x, y)
+    with metrics.span("heights.lookup"):
+        read_data(file_path)
+        height = find_nearest_point(x, y)
     return height
+
+
+if __name__ == "__main__":
+    import sys
+
+    # One-time conversion ahead of the first map load: python -m logic.heightsLogic map/data/*.txt
+    for text_path in sys.argv[1:]:
+        print(f"{text_path} -> {convert(text_path) or 'not a regular grid, kept as text'}")
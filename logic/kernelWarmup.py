@@ -0,0 +1,39 @@
+import threading
+import time
+
+# Filled by the warm-up thread: list of (kernel, source, seconds) and total time
+report = None
+total_time = None
+_thread = None
+
+
+def _warm_up():
+    global report, total_time
+    start = time.perf_counter()
+    try:
+        # Importing the module compiles the kernels or loads them from the disk cache
+        from logic.dragKernels import kernel_report
+        report = kernel_report()
+    except Exception as e:
+        print(f"[ERROR] Kernel warm-up failed: {e}")
+        report = []
+    total_time = time.perf_counter() - start
+
+    for name, source, seconds in report:
+        print(f"[INFO] {name}: {source} ({seconds:.2f} s)")
+    print(f"[INFO] Kernels ready in {total_time:.2f} s")
+
+
+def start_warm_up():
+    """Compiles the drag kernels in a background thread while the UI starts"""
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_warm_up, name="kernel-warm-up", daemon=True)
+        _thread.start()
+    return _thread
+
+
+def wait(timeout=None):
+    if _thread is not None:
+        _thread.join(timeout)
+    return report
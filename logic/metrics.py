@@ -0,0 +1,180 @@
+"""
+Process-wide metrics: counters, latency histograms and timing spans.
+
+Recording is off by default. While it is off, count() and observe() return
+at once and span() / timed() cost one flag check. enable() switches it at
+runtime; snapshot(), dump_json() and dump_csv() export what was recorded.
+"""
+import csv
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds, s: 1 us to 100 s, four buckets per decade
+BUCKETS = tuple(10 ** (exponent / 4) for exponent in range(-24, 9))
+
+CSV_COLUMNS = ("kind", "name", "count", "total_s", "mean_ms", "min_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+class Histogram:
+    """Latency histogram over BUCKETS; percentiles are bucket upper bounds, capped at the maximum"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        if not self.count:
+            return math.nan
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                bound = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_ms": self.total / self.count * 1e3 if self.count else math.nan,
+            "min_ms": self.min * 1e3 if self.count else math.nan,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p90_ms": self.percentile(90) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "max_ms": self.max * 1e3 if self.count else math.nan,
+        }
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def count(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name, seconds):
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing its block into the histogram name"""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name):
+    """Decorator: every call is timed into the histogram name while recording is on"""
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """{"counters": {name: n}, "latency": {name: Histogram.summary()}}"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "latency": {name: histogram.summary() for name, histogram in _histograms.items()},
+        }
+
+
+def _prepare(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def dump_json(path):
+    _prepare(path)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(snapshot(), file, indent=4)
+
+
+def dump_csv(path):
+    """One row per counter and per histogram, columns CSV_COLUMNS"""
+    data = snapshot()
+    _prepare(path)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for name, value in sorted(data["counters"].items()):
+            writer.writerow({"kind": "counter", "name": name, "count": value})
+        for name, summary in sorted(data["latency"].items()):
+            writer.writerow({"kind": "latency", "name": name, **summary})
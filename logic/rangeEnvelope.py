@@ -0,0 +1,253 @@
+"""
+Per-charge range envelope of the drag model: the shortest and longest range
+the gun can reach at each height difference.
+
+Built once per system/shell/charge over the same muzzle-velocity and
+air-density span as logic.surrogateGrid, so one envelope covers any meteo.
+Within the elevation limits of the system the range is unimodal in the
+elevation, so each grid node needs only the maximum-range search, the two
+limits and, for targets above the gun, the lowest elevation whose apex
+clears the target. Cached in cache/envelopes/; check() then answers
+"can this charge reach the target at all" by interpolation, before any
+integration.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from logic.balisticLogic import calculate_range, mil_to_rad
+from logic.balisticLogicAirFriction import air_corrected, find_max_range, find_max_range_angle, mil_to_degrees
+from logic.surrogateGrid import RHO_RATIOS, V0_FACTORS
+
+# Bump when the grid layout or the integrator changes: old files are ignored
+ENVELOPE_VERSION = 1
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'envelopes')
+
+HEIGHT_LEVELS = np.arange(-600.0, 601.0, 50.0)  # m
+# Elevation search domain of the solvers, mil; "elevationLimits" in config.json narrows it
+ELEVATION_DOMAIN = (0.0, 1600.0)
+# Tolerance of the lowest elevation that clears a target above the gun, degrees
+TOUCH_TOL = 1e-4
+# check() rejects only beyond these margins around the interpolated envelope
+RANGE_MARGIN = 0.02
+RANGE_MARGIN_M = 20.0
+
+# Loaded envelopes by key
+_envelopes = {}
+_building = set()
+_lock = threading.Lock()
+
+
+def elevation_limits(system):
+    """(low, high) elevation in mil: the system's "elevationLimits" clipped to the solver domain"""
+    low, high = system.get("elevationLimits", ELEVATION_DOMAIN)
+    return max(float(low), ELEVATION_DOMAIN[0]), min(float(high), ELEVATION_DOMAIN[1])
+
+
+def envelope_key(system, shell, charge_name):
+    entry = {
+        "version": ENVELOPE_VERSION,
+        "system": system["name"],
+        "k_base": abs(system.get("k_base", 1.0)),
+        "limits": elevation_limits(system),
+        "shell": shell["name"],
+        "charge": charge_name,
+        "v0": shell["charges"][charge_name],
+    }
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def envelope_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.npz")
+
+
+def level_ranges(v0, k, height_diff, low, high):
+    """
+    (min_range, max_range) in m at one height for elevations low..high
+    (degrees), or (nan, nan) if no elevation there reaches the height.
+    """
+    max_angle, max_range = find_max_range_angle(v0, k, height_diff)
+    if max_angle is None:
+        return np.nan, np.nan
+
+    # Unimodal: past a limit the best range is at that limit. The apex only
+    # grows with the elevation, so every elevation above max_angle reaches the height
+    if not low <= max_angle <= high:
+        max_angle = min(max(max_angle, low), high)
+        max_range = find_max_range(v0, max_angle, k, height_diff)
+        if max_range is None:
+            return np.nan, np.nan
+
+    # Below the apex-touching elevation the target height is never reached
+    start = low
+    if find_max_range(v0, low, k, height_diff) is None:
+        miss, hit = low, max_angle
+        while hit - miss > TOUCH_TOL:
+            middle = 0.5 * (miss + hit)
+            if find_max_range(v0, middle, k, height_diff) is None:
+                miss = middle
+            else:
+                hit = middle
+        start = hit
+
+    return min(find_max_range(v0, start, k, height_diff), find_max_range(v0, high, k, height_diff)), max_range
+
+
+def build_envelope(system, shell, charge_name):
+    """
+    Integrates the envelope on the grid nodes.
+
+    Returns a dict of arrays: axes v0 (m/s), rho, heights; min_range and
+    max_range (v0 x rho x heights, m, NaN where the height is unreachable);
+    limits - elevation limits in mil.
+    """
+    v0_nominal = shell["charges"][charge_name]
+    k_base = abs(system.get("k_base", 1.0))
+    low, high = (mil_to_degrees(limit) for limit in elevation_limits(system))
+    v0_axis = v0_nominal * V0_FACTORS
+    shape = (len(v0_axis), len(RHO_RATIOS), len(HEIGHT_LEVELS))
+
+    min_range = np.full(shape, np.nan)
+    max_range = np.full(shape, np.nan)
+    for i, v0 in enumerate(v0_axis):
+        for j, rho_ratio in enumerate(RHO_RATIOS):
+            for level, height in enumerate(HEIGHT_LEVELS):
+                min_range[i, j, level], max_range[i, j, level] = level_ranges(v0, k_base * rho_ratio, height,
+                                                                              low, high)
+
+    return {
+        "version": np.array(ENVELOPE_VERSION),
+        "v0": v0_axis,
+        "rho": RHO_RATIOS.copy(),
+        "heights": HEIGHT_LEVELS.copy(),
+        "min_range": min_range,
+        "max_range": max_range,
+        "limits": np.array(elevation_limits(system)),
+    }
+
+
+def _linear_weights(axis, value):
+    """(index, weight of the upper node) for linear interpolation, None outside the axis"""
+    if not axis[0] <= value <= axis[-1]:
+        return None
+    i = min(int(np.searchsorted(axis, value, side="right")) - 1, len(axis) - 2)
+    return i, (value - axis[i]) / (axis[i + 1] - axis[i])
+
+
+def ranges(envelope, v0_corrected, rho_ratio, height_diff):
+    """
+    Interpolated (min_range, max_range) in m.
+
+    (nan, nan) if the height is unreachable at every surrounding node,
+    None outside the grid or on the reachability edge.
+    """
+    cell = [_linear_weights(envelope[axis], value)
+            for axis, value in (("v0", v0_corrected), ("rho", rho_ratio), ("heights", height_diff))]
+    if None in cell:
+        return None
+    (i, wi), (j, wj), (n, wn) = cell
+    corners = np.ix_((i, i + 1), (j, j + 1), (n, n + 1))
+    weights = np.einsum("a,b,c->abc", [1 - wi, wi], [1 - wj, wj], [1 - wn, wn])
+
+    max_corner = envelope["max_range"][corners]
+    if np.isnan(max_corner).all():
+        return np.nan, np.nan
+    if np.isnan(max_corner).any():
+        return None
+    return float((weights * envelope["min_range"][corners]).sum()), float((weights * max_corner).sum())
+
+
+def check(envelope, v0, distance, height_diff, temperature, pressure, k_base):
+    """
+    Whether the charge can reach the target: True, False or None (unknown).
+
+    Only rejects outside RANGE_MARGIN / RANGE_MARGIN_M around the
+    interpolated envelope, so a reachable target is never turned away.
+    """
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+    reach = ranges(envelope, v0_corrected, k / k_base, height_diff)
+    if reach is None:
+        return None
+    min_range, max_range = reach
+    if np.isnan(max_range):
+        return False
+    margin = RANGE_MARGIN * max_range + RANGE_MARGIN_M
+    return min_range - margin <= distance <= max_range + margin
+
+
+def vacuum_ranges(v0, limits):
+    """(min_range, max_range) in m without drag at zero height difference for elevation limits in mil"""
+    low, high = (mil_to_rad(limit) for limit in limits)
+    best = min(max(np.pi / 4, low), high)
+    return min(calculate_range(v0, low), calculate_range(v0, high)), calculate_range(v0, best)
+
+
+def save_envelope(key, envelope):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = envelope_path(key) + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **envelope)
+    os.replace(tmp_path, envelope_path(key))
+
+
+def load_envelope(key):
+    path = envelope_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != ENVELOPE_VERSION:
+                return None
+            return {name: data[name] for name in data.files}
+    except Exception as e:
+        print(f"Error loading range envelope {path}: {e}")
+        return None
+
+
+def get_envelope(system, shell, charge_name, build=False):
+    """Envelope from memory or disk; builds and saves it if build is True."""
+    key = envelope_key(system, shell, charge_name)
+    if key in _envelopes:
+        return _envelopes[key]
+
+    envelope = load_envelope(key)
+    if envelope is None and build:
+        envelope = build_envelope(system, shell, charge_name)
+        save_envelope(key, envelope)
+    if envelope is not None:
+        _envelopes[key] = envelope
+    return envelope
+
+
+def build_envelopes_async(system, shell, charge_names):
+    """Builds the missing envelopes of a shell's charges in one background thread, once per key."""
+    keys = {}
+    with _lock:
+        for charge_name in charge_names:
+            key = envelope_key(system, shell, charge_name)
+            if key not in _envelopes and key not in _building:
+                _building.add(key)
+                keys[charge_name] = key
+    if not keys:
+        return
+
+    def worker():
+        for charge_name, key in keys.items():
+            try:
+                get_envelope(system, shell, charge_name, build=True)
+            except Exception as e:
+                print(f"Error building range envelope: {e}")
+            finally:
+                with _lock:
+                    _building.discard(key)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+def is_building(system, shell, charge_name):
+    with _lock:
+        return envelope_key(system, shell, charge_name) in _building
@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from logic import solutionStore
+from logic.balisticLogicAirFriction import solve_shot
+
+DEFAULT_SIZE = 1024
+
+# Key quantization: inputs inside one step share a solution, which is computed
+# at the step centre so the answer does not depend on which click came first
+DISTANCE_STEP = 1.0  # m
+# The shared elevation is moved from the step centre to the real distance by
+# range_per_mil; a larger move means ΔR per mil is near zero (the top of the
+# range curve), where the target distance is solved without the cache
+MAX_DISTANCE_CORRECTION = 0.5  # mil
+HEIGHT_STEP = 0.5  # m
+VELOCITY_STEP = 0.1  # m/s
+TEMPERATURE_STEP = 0.1  # °C
+PRESSURE_STEP = 0.1  # hPa
+K_DIGITS = 6  # significant digits of k_base
+
+# Elevation tolerance (mil) of the analytic fast path, None - always integrate
+_analytic_tol = None
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping with hit/miss counters; safe to share between threads"""
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive: {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Cached value for key; on a miss calls compute() outside the lock and stores the result"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def resize(self, maxsize):
+        if maxsize < 1:
+            raise ValueError(f"Cache size must be positive: {maxsize}")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_cache = LRUCache()
+
+
+def solution_key(v0, distance, height_diff, temperature, pressure, k_base, high_arc=False, method="euler", dt=0.01,
+                 analytic_tol=None):
+    """
+    Hashable key of quantized inputs: integer step counts, k_base rounded to
+    K_DIGITS, then the solver settings - integrator, Euler step and analytic
+    tolerance (0.0 when the analytic fast path is off), so a solution is never
+    served to a request for another solver.
+    """
+    return (
+        round(distance / DISTANCE_STEP),
+        round(height_diff / HEIGHT_STEP),
+        round(v0 / VELOCITY_STEP),
+        float(f"{k_base:.{K_DIGITS}g}"),
+        round(temperature / TEMPERATURE_STEP),
+        round(pressure / PRESSURE_STEP),
+        bool(high_arc),
+        method,
+        float(dt),
+        float(analytic_tol or 0.0),
+    )
+
+
+def _solve(key):
+    distance_q, height_q, v0_q, k_base, temperature_q, pressure_q, high_arc, method, dt, analytic_tol = key
+    distance = distance_q * DISTANCE_STEP
+    height_diff = height_q * HEIGHT_STEP
+    v0 = v0_q * VELOCITY_STEP
+    temperature = temperature_q * TEMPERATURE_STEP
+    pressure = pressure_q * PRESSURE_STEP
+
+    return solve_shot(v0, distance, height_diff, temperature, pressure, k_base, high_arc, method=method,
+                      analytic_tol=analytic_tol or None, dt=dt)
+
+
+def _solve_stored(key, label):
+    """Integrates only if the on-disk store (logic.solutionStore) has no row for this key"""
+    store = solutionStore.get_store() if label is not None else None
+    if store is not None:
+        try:
+            found, solution = store.get(label, key)
+            if found:
+                return solution
+        except sqlite3.Error as e:
+            print(f"Error reading solution store: {e}")
+
+    solution = _solve(key)
+
+    if store is not None:
+        try:
+            store.put(label, key, solution)
+        except sqlite3.Error as e:
+            print(f"Error writing solution store: {e}")
+    return solution
+
+
+def solve(v0, distance, height_diff, temperature, pressure, k_base, high_arc=False, method="euler", label=None,
+          dt=0.01):
+    """
+    Drag-model firing solution through the LRU cache.
+
+    label - (system, shell, charge) names; when given, a cache miss is looked
+    up in the persistent solution store before integrating.
+    dt - Euler step, s.
+
+    Returns the solve_shot record: elevation (mil), flight_time (s),
+    range_per_mil (m per +1 mil), apex_height (m), impact_angle (degrees)
+    and impact_velocity (m/s); entries may be None if unavailable. None
+    when the target is out of range; unreachable targets are cached as well.
+    The elevation is corrected from the quantized distance to the given one.
+    """
+    key = solution_key(v0, distance, height_diff, temperature, pressure, k_base, high_arc, method, dt,
+                       _analytic_tol)
+    if label is not None:
+        solution = _cache.get_or_compute((label, key), lambda: _solve_stored(key, label))
+    else:
+        solution = _cache.get_or_compute(key, lambda: _solve(key))
+    if solution is None:
+        return None
+
+    offset = distance - key[0] * DISTANCE_STEP
+    range_per_mil = solution["range_per_mil"]
+    if offset == 0:
+        return dict(solution)
+    if range_per_mil and abs(offset / range_per_mil) <= MAX_DISTANCE_CORRECTION:
+        return dict(solution, elevation=solution["elevation"] + offset / range_per_mil)
+    return solve_shot(v0, distance, height_diff, temperature, pressure, k_base, high_arc, method=method,
+                      analytic_tol=_analytic_tol, dt=dt)
+
+
+def set_cache_size(maxsize):
+    _cache.resize(int(maxsize))
+
+
+def set_analytic_tolerance(tol):
+    """Enables the analytic fast path (logic.analyticDrag) within tol mil; None or 0 disables it"""
+    global _analytic_tol
+    _analytic_tol = float(tol) if tol else None
+    _cache.clear()
+
+
+def analytic_tolerance():
+    """Current tolerance of the analytic fast path in mil, None when it is off"""
+    return _analytic_tol
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,162 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Bump when the table layout or the solver changes: the old table is dropped
+SCHEMA_VERSION = 4
+
+STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'solutions.sqlite')
+
+MAX_ROWS = 100000
+# Eviction runs once per this many writes
+EVICT_EVERY = 100
+
+KEY_COLUMNS = ("system", "shell", "charge", "distance", "height", "v0", "k_base", "temperature", "pressure",
+               "high_arc", "method", "dt", "analytic_tol")
+# Fields of the logic.balisticLogicAirFriction.solve_shot record
+VALUE_COLUMNS = ("elevation", "flight_time", "range_per_mil", "apex_height", "impact_angle", "impact_velocity")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    system TEXT NOT NULL,
+    shell TEXT NOT NULL,
+    charge TEXT NOT NULL,
+    distance INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    v0 INTEGER NOT NULL,
+    k_base REAL NOT NULL,
+    temperature INTEGER NOT NULL,
+    pressure INTEGER NOT NULL,
+    high_arc INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    dt REAL NOT NULL,
+    analytic_tol REAL NOT NULL,
+    reachable INTEGER NOT NULL,
+    elevation REAL,
+    flight_time REAL,
+    range_per_mil REAL,
+    apex_height REAL,
+    impact_angle REAL,
+    impact_velocity REAL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (system, shell, charge, distance, height, v0, k_base, temperature, pressure, high_arc, method, dt,
+                 analytic_tol)
+);
+CREATE INDEX IF NOT EXISTS solutions_used_at ON solutions (used_at);
+"""
+
+
+class SolutionStore:
+    """
+    Drag-model solutions on disk, shared between sessions and app instances.
+
+    Rows are keyed by (system, shell, charge) plus the quantized key of
+    logic.solutionCache.solution_key. The database runs in WAL mode, so
+    several processes can read and write it at once; the least recently
+    used rows are evicted above max_rows.
+    """
+
+    def __init__(self, path=STORE_PATH, max_rows=MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self.evict()
+
+    def _migrate(self):
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._connection.execute("DROP TABLE IF EXISTS solutions")
+            self._connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._connection.executescript(_SCHEMA)
+
+    def get(self, label, key):
+        """Returns (found, solution); solution is None for a stored out-of-range result"""
+        where = " AND ".join(f"{column} = ?" for column in KEY_COLUMNS)
+        params = self._params(label, key)
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT reachable, {', '.join(VALUE_COLUMNS)} FROM solutions WHERE {where}", params).fetchone()
+            if row is None:
+                return False, None
+            self._connection.execute(f"UPDATE solutions SET used_at = ? WHERE {where}", (time.time(),) + params)
+
+        if not row[0]:
+            return True, None
+        return True, dict(zip(VALUE_COLUMNS, row[1:]))
+
+    def put(self, label, key, solution):
+        if solution is None:
+            values = (0,) + (None,) * len(VALUE_COLUMNS)
+        else:
+            values = (1,) + tuple(solution.get(column) for column in VALUE_COLUMNS)
+        columns = KEY_COLUMNS + ("reachable",) + VALUE_COLUMNS + ("used_at",)
+        placeholders = ", ".join("?" * len(columns))
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO solutions ({', '.join(columns)}) VALUES ({placeholders})",
+                self._params(label, key) + values + (time.time(),))
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Deletes the least recently used rows above max_rows"""
+        with self._lock:
+            count = self._connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+            if count > self.max_rows:
+                self._connection.execute(
+                    "DELETE FROM solutions WHERE rowid IN "
+                    "(SELECT rowid FROM solutions ORDER BY used_at LIMIT ?)", (count - self.max_rows,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _params(label, key):
+        system, shell, charge = label
+        distance, height, v0, k_base, temperature, pressure, high_arc, method, dt, analytic_tol = key
+        return (system, shell, charge, distance, height, v0, k_base, temperature, pressure, int(high_arc), method,
+                dt, analytic_tol)
+
+
+_store = None
+_store_failed = False
+_store_lock = threading.Lock()
+_max_rows = MAX_ROWS
+
+
+def get_store():
+    """Shared store, opened on first use; None if the database cannot be opened"""
+    global _store, _store_failed
+    with _store_lock:
+        if _store is None and not _store_failed:
+            try:
+                _store = SolutionStore(max_rows=_max_rows)
+            except (sqlite3.Error, OSError) as e:
+                print(f"Error opening solution store: {e}")
+                _store_failed = True
+        return _store
+
+
+def set_max_rows(max_rows):
+    global _max_rows
+    _max_rows = int(max_rows)
+    if _store is not None:
+        _store.max_rows = _max_rows
+        _store.evict()
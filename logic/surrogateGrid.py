@@ -0,0 +1,335 @@
+"""
+Meteo-independent surrogate of the drag model for one charge.
+
+The grid runs over temperature-corrected v0, air-density ratio (k / k_base),
+height difference and s = sqrt(1 - range / max_range). In s the elevation is
+smooth through the maximum range, where both arcs meet at s = 0. Elevation
+and flight time per arc are stored as float32 arrays and interpolated with
+cubic weights along v0 and density and linearly along height and s.
+
+Built once per charge with simulate_batch and find_max_range_angle, checked on
+held-out random points against find_elevations; the errors are saved with the
+grid (error_report). A meteo change then costs a few array lookups.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from logic.balisticLogic import STATUS_OK, STATUS_OUT_OF_RANGE, STATUS_ERROR
+from logic.balisticLogicAirFriction import air_corrected, simulate_batch, find_max_range_angle, find_elevations, \
+    impact_point, degrees_to_mil, mil_to_degrees, rho_standard
+
+# Bump when the grid layout or the integrator changes: old files are ignored
+SURROGATE_VERSION = 2
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'surrogates')
+
+# v0 / v0_nominal covers -40..+50 °C, density ratio 900..1070 hPa over the same temperatures
+V0_FACTORS = np.linspace(0.88, 1.08, 5)
+RHO_RATIOS = np.linspace(0.75, 1.35, 6)
+HEIGHT_LEVELS = np.arange(-300.0, 301.0, 50.0)  # m
+S_NODES = np.linspace(0.0, 1.0, 65)
+ELEVATION_STEP = 5  # mil, sampling of the integrated curves
+VALIDATION_POINTS = 100
+
+# Loaded surrogates by key
+_surrogates = {}
+_building = set()
+_lock = threading.Lock()
+
+
+def surrogate_key(system, shell, charge_name):
+    entry = {
+        "version": SURROGATE_VERSION,
+        "system": system["name"],
+        "k_base": abs(system.get("k_base", 1.0)),
+        "shell": shell["name"],
+        "charge": charge_name,
+        "v0": shell["charges"][charge_name],
+    }
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def surrogate_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.npz")
+
+
+def meteo_for(v0_factor, rho_ratio):
+    """(temperature °C, pressure hPa) giving this v0 factor and density ratio in air_corrected"""
+    temperature_k = 288.15 * v0_factor ** 2
+    pressure = rho_ratio * rho_standard * 287.05 * temperature_k / 100
+    return temperature_k - 273.15, pressure
+
+
+def _arc_curve(ranges, times, elevations, max_range, max_elevation, high_arc):
+    """Elevation and time on S_NODES for one arc of one integrated level"""
+    mask = elevations > max_elevation if high_arc else elevations < max_elevation
+    mask &= ~np.isnan(ranges)
+    s = np.sqrt(np.clip(1.0 - ranges[mask] / max_range, 0.0, 1.0))
+    s = np.append(s, 0.0)
+    elevation = np.append(elevations[mask], max_elevation)
+    time = np.append(times[mask], np.interp(max_elevation, elevations[~np.isnan(times)],
+                                            times[~np.isnan(times)]))
+    order = np.argsort(s, kind="stable")
+    s, elevation, time = s[order], elevation[order], time[order]
+    unique = np.concatenate(([True], np.diff(s) > 0))
+    s, elevation, time = s[unique], elevation[unique], time[unique]
+    if len(s) < 2:
+        return np.full(len(S_NODES), np.nan), np.full(len(S_NODES), np.nan)
+
+    from scipy.interpolate import PchipInterpolator
+    return (PchipInterpolator(s, elevation, extrapolate=False)(S_NODES),
+            PchipInterpolator(s, time, extrapolate=False)(S_NODES))
+
+
+def build_surrogate(system, shell, charge_name):
+    """
+    Integrates the drag model on the grid nodes.
+
+    Returns a dict of arrays: axes v0 (m/s), rho, heights, s; max_range
+    (v0 x rho x heights); elevation (mil) and time (s), both
+    (arc x v0 x rho x heights x s) float32, NaN where unreachable;
+    validation_errors (mil) of the held-out check.
+    """
+    v0_nominal = shell["charges"][charge_name]
+    k_base = abs(system.get("k_base", 1.0))
+    v0_axis = V0_FACTORS * v0_nominal
+    shape = (len(v0_axis), len(RHO_RATIOS), len(HEIGHT_LEVELS))
+
+    elevations = np.arange(0.0, 1600.0, ELEVATION_STEP)
+    max_range = np.full(shape, np.nan)
+    elevation = np.full((2,) + shape + (len(S_NODES),), np.nan, dtype=np.float32)
+    time = np.full((2,) + shape + (len(S_NODES),), np.nan, dtype=np.float32)
+
+    for i, v0 in enumerate(v0_axis):
+        for j, rho_ratio in enumerate(RHO_RATIOS):
+            k = k_base * rho_ratio
+            ranges, times, _ = simulate_batch(v0, mil_to_degrees(elevations)[np.newaxis, :], k,
+                                              HEIGHT_LEVELS[:, np.newaxis])
+            for level, height in enumerate(HEIGHT_LEVELS):
+                max_angle, level_range = find_max_range_angle(v0, k, height)
+                if max_angle is None:
+                    continue
+                max_range[i, j, level] = level_range
+                for arc in (0, 1):
+                    elevation[arc, i, j, level], time[arc, i, j, level] = _arc_curve(
+                        ranges[level], times[level], elevations, level_range, degrees_to_mil(max_angle), arc == 1)
+
+    surrogate = {
+        "version": np.array(SURROGATE_VERSION),
+        "v0": v0_axis,
+        "rho": RHO_RATIOS.copy(),
+        "heights": HEIGHT_LEVELS.copy(),
+        "s": S_NODES.copy(),
+        "max_range": max_range,
+        "elevation": elevation,
+        "time": time,
+    }
+    surrogate["validation_errors"] = validate(surrogate, v0_nominal, k_base)
+    return surrogate
+
+
+def validate(surrogate, v0_nominal, k_base, points=VALIDATION_POINTS, seed=0):
+    """Elevation errors (mil) at random points between the nodes against find_elevations"""
+    rng = np.random.default_rng(seed)
+    errors = []
+    for _ in range(points * 3):
+        if len(errors) >= points:
+            break
+        v0_factor = rng.uniform(V0_FACTORS[0], V0_FACTORS[-1])
+        rho_ratio = rng.uniform(RHO_RATIOS[0], RHO_RATIOS[-1])
+        height_diff = rng.uniform(HEIGHT_LEVELS[0], HEIGHT_LEVELS[-1])
+        high_arc = bool(rng.integers(2))
+        max_range = _interpolate(surrogate, surrogate["max_range"], v0_factor * v0_nominal, rho_ratio, height_diff)
+        if np.isnan(max_range):
+            continue
+        distance = rng.uniform(0.05, 0.98) * float(max_range)
+
+        result = query(surrogate, distance, height_diff, rho_ratio, v0_factor * v0_nominal, high_arc)
+        temperature, pressure = meteo_for(v0_factor, rho_ratio)
+        reference = find_elevations(v0_nominal, distance, height_diff, temperature, pressure, k_base,
+                                    low=not high_arc, high=high_arc)[high_arc]
+        if reference is None or result["status"] != STATUS_OK:
+            continue
+        errors.append(abs(float(result["elevation"]) - degrees_to_mil(reference)))
+    return np.array(errors)
+
+
+def error_report(surrogate):
+    """Held-out elevation error (mil): points, p50, p90, p99 and max"""
+    errors = surrogate["validation_errors"]
+    report = {"points": len(errors)}
+    for name, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100)):
+        report[name] = float(np.percentile(errors, q)) if len(errors) else np.nan
+    return report
+
+
+def _cubic_weights(axis, q):
+    """Indices (..., 4) and Lagrange weights of the 4-node stencil around q on a uniform axis"""
+    position = (q - axis[0]) / (axis[1] - axis[0])
+    first = np.clip(np.floor(position).astype(np.int64) - 1, 0, len(axis) - 4)
+    u = position - first
+    weights = np.stack([-(u - 1) * (u - 2) * (u - 3) / 6, u * (u - 2) * (u - 3) / 2,
+                        -u * (u - 1) * (u - 3) / 2, u * (u - 1) * (u - 2) / 6], axis=-1)
+    return first[..., np.newaxis] + np.arange(4), weights
+
+
+def _linear_weights(axis, q):
+    position = (q - axis[0]) / (axis[1] - axis[0])
+    first = np.clip(np.floor(position).astype(np.int64), 0, len(axis) - 2)
+    u = position - first
+    return first[..., np.newaxis] + np.arange(2), np.stack([1 - u, u], axis=-1)
+
+
+def _interpolate(surrogate, values, v0, rho_ratio, height_diff, s=None):
+    """
+    Cubic in v0 and rho, linear in height; NaN if any node of the stencil is NaN.
+
+    With s the values are also linear in s: returns (value, d value / ds).
+    """
+    iv, wv = _cubic_weights(surrogate["v0"], np.asarray(v0, dtype=np.float64))
+    ir, wr = _cubic_weights(surrogate["rho"], np.asarray(rho_ratio, dtype=np.float64))
+    ih, wh = _linear_weights(surrogate["heights"], np.asarray(height_diff, dtype=np.float64))
+    index = (iv[..., :, None, None], ir[..., None, :, None], ih[..., None, None, :])
+    weight = wv[..., :, None, None] * wr[..., None, :, None] * wh[..., None, None, :]
+    if s is None:
+        return np.sum(values[index] * weight, axis=(-3, -2, -1))
+
+    i_s, w_s = _linear_weights(surrogate["s"], np.asarray(s, dtype=np.float64))
+    index = tuple(i[..., None] for i in index) + (i_s[..., None, None, None, :],)
+    nodes = np.sum(values[index] * weight[..., None], axis=(-4, -3, -2))
+    value = np.sum(nodes * w_s, axis=-1)
+    return value, (nodes[..., 1] - nodes[..., 0]) / (surrogate["s"][1] - surrogate["s"][0])
+
+
+def query(surrogate, distance, height_diff, rho_ratio, v0, high_arc=False):
+    """
+    Firing solutions by interpolation, for scalars or broadcast arrays.
+
+    v0 - temperature-corrected muzzle velocity, rho_ratio - k / k_base.
+    Returns a dict of arrays: elevation (mil), flight_time (s), range_per_mil
+    (m per +1 mil) and status: STATUS_OUT_OF_RANGE beyond the maximum range,
+    STATUS_ERROR outside the grid or next to its unreachable part.
+    """
+    distance, height_diff, rho_ratio, v0 = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (distance, height_diff, rho_ratio, v0)))
+    inside = ((surrogate["v0"][0] <= v0) & (v0 <= surrogate["v0"][-1])
+              & (surrogate["rho"][0] <= rho_ratio) & (rho_ratio <= surrogate["rho"][-1])
+              & (surrogate["heights"][0] <= height_diff) & (height_diff <= surrogate["heights"][-1])
+              & (distance > 0))
+
+    arc = 1 if high_arc else 0
+    max_range = _interpolate(surrogate, surrogate["max_range"], v0, rho_ratio, height_diff)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        reachable = inside & (distance <= max_range)
+        s = np.sqrt(np.clip(1.0 - distance / max_range, 0.0, 1.0))
+        elevation, slope = _interpolate(surrogate, surrogate["elevation"][arc], v0, rho_ratio, height_diff, s)
+        flight_time, _ = _interpolate(surrogate, surrogate["time"][arc], v0, rho_ratio, height_diff, s)
+        # ds/dR = -1 / (2·s·max_range), so ΔR per mil is -2·s·max_range / (dθ/ds)
+        range_per_mil = -2.0 * s * max_range / slope
+
+    status = np.where(inside, STATUS_OUT_OF_RANGE, STATUS_ERROR).astype(np.int8)
+    status[reachable & ~np.isnan(elevation)] = STATUS_OK
+    status[reachable & np.isnan(elevation)] = STATUS_ERROR
+    ok = status == STATUS_OK
+    return {
+        "elevation": np.where(ok, elevation, np.nan),
+        "flight_time": np.where(ok, flight_time, np.nan),
+        "range_per_mil": np.where(ok, range_per_mil, np.nan),
+        "status": status,
+    }
+
+
+def solve(surrogate, v0, distance, height_diff, temperature, pressure, k_base, high_arc=False, verify_tol=None):
+    """
+    Single firing solution for raw meteo, or None if the surrogate has none.
+
+    verify_tol - if given (mil), one forward shot at the interpolated
+    elevation must land within verify_tol worth of range of the target.
+    Returns a dict: elevation (mil), flight_time (s), range_per_mil (m).
+    """
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+    result = query(surrogate, distance, height_diff, k / k_base, v0_corrected, high_arc)
+    if result["status"] != STATUS_OK:
+        return None
+    solution = {name: float(result[name]) for name in ("elevation", "flight_time", "range_per_mil")}
+
+    if verify_tol is not None:
+        landed, _ = impact_point(v0_corrected, mil_to_degrees(solution["elevation"]), k, height_diff)
+        if landed is None or abs(landed - distance) > verify_tol * abs(solution["range_per_mil"]):
+            return None
+    return solution
+
+
+def save_surrogate(key, surrogate):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = surrogate_path(key) + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **surrogate)
+    os.replace(tmp_path, surrogate_path(key))
+
+
+def load_surrogate(key):
+    path = surrogate_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != SURROGATE_VERSION:
+                return None
+            return {name: data[name] for name in data.files}
+    except Exception as e:
+        print(f"Error loading surrogate {path}: {e}")
+        return None
+
+
+def get_surrogate(system, shell, charge_name, build=False):
+    """Surrogate from memory or disk; builds and saves it if build is True."""
+    key = surrogate_key(system, shell, charge_name)
+    if key in _surrogates:
+        return _surrogates[key]
+
+    surrogate = load_surrogate(key)
+    if surrogate is None and build:
+        surrogate = build_surrogate(system, shell, charge_name)
+        save_surrogate(key, surrogate)
+    if surrogate is not None:
+        _surrogates[key] = surrogate
+    return surrogate
+
+
+def build_surrogate_async(system, shell, charge_name):
+    """Builds a missing surrogate in a background thread, once per key."""
+    key = surrogate_key(system, shell, charge_name)
+    with _lock:
+        if key in _surrogates or key in _building:
+            return
+        _building.add(key)
+
+    def worker():
+        try:
+            get_surrogate(system, shell, charge_name, build=True)
+        except Exception as e:
+            print(f"Error building surrogate: {e}")
+        finally:
+            with _lock:
+                _building.discard(key)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+if __name__ == "__main__":
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+    with open(config_path, 'r') as file:
+        config = json.load(file)
+    for system in config.get("artillerySystems", []):
+        if abs(system.get("k_base", 1.0)) >= 1e-3:
+            continue
+        for shell in system.get("compatibleShells", []):
+            for charge_name in shell.get("charges", {}):
+                report = error_report(get_surrogate(system, shell, charge_name, build=True))
+                print(f"{system['name']} / {shell['name']} / {charge_name}: {report['points']} held-out points, "
+                      f"p50 {report['p50']:.3f}, p90 {report['p90']:.3f}, p99 {report['p99']:.3f}, max {report['max']:.3f} mil")
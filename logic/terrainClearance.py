@@ -0,0 +1,73 @@
+"""
+Terrain clearance of a solved trajectory.
+
+The solvers fly over empty air; check() replays the final trajectory along
+the gun-target line against the heightmap of logic.heightsLogic.get_grid
+inside a compiled kernel (dragKernels.clearance_numba) with bilinear
+height lookups, and reports the smallest clearance and the first point
+where the shell would hit the terrain. The replay uses the gravity of the
+solver that produced the elevation, and a ground contact within the
+landing tolerance short of the target is the impact, not an obstruction.
+One integration per call, so it is cheap enough to run after every solve.
+"""
+import math
+
+import numpy as np
+
+from logic import metrics
+from logic.balisticLogic import VACUUM_G
+from logic.balisticLogicAirFriction import air_corrected, g, mil_to_degrees
+
+# The first and last grid cells along the line are not checked: the gun and
+# the target stand on the terrain, where interpolation is off by the slope
+SKIP_CELLS = 1.0
+
+
+def grid_geometry(grid):
+    """(x0, y0, x step, y step) of a heightsLogic grid as the kernel takes it"""
+    xs, ys, _ = grid
+    return np.array([xs[0], ys[0], xs[1] - xs[0], ys[1] - ys[0]], dtype=np.float64)
+
+
+@metrics.timed("terrain.clearance")
+def check(grid, gun, target, v0, elevation, temperature, pressure, k_base, air_friction=True, landing_tol=0.0,
+          dt=0.01):
+    """
+    Clearance of the trajectory at elevation (mil) from gun to target, both (x, y, h).
+
+    elevation should be the solver's unrounded angle. Without air friction
+    the shot is replayed in the vacuum model of logic.balisticLogic. The
+    shell coming down on the terrain at most landing_tol m short of the
+    target (e.g. the range change of one mil) is the impact.
+
+    Returns a dict: clearance - smallest height above the terrain, m (inf
+    with no terrain data under the path); clearance_at - its distance from
+    the gun, m; obstruction - None, or the first point under the terrain as
+    a dict of distance, x, y and terrain height.
+    """
+    from logic.dragKernels import clearance_numba
+
+    xs, ys, heights = grid
+    if len(xs) < 2 or len(ys) < 2:
+        return {"clearance": math.inf, "clearance_at": math.nan, "obstruction": None}
+
+    distance = math.hypot(target[0] - gun[0], target[1] - gun[1])
+    direction = ((target[0] - gun[0]) / distance, (target[1] - gun[1]) / distance) if distance else (1.0, 0.0)
+    v0, k, gravity = (*air_corrected(v0, temperature, pressure, k_base), g) if air_friction else (v0, 0.0, VACUUM_G)
+    line = np.array([gun[0], gun[1], gun[2], *direction], dtype=np.float64)
+    geometry = grid_geometry(grid)
+    skip = SKIP_CELLS * max(abs(geometry[2]), abs(geometry[3]))
+
+    clearance, clearance_at, obstruction_at, terrain = clearance_numba(
+        v0, mil_to_degrees(elevation), k, distance, target[2] - gun[2], line, heights, geometry, skip,
+        max(landing_tol, 0.0), gravity, dt)
+
+    obstruction = None
+    if not math.isnan(obstruction_at):
+        obstruction = {
+            "distance": obstruction_at,
+            "x": gun[0] + direction[0] * obstruction_at,
+            "y": gun[1] + direction[1] * obstruction_at,
+            "terrain": terrain,
+        }
+    return {"clearance": clearance, "clearance_at": clearance_at, "obstruction": obstruction}
@@ -39,4 +39,5 @@ def calculate_high_elevation(R, v, h_s, h_t, g=9.79):
     return round(theta_mil)
 
 
-print(calculate_high_elevation(14000, 415.3, 0, 100))  # Приклад виклику
\ No newline at end of file
+if __name__ == "__main__":
+    print(calculate_high_elevation(14000, 415.3, 0, 100))  # Приклад виклику
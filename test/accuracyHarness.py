@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from logic.analyticDrag import find_elevation as analytic_elevation
+from logic.balisticLogicAirFriction import air_corrected, find_elevations, find_max_range_angle, degrees_to_mil
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'accuracy')
+
+# Euler steps to sweep, s; the solver default is 0.01
+DT_VALUES = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.04, 0.08)
+# Elevation error a setting may have on every case to be recommended
+TOLERANCE_MIL = 0.1
+# Tight Dormand-Prince root: the reference is good to about 1e-3 mil
+REFERENCE_XTOL = 1e-8
+
+# Cases per charge: share of the maximum range, height differences, meteo; both arcs each
+RANGE_FRACTIONS = (0.15, 0.4, 0.7, 0.95)
+HEIGHTS = (-200.0, 0.0, 200.0)
+METEO = ((15.0, 1013.25), (-20.0, 1040.0))
+
+
+def charge_cases(v0, k_base):
+    cases = []
+    for temperature, pressure in METEO:
+        v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+        for height_diff in HEIGHTS:
+            _, max_range = find_max_range_angle(v0_corrected, k, height_diff, method="dopri")
+            if max_range is None:
+                continue
+            for fraction in RANGE_FRACTIONS:
+                case = {"v0": v0, "distance": fraction * max_range, "height_diff": height_diff,
+                        "temperature": temperature, "pressure": pressure, "k_base": k_base}
+                reference = find_elevations(**case, xtol=REFERENCE_XTOL, method="dopri")
+                cases.append((case, reference))
+    return cases
+
+
+def settings():
+    """(label, solver) pairs; a solver takes a case and returns (low_angle, high_angle)"""
+    def euler(dt):
+        return lambda case: find_elevations(**case, dt=dt)
+
+    def analytic(case):
+        v0_corrected, k = air_corrected(case["v0"], case["temperature"], case["pressure"], case["k_base"])
+        return tuple(analytic_elevation(v0_corrected, k, case["distance"], case["height_diff"], high_arc)[0]
+                     for high_arc in (False, True))
+
+    result = [(f"euler dt={dt:g}", euler(dt)) for dt in DT_VALUES]
+    result.append(("dopri", lambda case: find_elevations(**case, method="dopri")))
+    result.append(("analytic", analytic))
+    return result
+
+
+def measure(solver, cases):
+    """Mean solve time (ms) and elevation errors (mil) of both arcs; a missed solution counts as inf"""
+    errors = []
+    elapsed = 0.0
+    for case, reference in cases:
+        start = time.perf_counter()
+        angles = solver(case)
+        elapsed += time.perf_counter() - start
+        for angle, expected in zip(angles, reference):
+            if expected is None:
+                continue
+            errors.append(abs(degrees_to_mil(angle - expected)) if angle is not None else np.inf)
+    errors = np.array(errors)
+    return {
+        "ms": elapsed / len(cases) * 1e3,
+        "p50_mil": float(np.median(errors)),
+        "max_mil": float(errors.max()),
+    }
+
+
+def recommend(rows, prefix=""):
+    """Cheapest setting (label starting with prefix) within TOLERANCE_MIL on every case, or None"""
+    within = [row for row in rows if row["max_mil"] <= TOLERANCE_MIL and row["setting"].startswith(prefix)]
+    return min(within, key=lambda row: row["ms"]) if within else None
+
+
+def plot(report, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    for name, rows in report.items():
+        euler = [row for row in rows if row["setting"].startswith("euler")]
+        plt.plot([row["ms"] for row in euler], [max(row["max_mil"], 1e-4) for row in euler], marker="o",
+                 linewidth=0.8, label=name)
+    plt.axhline(TOLERANCE_MIL, color="red", linestyle="--", label=f"{TOLERANCE_MIL} mil")
+    plt.xscale("log")
+    plt.yscale("log")
+    plt.xlabel("Solve time (ms)")
+    plt.ylabel("Max elevation error (mil)")
+    plt.title("Euler step sweep per charge")
+    plt.grid(True, which="both", alpha=0.3)
+    plt.legend(fontsize=6, ncol=2)
+    plt.savefig(path, dpi=120)
+    plt.close()
+
+
+def main():
+    with open(CONFIG_PATH, 'r') as file:
+        config = json.load(file)
+    # Optional system names on the command line limit the sweep
+    systems = sys.argv[1:]
+
+    report = {}
+    print(f"Settings within {TOLERANCE_MIL} mil on every case; speedup against the default Euler dt=0.01\n")
+    print(f"{'System / shell / charge':<40} {'err at 0.01':>11}  {'Euler':<16} {'recommended':<16} {'ms':>7} "
+          f"{'speedup':>8}")
+    for system in config.get("artillerySystems", []):
+        k_base = abs(system.get("k_base", 1.0))
+        # k_base around 1 never leaves the muzzle, Euler is unstable there
+        if k_base >= 1e-3 or (systems and system["name"] not in systems):
+            continue
+        for shell in system.get("compatibleShells", []):
+            for charge_name, v0 in shell.get("charges", {}).items():
+                name = f"{system['name']} / {shell['name']} / {charge_name}"
+                cases = charge_cases(v0, k_base)
+                rows = []
+                for label, solver in settings():
+                    row = measure(solver, cases)
+                    row["setting"] = label
+                    rows.append(row)
+                report[name] = rows
+
+                current = next(row for row in rows if row["setting"] == "euler dt=0.01")
+                euler = recommend(rows, "euler")
+                best = recommend(rows)
+                line = f"{name:<40} {current['max_mil']:>11.3f}  {euler['setting'] if euler else 'none':<16}"
+                if best is not None:
+                    line += f" {best['setting']:<16} {best['ms']:>7.2f} {current['ms'] / best['ms']:>7.1f}x"
+                print(line)
+
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    with open(os.path.join(REPORT_DIR, "report.json"), 'w') as file:
+        json.dump({"tolerance_mil": TOLERANCE_MIL, "charges": report}, file, indent=4)
+    plot(report, os.path.join(REPORT_DIR, "curves.png"))
+    print(f"\nError-versus-runtime curves and the full table: {REPORT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from logic.balisticLogicAirFriction import air_corrected, impact_point, integrate_dopri
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+
+# Representative shots per charge: (elevation in degrees, height difference in m)
+SHOTS = [(15.0, 0.0), (45.0, 0.0), (70.0, -100.0)]
+EULER_DT = 0.01
+REPEATS = 3
+
+
+def best_time(func, *args, **kwargs):
+    best = float('inf')
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def benchmark_charge(v0, k):
+    """Sum of steps, time and worst range error over SHOTS for both integrators"""
+    row = {"euler_steps": 0, "euler_time": 0.0, "euler_error": 0.0,
+           "dopri_steps": 0, "dopri_time": 0.0, "dopri_error": 0.0}
+    for angle, height_diff in SHOTS:
+        reference, _, _ = integrate_dopri(v0, angle, k, height_diff, rtol=1e-12, atol=1e-10)
+        if reference is None:
+            continue
+
+        (x_euler, t_euler), euler_time = best_time(impact_point, v0, angle, k, height_diff, EULER_DT)
+        (x_dopri, _, dopri_steps), dopri_time = best_time(integrate_dopri, v0, angle, k, height_diff)
+
+        if x_euler is None:
+            row["euler_error"] = float('inf')
+        else:
+            row["euler_steps"] += int(round(t_euler / EULER_DT))
+            row["euler_error"] = max(row["euler_error"], abs(x_euler - reference))
+        row["euler_time"] += euler_time
+
+        if x_dopri is None:
+            row["dopri_error"] = float('inf')
+        else:
+            row["dopri_error"] = max(row["dopri_error"], abs(x_dopri - reference))
+        row["dopri_steps"] += dopri_steps
+        row["dopri_time"] += dopri_time
+    return row
+
+
+def main():
+    with open(CONFIG_PATH, 'r') as file:
+        config = json.load(file)
+
+    print(f"{'System / shell / charge':<40} {'Euler steps':>11} {'DP steps':>9} {'Euler ms':>9} {'DP ms':>7} "
+          f"{'Speedup':>8} {'Euler err, m':>13} {'DP err, m':>10}")
+
+    total_euler = total_dopri = 0.0
+    total_euler_steps = total_dopri_steps = 0
+    for system in config.get("artillerySystems", []):
+        for shell in system.get("compatibleShells", []):
+            for charge_name, v0 in shell.get("charges", {}).items():
+                v0_corrected, k = air_corrected(v0, 15.0, 1013.25, abs(system.get("k_base", 1.0)))
+                row = benchmark_charge(v0_corrected, k)
+                speedup = row["euler_time"] / row["dopri_time"] if row["dopri_time"] else float('nan')
+                name = f"{system['name']} / {shell['name']} / {charge_name}"
+                line = (f"{name:<40} {row['euler_steps']:>11} {row['dopri_steps']:>9} "
+                        f"{row['euler_time'] * 1e3:>9.2f} {row['dopri_time'] * 1e3:>7.2f} {speedup:>8.1f} "
+                        f"{row['euler_error']:>13.3f} {row['dopri_error']:>10.5f}")
+
+                # Explicit Euler diverges when k * v0 * dt is of order one
+                if k * v0_corrected * EULER_DT > 1.0:
+                    print(line + "  (Euler unstable, not in totals)")
+                    continue
+                print(line)
+                total_euler += row["euler_time"]
+                total_dopri += row["dopri_time"]
+                total_euler_steps += row["euler_steps"]
+                total_dopri_steps += row["dopri_steps"]
+
+    print(f"\nTotal: Euler {total_euler_steps} steps in {total_euler * 1e3:.2f} ms, "
+          f"Dormand-Prince {total_dopri_steps} steps in {total_dopri * 1e3:.2f} ms, "
+          f"{total_euler_steps / max(total_dopri_steps, 1):.0f}x fewer steps, "
+          f"speedup {total_euler / total_dopri:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
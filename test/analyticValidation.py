@@ -0,0 +1,99 @@
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from logic.analyticDrag import find_elevation
+from logic.balisticLogicAirFriction import air_corrected, find_elevations, find_max_range_angle, degrees_to_mil
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+
+CASES = 400
+TOLERANCE_MIL = 0.05
+# Accuracy of the Dormand-Prince reference itself
+REFERENCE_MIL = 1e-3
+
+
+def random_case(rng, charges):
+    v0, k_base = rng.choice(charges)
+    temperature = rng.uniform(-20.0, 40.0)
+    pressure = rng.uniform(950.0, 1050.0)
+    height_diff = rng.uniform(-300.0, 300.0)
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+    _, max_range = find_max_range_angle(v0_corrected, k, height_diff, method="dopri")
+    if max_range is None:
+        return None
+    return {
+        "v0": v0,
+        "distance": rng.uniform(0.05, 0.98) * max_range,
+        "height_diff": height_diff,
+        "temperature": temperature,
+        "pressure": pressure,
+        "k_base": k_base,
+    }
+
+
+def main():
+    with open(CONFIG_PATH, 'r') as file:
+        config = json.load(file)
+
+    # Only realistic drag constants: k_base around 1 never leaves the muzzle
+    charges = sorted({(v0, abs(system.get("k_base", 1.0)))
+                      for system in config.get("artillerySystems", []) if abs(system.get("k_base", 1.0)) < 1e-3
+                      for shell in system.get("compatibleShells", [])
+                      for v0 in shell.get("charges", {}).values()})
+
+    rng = random.Random(1)
+    solved = accepted = bound_violations = tolerance_violations = 0
+    worst_ratio = 0.0
+    analytic_time = euler_time = 0.0
+    euler_solves = 0
+    euler_worst = 0.0
+    while solved < CASES:
+        case = random_case(rng, charges)
+        if case is None:
+            continue
+        high_arc = rng.random() < 0.5
+        v0_corrected, k = air_corrected(case["v0"], case["temperature"], case["pressure"], case["k_base"])
+
+        start = time.perf_counter()
+        angle, error = find_elevation(v0_corrected, k, case["distance"], case["height_diff"], high_arc)
+        analytic_time += time.perf_counter() - start
+
+        reference = find_elevations(**case, low=not high_arc, high=high_arc, xtol=1e-8, method="dopri")[high_arc]
+        if angle is None or reference is None:
+            continue
+        solved += 1
+
+        actual = abs(degrees_to_mil(angle - reference))
+        worst_ratio = max(worst_ratio, actual / (error + REFERENCE_MIL))
+        if actual > error + REFERENCE_MIL:
+            bound_violations += 1
+            print(f"[FAIL] error {actual:.4f} mil above estimate {error:.4f} mil, high_arc={high_arc} {case}")
+        if error <= TOLERANCE_MIL:
+            accepted += 1
+            if actual > TOLERANCE_MIL:
+                tolerance_violations += 1
+            if euler_solves < 50:
+                start = time.perf_counter()
+                euler = find_elevations(**case, low=not high_arc, high=high_arc)[high_arc]
+                euler_time += time.perf_counter() - start
+                euler_solves += 1
+                if euler is not None:
+                    euler_worst = max(euler_worst, abs(degrees_to_mil(euler - reference)))
+
+    print(f"{solved} solved cases, {accepted} within {TOLERANCE_MIL} mil "
+          f"({100.0 * accepted / solved:.0f}% answered without integration)")
+    print(f"Worst actual / (estimated + reference) error: {worst_ratio:.2f}, {bound_violations} estimate violations, "
+          f"{tolerance_violations} accepted solutions outside the tolerance")
+    print(f"Analytic solve {analytic_time / CASES * 1e6:.0f} us, "
+          f"Euler solve {euler_time / max(euler_solves, 1) * 1e3:.1f} ms "
+          f"(worst Euler error on the accepted cases {euler_worst:.3f} mil)")
+    return 1 if bound_violations or tolerance_violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
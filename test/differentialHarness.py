@@ -0,0 +1,337 @@
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from logic.balisticLogicAirFriction import (air_corrected, calculate_flight_time, degrees_to_mil, find_elevations,
+                                            find_max_range, impact_point, impact_sensitivities, set_backend,
+                                            simulate_batch, simulate_trajectory, simulate_trajectory_numba)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+
+CASES = 200
+SEED = 1
+# Euler steps the cases are drawn from, s
+DT_VALUES = (0.005, 0.01, 0.02)
+# The test/ prototypes trace into a fixed 10000-point buffer without bounds checks
+PROTOTYPE_CAPACITY = 10000
+# Fine Euler step the adaptive Dormand-Prince integrator is compared against
+DOPRI_REFERENCE_DT = 1e-4
+
+G = 9.81
+# Returned by a backend that cannot take the case
+SKIP = object()
+
+
+def reference_impact(v0, angle, k, height_diff, dt):
+    """
+    Plain-Python Euler to the target height on the descending branch, the scheme every Euler backend implements.
+    Returns (range, flight_time) or None if the shot never comes down to height_diff.
+    """
+    angle_rad = math.radians(angle)
+    vx = v0 * math.cos(angle_rad)
+    vz = v0 * math.sin(angle_rad)
+    x = z = t = 0.0
+    z_min = min(0.0, height_diff)
+    while z >= z_min:
+        prev_z = z
+        v = math.sqrt(vx * vx + vz * vz)
+        vx += -k * vx * v * dt
+        vz += (-G - k * vz * v) * dt
+        x += vx * dt
+        z += vz * dt
+        t += dt
+        # Crossing from above only: a shot whose apex stays below the target misses
+        if z <= height_diff < prev_z and vz < 0:
+            fraction = (height_diff - z) / (-vz * dt)
+            return x - fraction * vx * dt, t - fraction * dt
+    return None
+
+
+def random_case(rng, charges):
+    """A meteo-corrected shot plus a target near its impact point, so the box-stop paths hit and miss alike"""
+    system, v0 = rng.choice(charges)
+    temperature = rng.uniform(-20.0, 40.0)
+    pressure = rng.uniform(950.0, 1050.0)
+    k_base = abs(system.get("k_base", 1.0))
+    v0_corrected, k = air_corrected(v0, temperature, pressure, k_base)
+    angle = rng.uniform(3.0, 80.0)
+    height_diff = rng.uniform(-300.0, 300.0)
+    dt = rng.choice(DT_VALUES)
+
+    impact = reference_impact(v0_corrected, angle, k, height_diff, dt)
+    if impact is None:
+        target_distance, target_height = rng.uniform(200.0, 5000.0), height_diff
+    else:
+        target_distance = impact[0] + rng.choice((0.0, rng.uniform(-30.0, 30.0)))
+        target_height = height_diff + rng.choice((0.0, rng.uniform(-15.0, 15.0)))
+    return {
+        "v0": v0, "temperature": temperature, "pressure": pressure, "k_base": k_base,
+        "v0_corrected": v0_corrected, "k": k, "angle": angle, "height_diff": height_diff, "dt": dt,
+        "target_distance": target_distance, "target_height": target_height, "impact": impact,
+    }
+
+
+# --- Trajectories: the box-stop tracers against logic.simulate_trajectory -------------------------------------
+
+def trajectory_args(case):
+    return case["v0_corrected"], case["angle"], case["k"], case["target_distance"], case["target_height"]
+
+
+def trajectory_reference(case):
+    points, hit = simulate_trajectory(*trajectory_args(case), dt=case["dt"])
+    return points, hit
+
+
+def trajectory_prototype(module_name, function_name):
+    def run(case):
+        reference, _ = trajectory_reference(case)
+        if len(reference) >= PROTOTYPE_CAPACITY:
+            return SKIP
+        module = __import__(module_name)
+        return getattr(module, function_name)(*trajectory_args(case), case["dt"])
+    return run
+
+
+def compare_trajectory(result, reference):
+    """(reachability agrees, {field: divergence})"""
+    points, hit = result
+    expected, expected_hit = reference
+    if hit != expected_hit or len(points) != len(expected):
+        return False, {"steps": abs(len(points) - len(expected))}
+    if not len(points):
+        return True, {"point_m": 0.0}
+    return True, {"point_m": float(np.abs(np.asarray(points) - expected).max())}
+
+
+# --- Impact points: range and flight time against reference_impact ----------------------------------------------
+
+def impact_args(case):
+    return case["v0_corrected"], case["angle"], case["k"], case["height_diff"]
+
+
+def impact_reference(case):
+    return case["impact"]
+
+
+def find_max_range_impact(case):
+    distance = find_max_range(*impact_args(case), dt=case["dt"])
+    if distance is None:
+        return None
+    return distance, calculate_flight_time(*impact_args(case), dt=case["dt"])
+
+
+def impact_point_euler(case):
+    x, t = impact_point(*impact_args(case), dt=case["dt"])
+    return None if x is None else (x, t)
+
+
+def sensitivities_impact(case):
+    result = impact_sensitivities(*impact_args(case), dt=case["dt"])
+    return None if result is None else (result["range"], result["flight_time"])
+
+
+def batch_impact(case):
+    ranges, times, hit = simulate_batch(*impact_args(case), dt=case["dt"])
+    return (float(ranges), float(times)) if hit else None
+
+
+def dopri_impact(case):
+    x, t = impact_point(*impact_args(case), method="dopri")
+    return None if x is None else (x, t)
+
+
+def dopri_reference(case):
+    x, t = impact_point(*impact_args(case), dt=DOPRI_REFERENCE_DT)
+    return None if x is None else (x, t)
+
+
+def compare_impact(result, reference):
+    if (result is None) != (reference is None):
+        return False, {}
+    if result is None:
+        return True, {"range_m": 0.0, "time_s": 0.0}
+    return True, {"range_m": abs(result[0] - reference[0]), "time_s": abs(result[1] - reference[1])}
+
+
+# --- Elevations: every angle solver against serial Brent on the same Euler model ---------------------------------
+
+def elevation_args(case):
+    """Target at the reference impact point; only cases with one are used"""
+    return {"v0": case["v0"], "distance": case["impact"][0], "height_diff": case["height_diff"],
+            "temperature": case["temperature"], "pressure": case["pressure"], "k_base": case["k_base"]}
+
+
+def elevation_reference(case, arc):
+    return find_elevations(**elevation_args(case), high=arc == "high", low=arc == "low")[arc == "high"]
+
+
+def parallel_elevation(arc):
+    def run(case):
+        set_backend("parallel")
+        try:
+            return elevation_reference(case, arc)
+        finally:
+            set_backend("serial")
+    return run
+
+
+def prototype_elevation(module_name, arc):
+    # test/ prototypes: 0.1° scans of the box-stop tracer at dt=0.01, printing their own timing
+    def run(case):
+        module = __import__(module_name)
+        solver = module.find_optimal_angle if arc == "low" else module.find_high_trajectory
+        with contextlib.redirect_stdout(io.StringIO()):
+            angle = solver(**elevation_args(case))
+        return None if angle is None else float(angle)
+    return run
+
+
+def compare_elevation(result, reference):
+    if (result is None) != (reference is None):
+        return False, {}
+    if result is None:
+        return True, {"elevation_mil": 0.0}
+    return True, {"elevation_mil": abs(degrees_to_mil(result - reference))}
+
+
+def elevation_case(case, arc):
+    # Euler at the solver default step; the high arc only exists above the maximum-range angle
+    return case["dt"] == 0.01 and case["impact"] is not None and (arc == "low" or case["angle"] > 45.0)
+
+
+class Backend(namedtuple("Backend", "run reference compare tolerances accepts max_cases strict")):
+    """
+    run(case) and reference(case) feed compare(result, expected) -> (reachability agrees, {field: divergence});
+    tolerances {field: limit}; accepts(case) filters the cases, max_cases caps slow paths.
+    strict=False only reports: those paths are expected to disagree and do not fail the run.
+    """
+
+
+def backend(run, reference, compare, tolerances, accepts=None, max_cases=None, strict=True):
+    return Backend(run, reference, compare, tolerances, accepts, max_cases, strict)
+
+
+def low_case(case):
+    return elevation_case(case, "low")
+
+
+def high_case(case):
+    return elevation_case(case, "high")
+
+
+def low_reference(case):
+    return elevation_reference(case, "low")
+
+
+def high_reference(case):
+    return elevation_reference(case, "high")
+
+
+EULER_IMPACT = {"range_m": 1e-6, "time_s": 1e-9}
+# Scans in 0.1° (1.8 mil) steps accepting any trajectory point within 10 m of the target, rising branch included
+SCAN_ELEVATION = {"elevation_mil": 4.0}
+
+BACKENDS = {
+    "simulate_trajectory_numba": backend(
+        lambda case: simulate_trajectory_numba(*trajectory_args(case), dt=case["dt"]),
+        trajectory_reference, compare_trajectory, {"point_m": 1e-6}),
+    "test.simulate_trajectory": backend(
+        trajectory_prototype("balisticTestWithAirFriction", "simulate_trajectory"),
+        trajectory_reference, compare_trajectory, {"point_m": 1e-6}),
+    "test.simulate_trajectory_numba": backend(
+        trajectory_prototype("balisticTestWithAirFriction", "simulate_trajectory_numba"),
+        trajectory_reference, compare_trajectory, {"point_m": 1e-6}),
+    "test2.simulate_trajectory_numba": backend(
+        trajectory_prototype("balisticTest2WithAirFriction", "simulate_trajectory_numba"),
+        trajectory_reference, compare_trajectory, {"point_m": 1e-6}),
+    "find_max_range": backend(find_max_range_impact, impact_reference, compare_impact, EULER_IMPACT),
+    "impact_point": backend(impact_point_euler, impact_reference, compare_impact, EULER_IMPACT),
+    "impact_sensitivities": backend(sensitivities_impact, impact_reference, compare_impact, EULER_IMPACT),
+    "simulate_batch": backend(batch_impact, impact_reference, compare_impact, EULER_IMPACT),
+    # Different integrator: agreement is bounded by the Euler error at DOPRI_REFERENCE_DT
+    "dopri": backend(dopri_impact, dopri_reference, compare_impact, {"range_m": 1.0, "time_s": 1e-2}),
+    "parallel.low": backend(parallel_elevation("low"), low_reference, compare_elevation,
+                            {"elevation_mil": 0.01}, low_case),
+    "parallel.high": backend(parallel_elevation("high"), high_reference, compare_elevation,
+                             {"elevation_mil": 0.01}, high_case),
+    "test.find_optimal_angle": backend(prototype_elevation("balisticTestWithAirFriction", "low"), low_reference,
+                                       compare_elevation, SCAN_ELEVATION, low_case, 10, strict=False),
+    "test.find_high_trajectory": backend(prototype_elevation("balisticTestWithAirFriction", "high"),
+                                         high_reference, compare_elevation, SCAN_ELEVATION, high_case, 20,
+                                         strict=False),
+    "test2.find_optimal_angle": backend(prototype_elevation("balisticTest2WithAirFriction", "low"), low_reference,
+                                        compare_elevation, SCAN_ELEVATION, low_case, strict=False),
+    "test2.find_high_trajectory": backend(prototype_elevation("balisticTest2WithAirFriction", "high"),
+                                          high_reference, compare_elevation, SCAN_ELEVATION, high_case,
+                                          strict=False),
+}
+
+
+def run_backend(name, cases):
+    """Worst divergence per field, cases run and cases outside tolerance; prints them for strict backends"""
+    path = BACKENDS[name]
+    cases = [case for case in cases if path.accepts is None or path.accepts(case)][:path.max_cases]
+    worst = dict.fromkeys(path.tolerances, 0.0)
+    ran = outside = 0
+    for case in cases:
+        result = path.run(case)
+        if result is SKIP:
+            continue
+        ran += 1
+        agrees, divergence = path.compare(result, path.reference(case))
+        if not agrees:
+            outside += 1
+            if path.strict:
+                print(f"[FAIL] {name}: reachability differs {divergence} {case}")
+            continue
+        exceeded = [field for field, value in divergence.items() if value > path.tolerances[field]]
+        for field, value in divergence.items():
+            worst[field] = max(worst[field], value)
+        if exceeded:
+            outside += 1
+            if path.strict:
+                print(f"[FAIL] {name}: {', '.join(f'{f} {divergence[f]:.3g}' for f in exceeded)} {case}")
+    return worst, ran, outside
+
+
+def main():
+    with open(CONFIG_PATH, 'r') as file:
+        config = json.load(file)
+    selected = [name for name in sys.argv[1:] if name in BACKENDS] or list(BACKENDS)
+
+    # Only realistic drag constants: k_base around 1 never leaves the muzzle
+    charges = [(system, v0)
+               for system in config.get("artillerySystems", []) if abs(system.get("k_base", 1.0)) < 1e-3
+               for shell in system.get("compatibleShells", [])
+               for v0 in shell.get("charges", {}).values()]
+    rng = random.Random(SEED)
+    cases = [random_case(rng, charges) for _ in range(CASES)]
+
+    rows = [(name, *run_backend(name, cases)) for name in selected]
+
+    print(f"\n{CASES} random cases (seed {SEED}); worst divergence over the cases that agree on reachability\n")
+    print(f"{'Backend':<32} {'Cases':>6} {'Outside':>8}  Worst divergence (tolerance)")
+    failures = 0
+    for name, worst, ran, outside in rows:
+        path = BACKENDS[name]
+        text = ", ".join(f"{field} {value:.3g} ({path.tolerances[field]:g})" for field, value in worst.items())
+        print(f"{name:<32} {ran:>6} {outside:>8}  {text}" + ("" if path.strict else "  [report only]"))
+        if path.strict:
+            failures += outside
+
+    print(f"\n{failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from logic.balisticLogicAirFriction import find_elevations, set_backend, degrees_to_mil
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+
+CASES = 200
+TOLERANCE_MIL = 0.01
+
+
+def random_case(rng, charges):
+    system, v0 = rng.choice(charges)
+    k_base = abs(system.get("k_base", 1.0))
+    return {
+        "v0": v0,
+        "distance": rng.uniform(200.0, 15000.0),
+        "height_diff": rng.uniform(-300.0, 300.0),
+        "temperature": rng.uniform(-20.0, 40.0),
+        "pressure": rng.uniform(950.0, 1050.0),
+        "k_base": k_base,
+    }
+
+
+def solve(backend, case):
+    set_backend(backend)
+    try:
+        return find_elevations(**case)
+    finally:
+        set_backend("serial")
+
+
+def main():
+    with open(CONFIG_PATH, 'r') as file:
+        config = json.load(file)
+
+    # Only realistic drag constants: k_base around 1 never leaves the muzzle
+    charges = [(system, v0)
+               for system in config.get("artillerySystems", []) if abs(system.get("k_base", 1.0)) < 1e-3
+               for shell in system.get("compatibleShells", [])
+               for v0 in shell.get("charges", {}).values()]
+
+    rng = random.Random(1)
+    failures = 0
+    worst = 0.0
+    for _ in range(CASES):
+        case = random_case(rng, charges)
+        serial = solve("serial", case)
+        parallel = solve("parallel", case)
+        for arc, a, b in zip(("low", "high"), serial, parallel):
+            if (a is None) != (b is None):
+                failures += 1
+                print(f"[FAIL] {arc} arc reachability differs: serial={a} parallel={b} {case}")
+                continue
+            if a is None:
+                continue
+            diff = abs(degrees_to_mil(a) - degrees_to_mil(b))
+            worst = max(worst, diff)
+            if diff > TOLERANCE_MIL:
+                failures += 1
+                print(f"[FAIL] {arc} arc differs by {diff:.4f} mil {case}")
+
+    print(f"{CASES} cases, worst elevation difference {worst:.5f} mil, {failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
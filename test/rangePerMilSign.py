@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from logic import firingTables, surrogateGrid
+from logic.balisticLogicAirFriction import air_corrected, find_max_range_angle, solve_shot
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+
+TEMPERATURE = 15.0
+PRESSURE = 1013.25
+HEIGHTS = (0.0, 100.0)
+# Fractions of the maximum range, away from its peak where ΔR per mil passes through zero
+RANGE_FRACTIONS = (0.3, 0.6, 0.85)
+
+
+def main():
+    """ΔR per mil from the firing table, the surrogate and solve_shot: same sign on both arcs"""
+    with open(CONFIG_PATH, 'r') as file:
+        config = json.load(file)
+
+    failures = 0
+    checked = 0
+    for system in config.get("artillerySystems", []):
+        # Only realistic drag constants: k_base around 1 never leaves the muzzle
+        k_base = abs(system.get("k_base", 1.0))
+        if k_base >= 1e-3:
+            continue
+        shell = system["compatibleShells"][0]
+        for charge_name, v0 in shell["charges"].items():
+            table = firingTables.get_table(system, shell, charge_name, TEMPERATURE, PRESSURE, build=True)
+            surrogate = surrogateGrid.get_surrogate(system, shell, charge_name, build=True)
+            v0_corrected, k = air_corrected(v0, TEMPERATURE, PRESSURE, k_base)
+            for height in HEIGHTS:
+                _, max_range = find_max_range_angle(v0_corrected, k, height)
+                if max_range is None:
+                    continue
+                for fraction in RANGE_FRACTIONS:
+                    distance = fraction * max_range
+                    for high_arc in (False, True):
+                        reference = solve_shot(v0, distance, height, TEMPERATURE, PRESSURE, k_base, high_arc)
+                        if reference is None:
+                            continue
+                        values = {"solve_shot": reference["range_per_mil"]}
+                        table_solution = firingTables.lookup(table, distance, height, high_arc)
+                        if table_solution is not None:
+                            values["table"] = table_solution["range_per_mil"]
+                        surrogate_solution = surrogateGrid.solve(surrogate, v0, distance, height, TEMPERATURE,
+                                                                 PRESSURE, k_base, high_arc)
+                        if surrogate_solution is not None:
+                            values["surrogate"] = surrogate_solution["range_per_mil"]
+
+                        checked += 1
+                        expected = -1 if high_arc else 1
+                        if any(value is None or value * expected <= 0 for value in values.values()):
+                            failures += 1
+                            arc = "high" if high_arc else "low"
+                            print(f"[FAIL] {system['name']} / {charge_name} {arc} arc, {distance:.0f} m, "
+                                  f"height {height:.0f} m: {values}")
+
+    print(f"{checked} cases, {failures} sign mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
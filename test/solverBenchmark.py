@@ -0,0 +1,180 @@
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from logic.analyticDrag import find_elevation as analytic_elevation
+from logic.balisticLogic import calculate_elevation_with_height
+from logic.balisticLogicAirFriction import air_corrected, find_elevations, set_backend
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'solver_baseline.json')
+
+# Targets per charge: distance as a share of the vacuum maximum range v0²/g, height differences and meteo
+RANGE_FRACTIONS = (0.1, 0.25, 0.45)
+HEIGHTS = (-100.0, 0.0, 100.0)
+METEO = ((15.0, 1013.25), (-10.0, 980.0), (35.0, 1030.0))
+
+# Each call is timed this many times and the best time is kept
+REPEATS = 3
+# Slower than this share against the baseline (p50 latency or solves per second) is a regression
+REGRESSION = 0.30
+
+
+def vacuum(case):
+    return calculate_elevation_with_height(case["distance"], case["v0"], 0.0, case["height_diff"])
+
+
+def numba_drag(case):
+    return find_elevations(**case, high=False)[0]
+
+
+def parallel_drag(case):
+    set_backend("parallel")
+    try:
+        return find_elevations(**case, high=False)[0]
+    finally:
+        set_backend("serial")
+
+
+def dopri_drag(case):
+    return find_elevations(**case, high=False, method="dopri")[0]
+
+
+def analytic_drag(case):
+    v0_corrected, k = air_corrected(case["v0"], case["temperature"], case["pressure"], case["k_base"])
+    return analytic_elevation(v0_corrected, k, case["distance"], case["height_diff"])[0]
+
+
+def python_drag(case):
+    # The original pure-Python solver: 0.1° scan of simulate_trajectory for the 10 m hit box
+    from balisticTestWithAirFriction import find_optimal_angle
+    with contextlib.redirect_stdout(io.StringIO()):
+        return find_optimal_angle(**case)
+
+
+def prange_drag(case):
+    # test/ variant: 900 angles traced in parallel with numba.prange
+    from balisticTest2WithAirFriction import find_optimal_angles
+    v0_corrected, k = air_corrected(case["v0"], case["temperature"], case["pressure"], case["k_base"])
+    return find_optimal_angles(v0_corrected, k, case["distance"], case["height_diff"])
+
+
+# name -> (solver, max calls); slow paths run on an evenly spaced subset of the grid
+PATHS = {
+    "vacuum": (vacuum, None),
+    "numba": (numba_drag, None),
+    "parallel": (parallel_drag, 400),
+    "analytic": (analytic_drag, None),
+    "dopri": (dopri_drag, 100),
+    "prange": (prange_drag, 60),
+    "python": (python_drag, 10),
+}
+
+
+def build_grid(config):
+    cases = []
+    for system in config.get("artillerySystems", []):
+        k_base = abs(system.get("k_base", 1.0))
+        for shell in system.get("compatibleShells", []):
+            for v0 in shell.get("charges", {}).values():
+                for fraction in RANGE_FRACTIONS:
+                    for height_diff in HEIGHTS:
+                        for temperature, pressure in METEO:
+                            cases.append({
+                                "v0": v0,
+                                "distance": fraction * v0 * v0 / 9.81,
+                                "height_diff": height_diff,
+                                "temperature": temperature,
+                                "pressure": pressure,
+                                "k_base": k_base,
+                            })
+    return cases
+
+
+def run_path(solver, cases, max_calls):
+    """Best-of-REPEATS latency of every call (s); a warm-up call keeps JIT compilation out"""
+    if max_calls is not None and len(cases) > max_calls:
+        stride = math.ceil(len(cases) / max_calls)
+        cases = cases[::stride]
+    solver(cases[0])
+
+    latencies = []
+    for case in cases:
+        best = float('inf')
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            solver(case)
+            best = min(best, time.perf_counter() - start)
+        latencies.append(best)
+    latencies = np.array(latencies)
+    return {
+        "calls": len(latencies),
+        "p50_ms": float(np.percentile(latencies, 50) * 1e3),
+        "p90_ms": float(np.percentile(latencies, 90) * 1e3),
+        "p99_ms": float(np.percentile(latencies, 99) * 1e3),
+        "solves_per_s": float(len(latencies) / latencies.sum()),
+    }
+
+
+def compare(result, baseline):
+    """Relative p50 change and whether it is a regression; None without a baseline entry"""
+    if baseline is None:
+        return None, False
+    change = result["p50_ms"] / baseline["p50_ms"] - 1.0
+    slower = (change > REGRESSION
+              or result["solves_per_s"] < baseline["solves_per_s"] * (1.0 - REGRESSION))
+    return change, slower
+
+
+def main():
+    with open(CONFIG_PATH, 'r') as file:
+        config = json.load(file)
+    update = "--update" in sys.argv
+    selected = [name for name in sys.argv[1:] if name in PATHS] or list(PATHS)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, 'r') as file:
+            baseline = json.load(file).get("paths", {})
+
+    cases = build_grid(config)
+    print(f"{len(cases)} targets over the config grid\n")
+    print(f"{'Path':<10} {'Calls':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'Solves/s':>10} {'vs base':>9}")
+
+    results = {}
+    regressions = 0
+    for name in selected:
+        solver, max_calls = PATHS[name]
+        result = run_path(solver, cases, max_calls)
+        results[name] = result
+        change, slower = compare(result, baseline.get(name))
+        regressions += slower
+        change_text = f"{change * 100:+.0f}%" if change is not None else "-"
+        print(f"{name:<10} {result['calls']:>6} {result['p50_ms']:>9.3f} {result['p90_ms']:>9.3f} "
+              f"{result['p99_ms']:>9.3f} {result['solves_per_s']:>10.1f} {change_text:>9}"
+              + ("  REGRESSION" if slower else ""))
+
+    if update:
+        baseline.update(results)
+        with open(BASELINE_PATH, 'w') as file:
+            json.dump({"machine": platform.platform(), "python": platform.python_version(), "paths": baseline},
+                      file, indent=4)
+        print(f"\nBaseline written to {BASELINE_PATH}")
+        return 0
+
+    print(f"\n{regressions} regressions (more than {REGRESSION * 100:.0f}% slower than the baseline)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+REPEATS = 3
+
+# Same start-up sequence as ui/runfront.py; prints the wall clock once the window is drawn
+FIRST_WINDOW = """
+import sys, time
+sys.path[:0] = [{root!r}, {ui!r}]
+from PyQt5 import QtWidgets
+from logic.kernelWarmup import start_warm_up
+from ui.mainwindow import MainWindow
+
+start_warm_up()
+app = QtWidgets.QApplication(sys.argv)
+window = MainWindow()
+window.show()
+app.processEvents()
+print(time.time())
+""".format(root=ROOT, ui=os.path.join(ROOT, "ui"))
+
+IMPORT_MAIN = """
+import sys
+sys.path[:0] = [{root!r}, {ui!r}]
+import ui.mainwindow
+print(",".join(sorted(sys.modules)))
+""".format(root=ROOT, ui=os.path.join(ROOT, "ui"))
+
+
+def child_env():
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def time_to_first_window():
+    """Seconds from process start to the first drawn main window, best of REPEATS"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.time()
+        output = subprocess.run([sys.executable, "-c", FIRST_WINDOW], capture_output=True, text=True,
+                                env=child_env(), cwd=ROOT, check=True).stdout
+        shown = float(output.strip().splitlines()[-1])
+        best = min(best, shown - start)
+    return best
+
+
+def import_costs():
+    """Cumulative import time (ms) of every module and the set of modules loaded by ui.mainwindow"""
+    costs = {}
+    loaded = set()
+    for _ in range(REPEATS):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_MAIN], capture_output=True,
+                                text=True, env=child_env(), cwd=ROOT, check=True)
+        loaded = set(result.stdout.strip().splitlines()[-1].split(","))
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            ms = int(cumulative) / 1000.0
+            name = name.strip()
+            costs[name] = min(costs.get(name, ms), ms)
+    return costs, loaded
+
+
+def main():
+    with open(BUDGET_PATH, 'r') as file:
+        budget = json.load(file)
+
+    failures = 0
+    costs, loaded = import_costs()
+
+    print(f"{'Module':<36} {'Import, ms':>10} {'Budget, ms':>10}")
+    for name, limit in budget["import_ms"].items():
+        ms = costs.get(name)
+        if ms is None:
+            print(f"{name:<36} {'-':>10} {limit:>10}")
+            continue
+        mark = ""
+        if ms > limit:
+            failures += 1
+            mark = "  OVER BUDGET"
+        print(f"{name:<36} {ms:>10.1f} {limit:>10}{mark}")
+
+    for name in budget["deferred"]:
+        if name in loaded:
+            failures += 1
+            print(f"[FAIL] {name} is imported at startup ({costs.get(name, 0.0):.1f} ms)")
+
+    first_window = time_to_first_window()
+    mark = ""
+    if first_window > budget["first_window_s"]:
+        failures += 1
+        mark = "  OVER BUDGET"
+    print(f"\nTime to first window: {first_window:.3f} s (budget {budget['first_window_s']:.3f} s){mark}")
+
+    print(f"{failures} budget violations")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,6 @@ from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton,
     QFileDialog, QLabel, QMessageBox, QProgressBar
 )
-from wand.image import Image
 
 
 def create_folders():
@@ -66,6 +65,8 @@ class SVGConverter(QWidget):
         self.progress.setValue(25)
 
         try:
+            # Wand needs ImageMagick: loaded only when a file is converted
+            from wand.image import Image
             with Image(filename=self.svg_path) as img:
                 img.format = 'png'
                 output_file = os.path.join(self.output_dir, os.path.splitext(os.path.basename(self.svg_path))[0] + ".png")
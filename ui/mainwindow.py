@@ -1,20 +1,26 @@
 import sys
 import json
+import math
 import os
 from PyQt5.QtWidgets import (QMainWindow, QComboBox, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget, QHBoxLayout,
-                             QTextEdit, QCheckBox, QMessageBox, QInputDialog)
+                             QTextEdit, QCheckBox, QMessageBox, QInputDialog, QShortcut)
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import QTimer
 from logic.distanceLogic import calculate_distance, calculate_azimuth, calculate_mils
 from logic.balisticLogic import calculate_elevation_with_height, calculate_high_elevation, range_difference_for_1mil, \
-    calculate_flight_time, mil_to_rad
-from mapwindow import MapWindow
+    calculate_flight_time, calculate_range, mil_to_rad
 from ui.MeteoSettings import SettingsWindow
-from ui.SVGSettingsWindow import SVGConverter
-from logic.balisticLogicAirFriction import find_optimal_angle, degrees_to_mil, find_high_trajectory, \
-    range_difference_for_1mil_airfriction, calculate_flight_time as calculate_flight_time_air, mil_to_degrees
-from solutionwindow import SavedSolutionsWindow
+from logic.balisticLogicAirFriction import air_corrected, set_backend, set_num_threads
+from logic import batchSolver, firingTables, metrics, rangeEnvelope, solutionCache, solutionStore, surrogateGrid, \
+    terrainClearance
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+# How often the map rings are refreshed while envelopes are built in the background, ms
+RING_POLL_MS = 1000
+# Ranked alternatives listed under an automatically selected solution
+AUTO_CHARGE_LISTED = 5
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -25,18 +31,19 @@ class MainWindow(QMainWindow):
 
         self.config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json')
         self.data = self.load_json(self.config_path)
+        self.apply_solver_settings()
+
+        # Timings and counters go here on exit while recording is on (Ctrl+M toggles it)
+        self.metrics_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'metrics')
+        self.metrics_shortcut = QShortcut(QKeySequence("Ctrl+M"), self)
+        self.metrics_shortcut.activated.connect(self.toggle_metrics)
 
         # Path for saved solutions
         self.saved_solutions_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
                                                  'saved_solutions.json')
-        self.saved_solutions = {}
-        try:
-            self.saved_solutions = self.load_saved_solutions()
-        except Exception as e:
-            print(f"Error loading saved solutions: {e}")
-            self.saved_solutions = {}
-
-        self.next_solution_number = self.get_next_solution_number()
+        # Read from disk on first use, not at startup
+        self._saved_solutions = None
+        self._next_solution_number = None
 
         self.artillery_label = QLabel("Artillery:")
         self.artillery_combo = QComboBox()
@@ -52,6 +59,15 @@ class MainWindow(QMainWindow):
 
         self.high_arc_checkbox = QCheckBox("High Arc")
 
+        # Solves every charge and arc of the shell and picks the best by the criterion
+        self.criterion_combo = QComboBox()
+        for criterion, (label, _) in batchSolver.CRITERIA.items():
+            self.criterion_combo.addItem(label, criterion)
+        self.auto_charge_button = QPushButton("Auto Charge")
+        self.auto_charge_button.clicked.connect(self.auto_select_charge)
+
+        self.map_window = None
+
         self.air_friction_checkbox = QCheckBox("Air Friction")
         self.air_friction_checkbox.stateChanged.connect(self.toggle_air_friction)
 
@@ -129,6 +145,8 @@ class MainWindow(QMainWindow):
         charge_layout.addWidget(self.charge_combo)
         charge_layout.addWidget(self.high_arc_checkbox)
         charge_layout.addWidget(self.air_friction_checkbox)
+        charge_layout.addWidget(self.criterion_combo)
+        charge_layout.addWidget(self.auto_charge_button)
 
         artillery_position_layout.addWidget(self.artillery_position_label)
         artillery_position_layout.addWidget(self.artillery_x)
@@ -165,7 +183,24 @@ class MainWindow(QMainWindow):
 
         self.update_shells()
 
+    @property
+    def saved_solutions(self):
+        if self._saved_solutions is None:
+            self._saved_solutions = self.load_saved_solutions()
+        return self._saved_solutions
+
+    @property
+    def next_solution_number(self):
+        if self._next_solution_number is None:
+            self._next_solution_number = self.get_next_solution_number()
+        return self._next_solution_number
+
+    @next_solution_number.setter
+    def next_solution_number(self, value):
+        self._next_solution_number = value
+
     def open_svg_settings(self):
+        from ui.SVGSettingsWindow import SVGConverter
         self.svg_window = SVGConverter()
         self.svg_window.show()
 
@@ -253,6 +288,7 @@ class MainWindow(QMainWindow):
 
     def open_saved_solutions(self):
         try:
+            from solutionwindow import SavedSolutionsWindow
             self.saved_solutions_dialog = SavedSolutionsWindow(self)
             self.saved_solutions_dialog.show()
         except Exception as e:
@@ -263,16 +299,44 @@ class MainWindow(QMainWindow):
             print("Air Friction включен")
         else:
             print("Air Friction выключен")
+        self.update_map_rings()
 
     def open_map_window(self):
         try:
+            from mapwindow import MapWindow
             self.map_window = MapWindow()
             self.map_window.artillery_coordinates_selected.connect(self.update_artillery_position)
             self.map_window.target_coordinates_selected.connect(self.update_target_position)
+            self.map_window.coverage_requested.connect(self.start_coverage)
+            self.update_map_rings()
             self.map_window.show()
         except Exception as e:
             self.show_error(f"Error opening map window: {e}")
 
+    def start_coverage(self):
+        """Coverage map of the selected shell over the map's height data from the artillery marker"""
+        try:
+            from logic import coverageMap, heightsLogic
+            if self.map_window.artillery_coords is None:
+                raise ValueError("Поставьте артиллерию на карте")
+            height_file = self.map_window.height_file()
+            if height_file is None:
+                raise ValueError("Нет данных высот для этой карты")
+            system, shell = self.get_selected_config()
+            if system is None:
+                raise ValueError("Снаряд не выбран")
+
+            grid = heightsLogic.get_grid(height_file)
+            if grid is None:
+                raise ValueError("Нет данных высот для этой карты")
+            job = coverageMap.CoverageJob(grid, (*self.map_window.artillery_coords, self.map_window.artillery_height),
+                                          system, shell, {"temperature": self.temperature, "pressure": self.pressure},
+                                          air_friction=self.air_friction_checkbox.isChecked())
+            self.map_window.set_coverage(job.start())
+        except Exception as e:
+            metrics.count("ui.errors")
+            self.show_error(f"Error computing coverage: {e}")
+
     def open_meteo_settings(self):
         try:
             self.meteo_window = SettingsWindow(self)
@@ -331,6 +395,39 @@ class MainWindow(QMainWindow):
             print(f"Error loading JSON: {e}")
             return {"artillerySystems": []}
 
+    def apply_solver_settings(self):
+        """
+        Solver settings from config.json (solver*, solution*, analyticTolerance, firingTableTolerance,
+        surrogateTolerance, metrics)
+        """
+        self.table_tol = self.data.get("firingTableTolerance", firingTables.VERIFY_TOL)
+        self.surrogate_tol = self.data.get("surrogateTolerance")
+        metrics.enable(self.data.get("metrics", False))
+        try:
+            set_backend(self.data.get("solverBackend", "serial"))
+            if self.data.get("solverThreads"):
+                set_num_threads(self.data["solverThreads"])
+            if self.data.get("solutionCacheSize"):
+                solutionCache.set_cache_size(self.data["solutionCacheSize"])
+            if self.data.get("solutionStoreRows"):
+                solutionStore.set_max_rows(self.data["solutionStoreRows"])
+            solutionCache.set_analytic_tolerance(self.data.get("analyticTolerance"))
+        except Exception as e:
+            print(f"Error applying solver settings: {e}")
+
+    def toggle_metrics(self):
+        metrics.enable(not metrics.is_enabled())
+        self.statusBar().showMessage(f"Metrics recording {'on' if metrics.is_enabled() else 'off'}", 3000)
+
+    def closeEvent(self, event):
+        if metrics.is_enabled():
+            try:
+                metrics.dump_json(self.metrics_path + ".json")
+                metrics.dump_csv(self.metrics_path + ".csv")
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+        super().closeEvent(event)
+
     def update_shells(self):
         try:
             self.shell_combo.clear()
@@ -347,6 +444,7 @@ class MainWindow(QMainWindow):
     def save_additional_settings(self, temperature, pressure):
         self.temperature = temperature
         self.pressure = pressure
+        self.update_map_rings()
 
     def update_charges(self):
         try:
@@ -362,31 +460,78 @@ class MainWindow(QMainWindow):
                             self.charge_speed = shell.get("chargeSpeed", 0)
                             for charge_name, charge_value in shell.get("charges", {}).items():
                                 self.charge_combo.addItem(charge_name, charge_value)
+                            self.update_map_rings()
                             return
         except Exception as e:
             print(f"Error updating charges: {e}")
 
+    def read_positions(self):
+        """(x1, y1, h1, x2, y2, h2) from the position fields, or None after showing the error"""
+        # Validate input fields
+        if not all([self.artillery_x.text(), self.artillery_y.text(), self.artillery_h.text(),
+                    self.target_x.text(), self.target_y.text(), self.target_h.text()]):
+            self.solutions_text.setText("Error: All position fields must be filled")
+            return None
+
+        try:
+            with metrics.span("ui.parse"):
+                return tuple(float(field.text()) for field in (self.artillery_x, self.artillery_y, self.artillery_h,
+                                                               self.target_x, self.target_y, self.target_h))
+        except ValueError:
+            self.solutions_text.setText("Error: Position coordinates must be valid numbers")
+            return None
+
+    def auto_select_charge(self):
+        """Fills charge and arc with the best solution over every charge of the shell, then calculates it"""
+        try:
+            positions = self.read_positions()
+            if positions is None:
+                return
+            x1, y1, h1, x2, y2, h2 = positions
+            system, shell = self.get_selected_config()
+            if system is None:
+                raise ValueError("Снаряд не выбран")
+
+            criterion = self.criterion_combo.currentData()
+            with metrics.span("ui.auto_charge"):
+                ranked, pruned = batchSolver.select_charge(
+                    system, shell, calculate_distance(x1, y1, x2, y2), h2 - h1,
+                    {"temperature": self.temperature, "pressure": self.pressure}, criterion,
+                    air_friction=self.air_friction_checkbox.isChecked())
+            if not ranked:
+                raise ValueError("Цель вне досягаемости для всех зарядов")
+
+            best = ranked[0]
+            self.charge_combo.setCurrentIndex(self.charge_combo.findText(best["charge"]))
+            self.high_arc_checkbox.setChecked(best["high_arc"])
+            self.calculate_solution()
+
+            arc = lambda candidate: "high" if candidate["high_arc"] else "low"
+            summary = "\n\nAuto charge - " + self.criterion_combo.currentText() + ":\n" + "\n".join(
+                f"{n}. {candidate['charge']} ({arc(candidate)}): {candidate['elevation']:.1f} MIL, "
+                f"{candidate['flight_time']:.1f} с"
+                for n, candidate in enumerate(ranked[:AUTO_CHARGE_LISTED], 1))
+            if pruned:
+                summary += f"\nOut of reach: {', '.join(pruned)}"
+            self.solutions_text.append(summary)
+        except ValueError as e:
+            metrics.count("ui.errors")
+            self.solutions_text.setText(f"Error: {e}")
+            self.save_solution_button.setEnabled(False)
+        except Exception as e:
+            metrics.count("ui.errors")
+            self.solutions_text.setText(f"Error: {str(e)}")
+            self.save_solution_button.setEnabled(False)
+
     def calculate_solution(self):
         try:
             # Reset save button
             self.save_solution_button.setEnabled(False)
 
-            # Validate input fields
-            if not all([self.artillery_x.text(), self.artillery_y.text(), self.artillery_h.text(),
-                        self.target_x.text(), self.target_y.text(), self.target_h.text()]):
-                self.solutions_text.setText("Error: All position fields must be filled")
-                return
-
-            try:
-                x1 = float(self.artillery_x.text())
-                y1 = float(self.artillery_y.text())
-                h1 = float(self.artillery_h.text())
-                x2 = float(self.target_x.text())
-                y2 = float(self.target_y.text())
-                h2 = float(self.target_h.text())
-            except ValueError:
-                self.solutions_text.setText("Error: Position coordinates must be valid numbers")
+            positions = self.read_positions()
+            if positions is None:
                 return
+            x1, y1, h1, x2, y2, h2 = positions
 
             distance = calculate_distance(x1, y1, x2, y2)
             azimuth = calculate_azimuth(x1, y1, x2, y2)
@@ -396,183 +541,343 @@ class MainWindow(QMainWindow):
             if selected_charge_value is None:
                 raise ValueError("Заряд не выбран")
 
-            charge_speed = selected_charge_value
-            elevation = None
-            mils_delta = None
-            flight_time = None
-
-            if self.air_friction_checkbox.isChecked():
-                high_arc = self.high_arc_checkbox.isChecked()
-                elevation = self.calculate_trajectory_with_air(
-                    distance,
-                    charge_speed,
-                    h1,
-                    h2,
-                    self.temperature,
-                    self.pressure,
-                    self.k_base,
-                    high_arc=high_arc
-                )
-                if elevation is None:
-                    raise ValueError("Не удалось найти угол с учетом сопротивления воздуха")
-
-                # Calculate flight time with air friction
-                # Convert elevation from mils to degrees
-                elevation_degrees = mil_to_degrees(elevation)
-
-                # Get atmospheric corrected parameters
-                pressure_pa = self.pressure * 100
-                temperature_k = self.temperature + 273.15
-                R = 287.05
-                rho_calculated = pressure_pa / (R * temperature_k)
-                rho_ratio = rho_calculated / 1.225  # rho_standard
-                k = self.k_base * rho_ratio
-                v0_corrected = charge_speed * (temperature_k / 288.15) ** 0.5
-
-                flight_time = calculate_flight_time_air(
-                    v0=v0_corrected,
-                    angle_deg=elevation_degrees,
-                    k=k,
-                    height_diff=h2 - h1
+            high_arc = self.high_arc_checkbox.isChecked()
+            with metrics.span("ui.solve"):
+                solution = self.solve_arc(selected_charge_value, distance, h1, h2, high_arc)
+            source, elevation, flight_time, mils_delta, trajectory = solution
+            metrics.count(f"ui.source.{source}")
+
+            # The solvers fly over empty air: replay the trajectory over the map's terrain
+            clearance = self.terrain_clearance(positions, selected_charge_value, solution)
+            masked_low_arc = None
+            if clearance is not None and clearance["obstruction"] is not None and not high_arc:
+                try:
+                    high_solution = self.solve_arc(selected_charge_value, distance, h1, h2, True)
+                    high_clearance = self.terrain_clearance(positions, selected_charge_value, high_solution)
+                except ValueError:
+                    high_clearance = None
+                system, _ = self.get_selected_config()
+                low, high = rangeEnvelope.elevation_limits(system) if system else rangeEnvelope.ELEVATION_DOMAIN
+                if (high_clearance is not None and high_clearance["obstruction"] is None
+                        and low <= high_solution[1] <= high):
+                    metrics.count("ui.terrain.high_arc")
+                    masked_low_arc = clearance["obstruction"]
+                    high_arc = True
+                    source, elevation, flight_time, mils_delta, trajectory = high_solution
+                    clearance = high_clearance
+
+            with metrics.span("ui.update"):
+                # Build solution text
+                solution_text = (
+                    f"Distance: {distance:.2f} м\n"
+                    f"Azimuth: {azimuth:.2f} mil\n"
+                    f"Elevation: {elevation:.2f} MIL\n"
+                    f"Deviation (1 mil): {mils:.2f} м\n"
                 )
 
-                # Use air friction range difference function
-                mils_delta = range_difference_for_1mil_airfriction(
-                    v0=charge_speed,
-                    angle_mil=elevation,
-                    temperature=self.temperature,
-                    pressure=self.pressure,
-                    k_base=self.k_base,
-                    height_diff=h2 - h1
-                )
-            else:
-                if self.high_arc_checkbox.isChecked():
-                    elevation = calculate_high_elevation(distance, selected_charge_value, h1, h2)
+                # Add flight time to solution text
+                if flight_time is not None and not isinstance(flight_time, str):
+                    solution_text += f"Flight Time: {flight_time:.2f} с\n"
                 else:
-                    elevation = calculate_elevation_with_height(distance, selected_charge_value, h1, h2)
-
-                # Calculate flight time without air friction
-                elevation_rad = mil_to_rad(elevation)
-                flight_time = calculate_flight_time(
-                    v=selected_charge_value,
-                    theta_rad=elevation_rad,
-                    h_s=h1,
-                    h_t=h2
-                )
-
-                mils_delta = range_difference_for_1mil(selected_charge_value, elevation, h1, h2)
+                    solution_text += f"Flight Time: {flight_time if isinstance(flight_time, str) else 'Not available'}\n"
 
-            # Build solution text
-            solution_text = (
-                f"Distance: {distance:.2f} м\n"
-                f"Azimuth: {azimuth:.2f} mil\n"
-                f"Elevation: {elevation:.2f} MIL\n"
-                f"Deviation (1 mil): {mils:.2f} м\n"
-            )
+                # Only add mils_delta if it's available (not None and not string error message)
+                if mils_delta is not None and not isinstance(mils_delta, str):
+                    solution_text += f"ΔDeviation in range(1 mil): {mils_delta:.2f} м"
+                else:
+                    solution_text += f"ΔDeviation in range(1 mil): {mils_delta if isinstance(mils_delta, str) else 'Not available'}"
+
+                if trajectory.get("apex_height") is not None:
+                    solution_text += (
+                        f"\nApex: {trajectory['apex_height']:.0f} м\n"
+                        f"Impact angle: {trajectory['impact_angle']:.1f}°\n"
+                        f"Impact velocity: {trajectory['impact_velocity']:.0f} м/с"
+                    )
+
+                if masked_low_arc is not None:
+                    solution_text += (f"\nLow arc masked by terrain at {masked_low_arc['distance']:.0f} м "
+                                      f"({masked_low_arc['terrain']:.0f} м): high arc")
+                if clearance is not None:
+                    obstruction = clearance["obstruction"]
+                    if obstruction is not None:
+                        solution_text += (f"\nTERRAIN OBSTRUCTION at {obstruction['distance']:.0f} м "
+                                          f"({obstruction['x']:.0f}, {obstruction['y']:.0f}; "
+                                          f"terrain {obstruction['terrain']:.0f} м)")
+                    elif not math.isinf(clearance["clearance"]):
+                        solution_text += (f"\nTerrain clearance: {clearance['clearance']:.1f} м "
+                                          f"at {clearance['clearance_at']:.0f} м")
+
+                if self.air_friction_checkbox.isChecked():
+                    solution_text += "\n(Air Friction)"
+
+                self.solutions_text.setText(solution_text)
+
+                # Store solution details for saving
+                solution_data = {
+                    "artillery": self.artillery_combo.currentText(),
+                    "shell": self.shell_combo.currentText(),
+                    "charge": self.charge_combo.currentText(),
+                    "distance": f"{distance:.2f} м",
+                    "azimuth": f"{azimuth:.2f} mil",
+                    "elevation": f"{elevation:.2f} MIL",
+                    "deviation(1 mil)": f"{mils:.2f} м",
+                    "with_air_friction": self.air_friction_checkbox.isChecked(),
+                    "high_arc": high_arc,
+                    "temperature": f"{self.temperature}",
+                    "pressure": f"{self.pressure}",
+                    "artillery_position": {
+                        "x": x1,
+                        "y": y1,
+                        "h": h1
+                    },
+                    "target_position": {
+                        "x": x2,
+                        "y": y2,
+                        "h": h2
+                    }
+                }
 
-            # Add flight time to solution text
-            if flight_time is not None and not isinstance(flight_time, str):
-                solution_text += f"Flight Time: {flight_time:.2f} с\n"
-            else:
-                solution_text += f"Flight Time: {flight_time if isinstance(flight_time, str) else 'Not available'}\n"
+                # Add flight time to solution data
+                if flight_time is not None and not isinstance(flight_time, str):
+                    solution_data["flight_time"] = f"{flight_time:.2f} с"
+                else:
+                    solution_data["flight_time"] = f"{flight_time if isinstance(flight_time, str) else 'Not available'}"
 
-            # Only add mils_delta if it's available (not None and not string error message)
-            if mils_delta is not None and not isinstance(mils_delta, str):
-                solution_text += f"ΔDeviation in range(1 mil): {mils_delta:.2f} м"
-            else:
-                solution_text += f"ΔDeviation in range(1 mil): {mils_delta if isinstance(mils_delta, str) else 'Not available'}"
-
-            if self.air_friction_checkbox.isChecked():
-                solution_text += "\n(Air Friction)"
-
-            self.solutions_text.setText(solution_text)
-
-            # Store solution details for saving
-            solution_data = {
-                "artillery": self.artillery_combo.currentText(),
-                "shell": self.shell_combo.currentText(),
-                "charge": self.charge_combo.currentText(),
-                "distance": f"{distance:.2f} м",
-                "azimuth": f"{azimuth:.2f} mil",
-                "elevation": f"{elevation:.2f} MIL",
-                "deviation(1 mil)": f"{mils:.2f} м",
-                "with_air_friction": self.air_friction_checkbox.isChecked(),
-                "high_arc": self.high_arc_checkbox.isChecked(),
-                "temperature": f"{self.temperature}",
-                "pressure": f"{self.pressure}",
-                "artillery_position": {
-                    "x": x1,
-                    "y": y1,
-                    "h": h1
-                },
-                "target_position": {
-                    "x": x2,
-                    "y": y2,
-                    "h": h2
-                }
-            }
+                # Add delta deviation for both cases (with and without friction)
+                if mils_delta is not None and not isinstance(mils_delta, str):
+                    solution_data["Δdeviation(1 mil)"] = f"{mils_delta:.2f} м"
+                else:
+                    solution_data["Δdeviation(1 mil)"] = f"{mils_delta if isinstance(mils_delta, str) else 'Not available'}"
 
-            # Add flight time to solution data
-            if flight_time is not None and not isinstance(flight_time, str):
-                solution_data["flight_time"] = f"{flight_time:.2f} с"
-            else:
-                solution_data["flight_time"] = f"{flight_time if isinstance(flight_time, str) else 'Not available'}"
+                if trajectory.get("apex_height") is not None:
+                    solution_data["apex"] = f"{trajectory['apex_height']:.0f} м"
+                    solution_data["impact_angle"] = f"{trajectory['impact_angle']:.1f}°"
+                    solution_data["impact_velocity"] = f"{trajectory['impact_velocity']:.0f} м/с"
 
-            # Add delta deviation for both cases (with and without friction)
-            if mils_delta is not None and not isinstance(mils_delta, str):
-                solution_data["Δdeviation(1 mil)"] = f"{mils_delta:.2f} м"
-            else:
-                solution_data["Δdeviation(1 mil)"] = f"{mils_delta if isinstance(mils_delta, str) else 'Not available'}"
+                if clearance is not None and not math.isinf(clearance["clearance"]):
+                    solution_data["terrain_clearance"] = f"{clearance['clearance']:.1f} м"
+                    if clearance["obstruction"] is not None:
+                        solution_data["terrain_obstruction"] = f"{clearance['obstruction']['distance']:.0f} м"
 
-            self.current_solution = solution_data
+                self.current_solution = solution_data
 
-            # Enable save button after calculation
-            self.save_solution_button.setEnabled(True)
+                # Enable save button after calculation
+                self.save_solution_button.setEnabled(True)
 
         except ValueError as e:
+            metrics.count("ui.errors")
             self.solutions_text.setText(f"Error: {e}")
             self.save_solution_button.setEnabled(False)
         except Exception as e:
+            metrics.count("ui.errors")
             self.solutions_text.setText(f"Error: {str(e)}")
             self.save_solution_button.setEnabled(False)
 
-    def calculate_trajectory_with_air(self, distance, v0, h1, h2, temperature, pressure, k_base, high_arc=False):
-        height_diff = h2 - h1
-        try:
-            if high_arc:
-                print(
-                    f"[DEBUG] Settings hight: v0={v0}, distance={distance}, height_diff={height_diff}, T={temperature}, P={pressure}, k_base={k_base}")
-                angle = find_high_trajectory(
-                    v0=v0,
-                    distance=distance,
-                    height_diff=height_diff,
-                    temperature=temperature,
-                    pressure=pressure,
-                    k_base=k_base,
-                    plot=False
-                )
-            else:
-                print(
-                    f"[DEBUG] Settings low: v0={v0}, distance={distance}, height_diff={height_diff}, T={temperature}, P={pressure}, k_base={k_base}")
-                angle = find_optimal_angle(
-                    v0=v0,
-                    distance=distance,
-                    height_diff=height_diff,
-                    temperature=temperature,
-                    pressure=pressure,
-                    k_base=k_base,
-                    plot=False
+    def solve_arc(self, charge_speed, distance, h1, h2, high_arc):
+        """
+        Solution of the selected charge on one arc: firing table, surrogate or drag solver with air friction,
+        closed form without. Returns (source, elevation, flight_time, range_per_mil, trajectory);
+        trajectory - apex and impact data when the drag solver returned them; for the closed form
+        the unrounded elevation and its miss in m.
+        """
+        trajectory = {}
+        table_solution = None
+        if self.air_friction_checkbox.isChecked():
+            if self.lookup_envelope(charge_speed, distance, h2 - h1) is False:
+                metrics.count("ui.source.envelope")
+                raise ValueError("Цель вне досягаемости для этого заряда")
+            source = "table"
+            table_solution = self.lookup_firing_table(charge_speed, distance, h2 - h1, high_arc)
+            if table_solution is None:
+                source = "surrogate"
+                table_solution = self.lookup_surrogate(charge_speed, distance, h2 - h1, high_arc)
+
+        if table_solution is not None:
+            elevation = table_solution["elevation"]
+            flight_time = table_solution["flight_time"]
+            mils_delta = table_solution["range_per_mil"]
+        elif self.air_friction_checkbox.isChecked():
+            source = "solver"
+            system, shell = self.get_selected_config()
+            label = (system["name"], shell["name"], self.charge_combo.currentText()) if system else None
+            solution = solutionCache.solve(charge_speed, distance, h2 - h1, self.temperature, self.pressure,
+                                           self.k_base, high_arc=high_arc, label=label)
+            if solution is None:
+                raise ValueError("Не удалось найти угол с учетом сопротивления воздуха")
+
+            elevation = solution["elevation"]
+            flight_time = solution["flight_time"]
+            mils_delta = solution["range_per_mil"]
+            trajectory = solution
+        else:
+            source = "vacuum"
+            solve_vacuum = calculate_high_elevation if high_arc else calculate_elevation_with_height
+            elevation = solve_vacuum(distance, charge_speed, h1, h2)
+            exact = solve_vacuum(distance, charge_speed, h1, h2, rounded=False)
+            if not isinstance(exact, str):
+                # The low-arc formula corrects for the height difference only to first order
+                landed = calculate_range(charge_speed, mil_to_rad(exact), h1, h2)
+                trajectory = {"elevation": exact, "miss": abs(landed - distance) if landed is not None else 0.0}
+
+            # Calculate flight time without air friction
+            with metrics.span("ui.flight_time"):
+                elevation_rad = mil_to_rad(elevation)
+                flight_time = calculate_flight_time(
+                    v=charge_speed,
+                    theta_rad=elevation_rad,
+                    h_s=h1,
+                    h_t=h2
                 )
 
-            if angle is None:
-                raise ValueError("Не удалось найти угол с учетом сопротивления воздуха")
+            with metrics.span("ui.range_per_mil"):
+                mils_delta = range_difference_for_1mil(charge_speed, elevation, h1, h2)
+        return source, elevation, flight_time, mils_delta, trajectory
+
+    def terrain_grid(self):
+        """Height grid of the map in the map window, None without height data"""
+        if self.map_window is None:
+            return None
+        height_file = self.map_window.height_file()
+        if height_file is None:
+            return None
+        try:
+            from logic import heightsLogic
+            return heightsLogic.get_grid(height_file)
+        except ValueError as e:
+            print(f"Error reading height grid: {e}")
+            return None
 
-            return degrees_to_mil(angle)
+    def terrain_clearance(self, positions, v0, solution):
+        """
+        terrainClearance.check of a solve_arc solution over the map's height data; None without it.
+        The unrounded elevation is replayed; coming down short of the target by at most one mil of range
+        (plus the closed form's own miss) counts as the impact.
+        """
+        _, elevation, _, range_per_mil, trajectory = solution
+        elevation = trajectory.get("elevation", elevation)
+        if not isinstance(elevation, (int, float)):
+            return None
+        landing_tol = trajectory.get("miss", 0.0)
+        if isinstance(range_per_mil, (int, float)):
+            landing_tol += abs(range_per_mil)
+        grid = self.terrain_grid()
+        if grid is None:
+            return None
+        x1, y1, h1, x2, y2, h2 = positions
+        try:
+            return terrainClearance.check(grid, (x1, y1, h1), (x2, y2, h2), v0, elevation, self.temperature,
+                                          self.pressure, self.k_base,
+                                          air_friction=self.air_friction_checkbox.isChecked(),
+                                          landing_tol=landing_tol)
+        except Exception as e:
+            print(f"Error checking terrain clearance: {e}")
+            return None
+
+    def get_selected_config(self):
+        """Config entries (system, shell) of the current selection"""
+        for system in self.data.get("artillerySystems", []):
+            if system["name"] == self.artillery_combo.currentText():
+                for shell in system.get("compatibleShells", []):
+                    if shell["name"] == self.shell_combo.currentText():
+                        return system, shell
+        return None, None
+
+    def lookup_firing_table(self, v0, distance, height_diff, high_arc):
+        """Verified solution from the cached firing table; starts building a missing table in the background"""
+        system, shell = self.get_selected_config()
+        charge_name = self.charge_combo.currentText()
+        if not self.table_tol or system is None or charge_name not in shell.get("charges", {}):
+            return None
 
+        try:
+            table = firingTables.get_table(system, shell, charge_name, self.temperature, self.pressure)
+            if table is None:
+                firingTables.build_table_async(system, shell, charge_name, self.temperature, self.pressure)
+                return None
+            return firingTables.solve(table, v0, distance, height_diff, self.temperature, self.pressure, self.k_base,
+                                      high_arc=high_arc, verify_tol=self.table_tol)
         except Exception as e:
-            self.show_error(f"Помилка розрахунку: {str(e)}")
+            print(f"Error reading firing table: {e}")
+            return None
+
+    def lookup_surrogate(self, v0, distance, height_diff, high_arc):
+        """Verified solution from the meteo-independent surrogate; starts building a missing one in the background"""
+        system, shell = self.get_selected_config()
+        charge_name = self.charge_combo.currentText()
+        if not self.surrogate_tol or system is None or charge_name not in shell.get("charges", {}):
             return None
 
+        try:
+            surrogate = surrogateGrid.get_surrogate(system, shell, charge_name)
+            if surrogate is None:
+                surrogateGrid.build_surrogate_async(system, shell, charge_name)
+                return None
+            return surrogateGrid.solve(surrogate, v0, distance, height_diff, self.temperature, self.pressure,
+                                       self.k_base, high_arc=high_arc, verify_tol=self.surrogate_tol)
+        except Exception as e:
+            print(f"Error reading surrogate: {e}")
+            return None
+
+
+    def lookup_envelope(self, v0, distance, height_diff):
+        """Range envelope check of the selected charge: True, False or None; starts building missing envelopes"""
+        system, shell = self.get_selected_config()
+        charge_name = self.charge_combo.currentText()
+        if system is None or charge_name not in shell.get("charges", {}):
+            return None
+
+        try:
+            envelope = rangeEnvelope.get_envelope(system, shell, charge_name)
+            if envelope is None:
+                rangeEnvelope.build_envelopes_async(system, shell, list(shell["charges"]))
+                return None
+            return rangeEnvelope.check(envelope, v0, distance, height_diff, self.temperature, self.pressure,
+                                       self.k_base)
+        except Exception as e:
+            print(f"Error reading range envelope: {e}")
+            return None
+
+    def range_rings(self):
+        """
+        Range rings of the selected shell at zero height difference and the current meteo.
+        Returns (rings, pending): rings - [(charge, min_range, max_range)], pending - envelopes still being built.
+        """
+        system, shell = self.get_selected_config()
+        if system is None:
+            return [], False
+
+        limits = rangeEnvelope.elevation_limits(system)
+        rings = []
+        missing = []
+        for charge_name, v0 in shell.get("charges", {}).items():
+            if not self.air_friction_checkbox.isChecked():
+                rings.append((charge_name, *rangeEnvelope.vacuum_ranges(v0, limits)))
+                continue
+            envelope = rangeEnvelope.get_envelope(system, shell, charge_name)
+            if envelope is None:
+                missing.append(charge_name)
+                continue
+            v0_corrected, k = air_corrected(v0, self.temperature, self.pressure, self.k_base)
+            reach = rangeEnvelope.ranges(envelope, v0_corrected, k / self.k_base, 0.0)
+            if reach is not None and not math.isnan(reach[1]):
+                rings.append((charge_name, *reach))
+
+        if missing:
+            rangeEnvelope.build_envelopes_async(system, shell, missing)
+        return rings, any(rangeEnvelope.is_building(system, shell, name) for name in missing)
+
+    def update_map_rings(self):
+        """Sends the range rings to the open map; polls until missing envelopes are built"""
+        if self.map_window is None:
+            return
+        try:
+            rings, pending = self.range_rings()
+            self.map_window.set_range_rings(rings)
+            if pending:
+                QTimer.singleShot(RING_POLL_MS, self.update_map_rings)
+        except Exception as e:
+            print(f"Error updating range rings: {e}")
+
 
 def create_folders():
     try:
@@ -1,12 +1,14 @@
 import os
 
+import numpy as np
 from PyQt5.QtWidgets import (
     QMainWindow, QGraphicsView, QGraphicsScene, QVBoxLayout, QWidget, QComboBox, QLabel, QPushButton, QHBoxLayout,
     QMessageBox, QLineEdit
 )
-from PyQt5.QtGui import QPixmap, QPainter, QBrush, QCursor
+from PyQt5.QtGui import QPixmap, QPainter, QBrush, QCursor, QPen, QColor, QImage, QTransform
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
-from PyQt5.QtWidgets import QGraphicsEllipseItem
+from PyQt5.QtWidgets import QGraphicsEllipseItem, QGraphicsItem, QGraphicsSimpleTextItem
+from logic.coverageMap import UNREACHABLE
 from logic.heightsLogic import get_height_for_coordinates
 from PyQt5.QtSvg import QGraphicsSvgItem
 
@@ -17,8 +19,24 @@ def svg_map_loader(map_dir, map_files):
         yield map_path
 
 
+# Stacking order: the coverage overlay over the map, markers and rings over the overlay
+COVERAGE_Z = 1
+MARKER_Z = 2
+# How often finished coverage tiles are drawn, ms
+COVERAGE_POLL_MS = 200
+# Elevation bands of the coverage overlay, mil: alternate bands are darker
+COVERAGE_BAND_MIL = 100
+COVERAGE_ALPHA = 110
+
+
+def charge_color(index, count):
+    """Colour of a charge on the map, shared by the range rings and the coverage overlay"""
+    return QColor.fromHsv(int(300 * index / max(count, 1)), 220, 220)
+
+
 class MapView(QGraphicsView):
     point_added = pyqtSignal(str, float, float)
+    cursor_moved = pyqtSignal(float, float)
 
     def __init__(self, scene):
         super().__init__(scene)
@@ -31,6 +49,7 @@ class MapView(QGraphicsView):
         self.last_mouse_position = None
         self.current_markers = {}
         self.selected_point_type = None
+        self.setMouseTracking(True)
 
     def wheelEvent(self, event):
         zoom_in_factor = 1.25
@@ -60,6 +79,9 @@ class MapView(QGraphicsView):
             self.last_mouse_position = event.pos()
             self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
             self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+        else:
+            position = self.mapToScene(event.pos())
+            self.cursor_moved.emit(position.x(), position.y())
         super().mouseMoveEvent(event)
 
     def mouseReleaseEvent(self, event):
@@ -79,6 +101,7 @@ class MapView(QGraphicsView):
         circle = QGraphicsEllipseItem(-5, -5, 10, 10)
         circle.setBrush(QBrush(color))
         circle.setPos(x, y)
+        circle.setZValue(MARKER_Z)
         self.scene().addItem(circle)
 
         self.current_markers[point_type] = circle
@@ -88,12 +111,19 @@ class MapView(QGraphicsView):
 class MapWindow(QMainWindow):
     artillery_coordinates_selected = pyqtSignal(tuple, float)
     target_coordinates_selected = pyqtSignal(tuple, float)
+    coverage_requested = pyqtSignal()
 
     def __init__(self):
         super().__init__()
         self.current_map_height = 0
         self.current_map_item = None
         self.current_pixmap_height = 0
+        # Coverage job of the artillery position and the scene items of its finished tiles;
+        # set before the first map is loaded, which clears them
+        self.coverage = None
+        self.coverage_items = []
+        self.coverage_timer = QTimer(self)
+        self.coverage_timer.timeout.connect(self.draw_coverage_tiles)
         self.setWindowTitle("Map Viewer")
         self.resize(800, 600)
 
@@ -104,6 +134,7 @@ class MapWindow(QMainWindow):
         self.scene = QGraphicsScene()
         self.map_view = MapView(self.scene)
         self.map_view.point_added.connect(self.handle_point_added)
+        self.map_view.cursor_moved.connect(self.show_coverage_at)
 
         self.artillery_button = QPushButton("Add Artillery")
         self.artillery_button.clicked.connect(lambda: self.select_point("Artillery"))
@@ -111,6 +142,10 @@ class MapWindow(QMainWindow):
         self.target_button = QPushButton("Add Target")
         self.target_button.clicked.connect(lambda: self.select_point("Target"))
 
+        self.coverage_button = QPushButton("Coverage")
+        self.coverage_button.setToolTip("Charge and elevation for every point of the map from the artillery position")
+        self.coverage_button.clicked.connect(self.coverage_requested.emit)
+
         self.map_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'map', 'img')
         self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'map', 'data')
 
@@ -125,6 +160,7 @@ class MapWindow(QMainWindow):
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.artillery_button)
         button_layout.addWidget(self.target_button)
+        button_layout.addWidget(self.coverage_button)
 
         layout.addWidget(self.map_label)
         layout.addWidget(self.map_selector)
@@ -141,6 +177,10 @@ class MapWindow(QMainWindow):
         self.artillery_coords = None
         self.target_coords = None
 
+        # [(charge, min_range, max_range)] from the main window and the scene items drawing them
+        self.range_rings = []
+        self.ring_items = []
+
     def select_point(self, point_type):
         self.map_view.selected_point_type = point_type
 
@@ -180,7 +220,7 @@ class MapWindow(QMainWindow):
             self.display_error("Failed to load raster image.")
             return
 
-        self.scene.clear()
+        self.clear_scene()
         self.current_map_item = self.scene.addPixmap(pixmap)
         self.current_map_height = pixmap.height()
         self.reset_and_fit()
@@ -191,7 +231,7 @@ class MapWindow(QMainWindow):
             self.display_error("Failed to load SVG image.")
             return
 
-        self.scene.clear()
+        self.clear_scene()
         self.current_map_item = svg_item
         self.scene.addItem(svg_item)
 
@@ -214,7 +254,7 @@ class MapWindow(QMainWindow):
         self.map_view.scale_factor = 1.0
 
     def display_map(self, pixmap):
-        self.scene.clear()
+        self.clear_scene()
         self.reset_zoom()
         self.scene.addPixmap(pixmap)
         self.map_view.setScene(self.scene)
@@ -222,13 +262,137 @@ class MapWindow(QMainWindow):
         self.current_pixmap_height = pixmap.height()  # Сохраняем высоту карты
         QTimer.singleShot(150, lambda: self.map_view.fitInView(self.scene.itemsBoundingRect(), Qt.KeepAspectRatio))
 
-    def handle_point_added(self, point_type, x, y):
-        corrected_y = self.current_map_height - y
+    def clear_scene(self):
+        """scene.clear() deletes the markers, rings and coverage too: forget them"""
+        self.set_coverage(None)
+        self.scene.clear()
+        self.map_view.current_markers.clear()
+        self.ring_items = []
+
+    def set_range_rings(self, rings):
+        self.range_rings = rings
+        self.draw_range_rings()
+
+    def draw_range_rings(self):
+        """Min (dashed) and max range ring of every charge around the artillery marker (1 scene unit = 1 m)"""
+        for item in self.ring_items:
+            self.scene.removeItem(item)
+        self.ring_items = []
+
+        marker = self.map_view.current_markers.get("Artillery")
+        if marker is None:
+            return
+        center = marker.pos()
+        for n, (charge_name, min_range, max_range) in enumerate(self.range_rings):
+            color = charge_color(n, len(self.range_rings))
+            for radius, style in ((max_range, Qt.SolidLine), (min_range, Qt.DashLine)):
+                # A ring within the marker would only hide it
+                if radius <= 5:
+                    continue
+                pen = QPen(color, 2, style)
+                pen.setCosmetic(True)
+                ring = QGraphicsEllipseItem(center.x() - radius, center.y() - radius, 2 * radius, 2 * radius)
+                ring.setPen(pen)
+                ring.setZValue(MARKER_Z)
+                ring.setToolTip(f"{charge_name}: {min_range:.0f} - {max_range:.0f} м")
+                self.scene.addItem(ring)
+                self.ring_items.append(ring)
+
+            label = QGraphicsSimpleTextItem(charge_name)
+            label.setBrush(QBrush(color))
+            label.setFlag(QGraphicsItem.ItemIgnoresTransformations)
+            label.setPos(center.x(), center.y() - max_range)
+            label.setZValue(MARKER_Z)
+            self.scene.addItem(label)
+            self.ring_items.append(label)
+
+    def height_file(self):
+        """Height data of the current map, None if it has none"""
         map_name = os.path.splitext(self.map_selector.currentText())[0]
         height_file = os.path.join(self.data_dir, f"{map_name}.txt")
-
         if not os.path.exists(height_file):
             print(f"Height file {height_file} not found!")
+            return None
+        return height_file
+
+    def set_coverage(self, job):
+        """Replaces the coverage overlay with the tiles of a started CoverageJob as they finish; None clears it"""
+        if self.coverage is not None:
+            self.coverage.cancel()
+        self.coverage_timer.stop()
+        for item in self.coverage_items:
+            self.scene.removeItem(item)
+        self.coverage_items = []
+        self.coverage = job
+        if job is not None:
+            self.coverage_timer.start(COVERAGE_POLL_MS)
+
+    def draw_coverage_tiles(self):
+        job = self.coverage
+        if job is None:
+            self.coverage_timer.stop()
+            return
+        for rows, cols in job.take_tiles():
+            self.draw_coverage_tile(job, rows, cols)
+        self.statusBar().showMessage(f"Coverage: {job.finished}/{len(job.tiles)} tiles")
+        if job.done:
+            self.coverage_timer.stop()
+
+    def draw_coverage_tile(self, job, rows, cols):
+        """One tile as an image item: hue by charge, paler on the high arc, darker every other elevation band"""
+        charge = job.charge[rows, cols][::-1]
+        if not (charge != UNREACHABLE).any():
+            return
+        elevation = job.elevation[rows, cols][::-1]
+        high_arc = job.high_arc[rows, cols][::-1]
+
+        count = len(job.charge_names)
+        palette = np.zeros((count, 2, 2), dtype=np.uint32)
+        for n in range(count):
+            hue = charge_color(n, count).hsvHue()
+            for arc, saturation in enumerate((220, 110)):
+                for band, value in enumerate((230, 160)):
+                    palette[n, arc, band] = QColor.fromHsv(hue, saturation, value, COVERAGE_ALPHA).rgba()
+
+        reachable = charge != UNREACHABLE
+        band = np.zeros(charge.shape, dtype=np.int64)
+        band[reachable] = np.floor(elevation[reachable] / COVERAGE_BAND_MIL).astype(np.int64) % 2
+        pixels = np.zeros(charge.shape, dtype=np.uint32)
+        pixels[reachable] = palette[charge[reachable], high_arc[reachable].astype(np.int64), band[reachable]]
+        pixels = np.ascontiguousarray(pixels)
+        image = QImage(pixels.data, pixels.shape[1], pixels.shape[0], pixels.strides[0],
+                       QImage.Format_ARGB32).copy()
+
+        # Grid rows run north, scene rows south; one pixel is one cell centred on its grid point
+        xs, ys = job.xs[cols], job.ys[rows]
+        step_x = xs[1] - xs[0] if len(xs) > 1 else job.xs[1] - job.xs[0]
+        step_y = ys[1] - ys[0] if len(ys) > 1 else job.ys[1] - job.ys[0]
+        item = self.scene.addPixmap(QPixmap.fromImage(image))
+        item.setTransform(QTransform.fromScale(step_x, step_y))
+        item.setPos(xs[0] - step_x / 2, self.current_map_height - ys[-1] - step_y / 2)
+        item.setZValue(COVERAGE_Z)
+        self.coverage_items.append(item)
+
+    def show_coverage_at(self, x, y):
+        if self.coverage is None:
+            return
+        cell = self.coverage.lookup(x, self.current_map_height - y)
+        if cell is None:
+            if self.coverage.done:
+                self.statusBar().showMessage("Out of reach")
+            return
+        charge_name, high_arc, elevation = cell
+        self.statusBar().showMessage(f"{charge_name}, {'high' if high_arc else 'low'} arc: {elevation:.0f} MIL")
+
+    def handle_point_added(self, point_type, x, y):
+        if point_type == "Artillery":
+            self.draw_range_rings()
+            # The overlay belongs to the old position
+            self.set_coverage(None)
+
+        corrected_y = self.current_map_height - y
+        height_file = self.height_file()
+        if height_file is None:
             return
 
         height = get_height_for_coordinates(x, corrected_y, height_file)
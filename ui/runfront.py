@@ -1,8 +1,15 @@
+import multiprocessing
 import sys
 from PyQt5 import QtWidgets
+from logic.kernelWarmup import start_warm_up
 from ui.mainwindow import MainWindow
 
-app = QtWidgets.QApplication(sys.argv)
-window = MainWindow()
-window.show()
-sys.exit(app.exec_())
+if __name__ == "__main__":
+    # Worker processes (batchSolver.select_charge) re-import this module: only the main process starts the UI
+    multiprocessing.freeze_support()
+    start_warm_up()
+
+    app = QtWidgets.QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec_())